@@ -0,0 +1,474 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the providers used by the phase 0 multimodal spike.
+
+Implements the routes the spike calls so parsers, concurrency modes and
+pipeline overhead can be exercised offline and deterministically:
+- ZenMux Vertex image: POST .../publishers/{provider}/models/{model}:generateContent
+- OpenAI-style image: POST .../images/generations
+- OpenAI-style audio: POST .../audio/speech
+- ElevenLabs TTS: POST /v1/text-to-speech/{voice_id}[/stream]
+- OpenAI-style chat (storyboard planner): POST .../chat/completions, SSE when "stream" is set
+
+Latency, payload size, error rate, per-route capacity and response shapes are
+configurable. Start it from the spike with --mock-provider, from Python with
+start_mock_server(), or standalone with `python Scripts/phase0_mock_provider_server.py --port 8765`.
+"""
+
+from __future__ import annotations
+
+import argparse
+import base64
+import json
+import math
+import random
+import re
+import struct
+import sys
+import threading
+import time
+import zlib
+from dataclasses import dataclass, fields
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, cast
+
+
+IMAGE_SHAPES = ("auto", "inline_data", "b64_json", "url", "binary", "403", "500")
+AUDIO_SHAPES = ("binary", "audio_data", "data_b64", "403", "500")
+
+VERTEX_ROUTE = re.compile(r"/publishers/[^/]+/models/[^/:]+:generateContent$")
+ELEVENLABS_ROUTE = re.compile(r"/v1/text-to-speech/[^/]+(/stream)?$")
+MEDIA_ROUTE = re.compile(r"/mock-media/(\d+)\.png$")
+# The spike's planner prompt names the word pair on "Word 1: ..." / "Word 2: ..." lines.
+PLANNER_WORD_LINE = re.compile(r"^Word ([12]): (.+)$", re.MULTILINE)
+STORYBOARD_FRAME_ROLES = ("word1_only", "word2_only", "overlap", "non_interchangeable")
+
+
+@dataclass
+class MockProviderConfig:
+    image_latency: float = 0.0
+    audio_latency: float = 0.0
+    # Uniform +/- jitter added to every latency, in seconds.
+    latency_jitter: float = 0.0
+    image_bytes: int = 256 * 1024
+    audio_bytes: int = 48 * 1024
+    image_shape: str = "auto"
+    audio_shape: str = "binary"
+    # Probability that a generation request fails with error_status instead.
+    error_rate: float = 0.0
+    error_status: int = 500
+    # Sent as Retry-After on injected 429/503 errors when set.
+    retry_after: float | None = None
+    # Per-route capacity: generation requests beyond this many in flight get a 429 (0 disables).
+    route_capacity: int = 0
+    # Extra latency per other in-flight request on the same route, to model provider queueing.
+    latency_per_in_flight: float = 0.0
+    stream_chunk_bytes: int = 4096
+    stream_chunk_delay: float = 0.02
+    # Chat route: delay before the first token, then characters and pause per SSE event.
+    chat_latency: float = 0.0
+    chat_chunk_chars: int = 16
+    chat_chunk_delay: float = 0.01
+    seed: int = 0
+
+
+def storyboard_plan_text(prompt: str) -> str:
+    """A fenced JSON storyboard plan for the word pair named in ``prompt``, one frame per line."""
+    words = dict(PLANNER_WORD_LINE.findall(prompt))
+    word1, word2 = words.get("1", "word1").strip(), words.get("2", "word2").strip()
+    scenes = {
+        "word1_only": (f"only '{word1}' fits", f"This is {word1}."),
+        "word2_only": (f"only '{word2}' fits", f"This is {word2}."),
+        "overlap": (f"both '{word1}' and '{word2}' fit", f"Here, both {word1} and {word2} work."),
+        "non_interchangeable": (f"'{word1}' and '{word2}' cannot be swapped", f"You cannot swap {word1} and {word2} here."),
+    }
+    frames = [
+        json.dumps(
+            {
+                "role": role,
+                "image_prompt": f"Simple educational illustration, clean style. A scene where {scenes[role][0]}.",
+                "narration_text": scenes[role][1],
+            }
+        )
+        for role in STORYBOARD_FRAME_ROLES
+    ]
+    return '```json\n{\n  "frames": [\n    ' + ",\n    ".join(frames) + "\n  ]\n}\n```"
+
+
+def make_png(target_bytes: int, seed: int = 0) -> bytes:
+    """A valid RGB PNG of roughly ``target_bytes`` (stored, uncompressed noise)."""
+    side = max(1, int(math.sqrt(max(target_bytes, 3) / 3)))
+    rng = random.Random(seed)
+    row = bytes(rng.getrandbits(8) for _ in range(side * 3))
+    raw = b"".join(b"\x00" + row[index:] + row[:index] for index in range(0, side * 3 * side, 3)[:side])
+
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF)
+
+    header = struct.pack(">IIBBBBB", side, side, 8, 2, 0, 0, 0)
+    return b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header) + chunk(b"IDAT", zlib.compress(raw, 0)) + chunk(b"IEND", b"")
+
+
+def make_mp3(target_bytes: int) -> bytes:
+    """Silent MPEG-1 Layer III frames (128 kbps, 44.1 kHz) after a small ID3v2 tag."""
+    tag = b"ID3\x03\x00\x00\x00\x00\x00\x0a" + b"\x00" * 10
+    frames = []
+    total = len(tag)
+    index = 0
+    while total < target_bytes:
+        # 128 kbps at 44.1 kHz alternates 417/418-byte frames via the padding bit.
+        padded = index % 49 not in (0, 24)
+        header = bytes((0xFF, 0xFB, 0x92 if padded else 0x90, 0x64))
+        frame = header + b"\x00" * (418 - 4 if padded else 417 - 4)
+        frames.append(frame)
+        total += len(frame)
+        index += 1
+    return tag + b"".join(frames)
+
+
+def make_wav(target_bytes: int, sample_rate: int = 16000) -> bytes:
+    """Mono 16-bit PCM: a 440 Hz tone padded with silence at both ends."""
+    samples = max(1, (target_bytes - 44) // 2)
+    edge = samples // 10
+    pcm = bytearray()
+    for index in range(samples):
+        value = 0 if index < edge or index >= samples - edge else int(8000 * math.sin(2 * math.pi * 440 * index / sample_rate))
+        pcm += struct.pack("<h", value)
+    header = b"RIFF" + struct.pack("<I", 36 + len(pcm)) + b"WAVE"
+    header += b"fmt " + struct.pack("<IHHIIHH", 16, 1, 1, sample_rate, sample_rate * 2, 2, 16)
+    return header + b"data" + struct.pack("<I", len(pcm)) + bytes(pcm)
+
+
+def make_m4a(target_bytes: int, duration_seconds: float = 3.0) -> bytes:
+    """A minimal MP4 container (ftyp, moov/mvhd, mdat) whose header carries the duration."""
+
+    def box(kind: bytes, payload: bytes) -> bytes:
+        return struct.pack(">I", 8 + len(payload)) + kind + payload
+
+    timescale = 44100
+    mvhd = struct.pack(">B3xIIII", 0, 0, 0, timescale, int(duration_seconds * timescale)) + b"\x00" * 80
+    head = box(b"ftyp", b"M4A \x00\x00\x00\x00M4A mp42isom") + box(b"moov", box(b"mvhd", mvhd))
+    return head + box(b"mdat", b"\x00" * max(0, target_bytes - len(head) - 8))
+
+
+class MockProviderState:
+    def __init__(self, config: MockProviderConfig) -> None:
+        self.config = config
+        self._rng = random.Random(config.seed)
+        self._lock = threading.Lock()
+        self.request_counts: dict[str, int] = {}
+        self.in_flight: dict[str, int] = {}
+        self.rejected_over_capacity = 0
+        self.png = make_png(config.image_bytes, config.seed)
+        self.audio = {"mp3": make_mp3(config.audio_bytes), "wav": make_wav(config.audio_bytes), "m4a": make_m4a(config.audio_bytes)}
+
+    def count(self, route: str) -> None:
+        with self._lock:
+            self.request_counts[route] = self.request_counts.get(route, 0) + 1
+
+    def latency(self, base: float) -> float:
+        with self._lock:
+            jitter = self._rng.uniform(-self.config.latency_jitter, self.config.latency_jitter)
+        return max(0.0, base + jitter)
+
+    def enter(self, route: str) -> int | None:
+        """Mark a request in flight on ``route``; returns how many others are, or None when over capacity."""
+        with self._lock:
+            others = self.in_flight.get(route, 0)
+            if self.config.route_capacity and others >= self.config.route_capacity:
+                self.rejected_over_capacity += 1
+                return None
+            self.in_flight[route] = others + 1
+            return others
+
+    def leave(self, route: str) -> None:
+        with self._lock:
+            self.in_flight[route] -= 1
+
+    def inject_error(self) -> bool:
+        with self._lock:
+            return self._rng.random() < self.config.error_rate
+
+
+def make_handler(state: MockProviderState) -> type[BaseHTTPRequestHandler]:
+    config = state.config
+
+    class MockProviderHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        server_version = "Phase0MockProvider/1"
+
+        def log_message(self, format: str, *args: Any) -> None:
+            pass
+
+        def send_body(self, status: int, content_type: str, body: bytes, headers: dict[str, str] | None = None) -> None:
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def send_json(self, status: int, payload: Any, headers: dict[str, str] | None = None) -> None:
+            self.send_body(status, "application/json", json.dumps(payload).encode("utf-8"), headers)
+
+        def send_error_shape(self, status: int) -> None:
+            if status == 403:
+                # Cloudflare edge block seen in run 1.
+                self.send_body(403, "text/plain; charset=UTF-8", b"error code: 1010")
+                return
+            headers = {}
+            if status in (429, 503) and config.retry_after is not None:
+                headers["Retry-After"] = f"{config.retry_after:g}"
+            message = "missing csrf token" if status == 500 else f"mock error {status}"
+            self.send_json(status, {"message": message}, headers)
+
+        def read_json(self) -> Any:
+            length = int(self.headers.get("Content-Length") or 0)
+            try:
+                return json.loads(self.rfile.read(length) or b"null")
+            except ValueError:
+                return None
+
+        def do_GET(self) -> None:
+            path = self.path.split("?", 1)[0]
+            if path == "/mock/stats":
+                self.send_json(200, {"request_counts": state.request_counts, "rejected_over_capacity": state.rejected_over_capacity})
+                return
+            if MEDIA_ROUTE.search(path):
+                state.count("media")
+                self.send_body(200, "image/png", state.png)
+                return
+            self.send_json(404, {"message": f"no mock route for GET {path}"})
+
+        def do_POST(self) -> None:
+            path = self.path.split("?", 1)[0]
+            payload = self.read_json()
+            if VERTEX_ROUTE.search(path):
+                self.handle_image(payload, vertex=True)
+            elif path.endswith("/images/generations"):
+                self.handle_image(payload, vertex=False)
+            elif path.endswith("/audio/speech"):
+                self.handle_openai_audio(payload)
+            elif match := ELEVENLABS_ROUTE.search(path):
+                self.handle_elevenlabs(payload, streaming=bool(match.group(1)))
+            elif path.endswith("/chat/completions"):
+                self.handle_chat(payload)
+            else:
+                self.send_json(404, {"message": f"no mock route for POST {path}"})
+
+        def generation_prologue(self, route: str, latency: float) -> bool:
+            """Count, delay and maybe fail a generation request; returns False if an error was sent."""
+            state.count(route)
+            others = state.enter(route)
+            if others is None:
+                self.send_json(429, {"message": "mock route over capacity"}, {"Retry-After": "1"})
+                return False
+            try:
+                time.sleep(state.latency(latency) + config.latency_per_in_flight * others)
+            finally:
+                state.leave(route)
+            if state.inject_error():
+                self.send_error_shape(config.error_status)
+                return False
+            return True
+
+        def handle_image(self, payload: Any, vertex: bool) -> None:
+            route = "vertex_image" if vertex else "openai_image"
+            if vertex and not (isinstance(payload, dict) and payload.get("contents")):
+                state.count(route)
+                self.send_json(400, {"error": {"code": 400, "message": "contents is required", "status": "INVALID_ARGUMENT"}})
+                return
+            if not vertex and not (isinstance(payload, dict) and payload.get("prompt")):
+                state.count(route)
+                self.send_json(400, {"error": {"message": "prompt is required", "type": "invalid_request_error"}})
+                return
+            if not self.generation_prologue(route, config.image_latency):
+                return
+            shape = config.image_shape
+            if shape == "auto":
+                shape = "inline_data" if vertex else "b64_json"
+            if shape in ("403", "500"):
+                self.send_error_shape(int(shape))
+            elif shape == "binary":
+                self.send_body(200, "image/png", state.png)
+            elif shape == "url":
+                host, port = cast(tuple[str, int], self.server.server_address)[:2]
+                self.send_json(200, {"created": int(time.time()), "data": [{"url": f"http://{host}:{port}/mock-media/{state.request_counts[route]}.png"}]})
+            elif shape == "inline_data":
+                encoded = base64.b64encode(state.png).decode("ascii")
+                self.send_json(
+                    200,
+                    {
+                        "candidates": [
+                            {
+                                "content": {
+                                    "role": "model",
+                                    "parts": [
+                                        {"text": "Here is the illustration."},
+                                        {"inlineData": {"mimeType": "image/png", "data": encoded}},
+                                    ],
+                                },
+                                "finishReason": "STOP",
+                            }
+                        ],
+                        "usageMetadata": {"promptTokenCount": 32, "candidatesTokenCount": 1290},
+                    },
+                )
+            else:
+                encoded = base64.b64encode(state.png).decode("ascii")
+                self.send_json(200, {"created": int(time.time()), "data": [{"b64_json": encoded}]})
+
+        def handle_openai_audio(self, payload: Any) -> None:
+            if not self.generation_prologue("openai_audio", config.audio_latency):
+                return
+            audio_format = payload.get("format", "mp3") if isinstance(payload, dict) else "mp3"
+            body = state.audio.get(audio_format, state.audio["mp3"])
+            content_type = {"wav": "audio/wav", "m4a": "audio/mp4"}.get(audio_format, "audio/mpeg")
+            self.send_audio_shape(body, content_type)
+
+        def handle_elevenlabs(self, payload: Any, streaming: bool) -> None:
+            if not self.headers.get("xi-api-key"):
+                state.count("elevenlabs")
+                self.send_json(401, {"detail": {"status": "invalid_api_key", "message": "Invalid API key"}})
+                return
+            if not self.generation_prologue("elevenlabs_stream" if streaming else "elevenlabs", config.audio_latency):
+                return
+            if not streaming:
+                self.send_audio_shape(state.audio["mp3"], "audio/mpeg")
+                return
+            self.start_chunked(200, "audio/mpeg")
+            body = state.audio["mp3"]
+            for start in range(0, len(body), config.stream_chunk_bytes):
+                self.write_chunk(body[start : start + config.stream_chunk_bytes])
+                time.sleep(config.stream_chunk_delay)
+            self.wfile.write(b"0\r\n\r\n")
+
+        def handle_chat(self, payload: Any) -> None:
+            messages = payload.get("messages") if isinstance(payload, dict) else None
+            if not isinstance(messages, list) or not messages:
+                state.count("chat")
+                self.send_json(400, {"error": {"message": "messages is required", "type": "invalid_request_error"}})
+                return
+            if not self.generation_prologue("chat", config.chat_latency):
+                return
+            prompt = messages[-1].get("content") if isinstance(messages[-1], dict) else None
+            content = storyboard_plan_text(prompt if isinstance(prompt, str) else "")
+            if not payload.get("stream"):
+                self.send_json(
+                    200,
+                    {
+                        "id": "chatcmpl-mock",
+                        "object": "chat.completion",
+                        "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+                    },
+                )
+                return
+            self.start_chunked(200, "text/event-stream")
+            for start in range(0, len(content), config.chat_chunk_chars):
+                delta = {"content": content[start : start + config.chat_chunk_chars]}
+                event = {"id": "chatcmpl-mock", "object": "chat.completion.chunk", "choices": [{"index": 0, "delta": delta, "finish_reason": None}]}
+                self.write_chunk(f"data: {json.dumps(event)}\n\n".encode("utf-8"))
+                time.sleep(config.chat_chunk_delay)
+            self.write_chunk(b"data: [DONE]\n\n")
+            self.wfile.write(b"0\r\n\r\n")
+
+        def start_chunked(self, status: int, content_type: str) -> None:
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+
+        def write_chunk(self, piece: bytes) -> None:
+            self.wfile.write(f"{len(piece):x}\r\n".encode("ascii") + piece + b"\r\n")
+            self.wfile.flush()
+
+        def send_audio_shape(self, body: bytes, content_type: str) -> None:
+            shape = config.audio_shape
+            if shape in ("403", "500"):
+                self.send_error_shape(int(shape))
+            elif shape == "audio_data":
+                self.send_json(200, {"audio": {"data": base64.b64encode(body).decode("ascii"), "format": content_type}})
+            elif shape == "data_b64":
+                self.send_json(200, {"data": [{"b64": base64.b64encode(body).decode("ascii")}]})
+            else:
+                self.send_body(200, content_type, body)
+
+    return MockProviderHandler
+
+
+class MockProviderServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # The default backlog of 5 resets connections when hundreds of async requests connect at once.
+    request_queue_size = 1024
+
+    def handle_error(self, request: Any, client_address: Any) -> None:
+        # Clients drop connections on purpose (cancelled hedges, timeouts); only report real errors.
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+def start_mock_server(config: MockProviderConfig | None = None, host: str = "127.0.0.1", port: int = 0) -> tuple[ThreadingHTTPServer, str]:
+    """Serve the mock provider on a daemon thread; returns the server and its base URL."""
+    state = MockProviderState(config or MockProviderConfig())
+    server = MockProviderServer((host, port), make_handler(state))
+    server.mock_state = state  # type: ignore[attr-defined]
+    threading.Thread(target=server.serve_forever, name="phase0-mock-provider", daemon=True).start()
+    bound_host, bound_port = cast(tuple[str, int], server.server_address)[:2]
+    return server, f"http://{bound_host}:{bound_port}"
+
+
+def config_from_mapping(values: dict[str, Any]) -> MockProviderConfig:
+    known = {item.name for item in fields(MockProviderConfig)}
+    unknown = sorted(set(values) - known)
+    if unknown:
+        raise ValueError(f"Unknown mock provider settings: {', '.join(unknown)}")
+    config = MockProviderConfig(**values)
+    if config.image_shape not in IMAGE_SHAPES:
+        raise ValueError(f"image_shape must be one of {', '.join(IMAGE_SHAPES)}")
+    if config.audio_shape not in AUDIO_SHAPES:
+        raise ValueError(f"audio_shape must be one of {', '.join(AUDIO_SHAPES)}")
+    return config
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Phase 0 mock multimodal provider")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    defaults = MockProviderConfig()
+    parser.add_argument("--image-latency", type=float, default=defaults.image_latency)
+    parser.add_argument("--audio-latency", type=float, default=defaults.audio_latency)
+    parser.add_argument("--latency-jitter", type=float, default=defaults.latency_jitter)
+    parser.add_argument("--image-bytes", type=int, default=defaults.image_bytes)
+    parser.add_argument("--audio-bytes", type=int, default=defaults.audio_bytes)
+    parser.add_argument("--image-shape", choices=IMAGE_SHAPES, default=defaults.image_shape)
+    parser.add_argument("--audio-shape", choices=AUDIO_SHAPES, default=defaults.audio_shape)
+    parser.add_argument("--error-rate", type=float, default=defaults.error_rate)
+    parser.add_argument("--error-status", type=int, default=defaults.error_status)
+    parser.add_argument("--retry-after", type=float, default=defaults.retry_after)
+    parser.add_argument("--route-capacity", type=int, default=defaults.route_capacity)
+    parser.add_argument("--latency-per-in-flight", type=float, default=defaults.latency_per_in_flight)
+    parser.add_argument("--stream-chunk-bytes", type=int, default=defaults.stream_chunk_bytes)
+    parser.add_argument("--stream-chunk-delay", type=float, default=defaults.stream_chunk_delay)
+    parser.add_argument("--chat-latency", type=float, default=defaults.chat_latency)
+    parser.add_argument("--chat-chunk-chars", type=int, default=defaults.chat_chunk_chars)
+    parser.add_argument("--chat-chunk-delay", type=float, default=defaults.chat_chunk_delay)
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    settings = {name: value for name, value in vars(args).items() if name not in ("host", "port")}
+    server, base_url = start_mock_server(config_from_mapping(settings), args.host, args.port)
+    print(f"[mock] serving on {base_url} (spike: --base-url {base_url}/api/v1 --elevenlabs-base-url {base_url})")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
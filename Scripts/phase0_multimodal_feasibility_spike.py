@@ -9,23 +9,116 @@ Validates:
 This script is intentionally provider-flexible. It defaults to OpenAI-compatible
 paths under a ZenMux-style base URL, but captures raw responses so we can inspect
 payload shapes and adjust parsers without changing app code.
+
+Pass --concurrent to run the independent cases in parallel; summary.json then
+records per-case and total wall-clock time so serial vs parallel generation can
+be compared.
+
+Pass --storyboard-file to generate every frame of N storyboards through bounded
+image/audio worker pools and report lessons/minute and per-lesson latency.
+
+Pass --stream-media to write media to disk as it arrives instead of buffering
+whole response bodies, which keeps peak memory flat across parallel requests.
+--audio-streaming uses the ElevenLabs streaming TTS route and records
+time-to-first-playable-audio.
+
+Pass --cache-mode read-write to reuse media for identical endpoint/model/prompt/
+voice/size requests across runs (stored under .tmp/phase0-multimodal-cache).
+
+Pass --benchmark to repeat each (provider, protocol, model) target with warmup
+and concurrency, writing benchmark.json/benchmark.md; --benchmark-compare diffs
+a run (or a second file) against a baseline and exits 1 on regressions.
+
+Pass --mock-provider (optionally with --mock-config) to run every mode against
+the bundled local stand-in in phase0_mock_provider_server.py.
+
+Pass --max-retries/--rate-limit-rps/--hedge to route every call through the
+request scheduler; each attempt and its timing is recorded per case.
+
+Pass --async-transport to send every request on an asyncio-streams HTTP/1.1
+transport instead of one blocking thread per request. Case logic is written
+once as step generators, so run_image_case() and async_run_image_case() (and
+the audio/malformed equivalents) share it.
+
+Pass --trace to split every call into dns/connect/tls/upload/server_wait/download
+spans plus our json_parse/base64_decode/file_write time, exported as trace.json
+(load in chrome://tracing or Perfetto) and trace.jsonl.
+
+Response parsing is driven by MEDIA_SHAPES, a registry of JSON paths per
+payload shape; streamed bodies run through an incremental tokenizer that
+decodes the matching field straight to disk. --extractor-benchmark compares
+that against the old probing parsers on synthetic 1/4/16 MB payloads.
+
+HTTP debug artifacts are written on a background thread. --debug-capture
+full (default) replaces base64 media in response bodies with the saved media
+path and sha256; meta writes only status/timing/headers; off writes nothing.
+
+Pass --lesson-pipeline to plan a lesson by streaming the storyboard from the
+chat route and start each frame's image and audio as soon as that frame
+parses; the first failure cancels in-flight work and deletes the lesson's
+media. Each run is compared against the serial V1 orchestrator.
+
+Pass --adaptive-concurrency with --storyboard-file or --benchmark to let an
+AIMD limiter per endpoint pick in-flight concurrency from observed p90 latency
+and 429/5xx responses; every limit change lands in summary.json.
+
+Pass --image-postprocess to turn each saved image into app-ready variants
+(WebP via Pillow when installed, PNG otherwise) plus a blurhash placeholder
+in a process pool, recording bytes and time per variant.
+
+Every saved audio clip gets duration/bitrate from its container headers
+(MP3 Xing/Info/VBRI or CBR, M4A mvhd, WAV fmt/data) without decoding it;
+--audio-normalize also trims silence and normalizes loudness in the pool.
+
+Pass --coalesce to let concurrent cases with the same normalized request share
+one upstream call and link its media file; summary.json counts the coalesced
+requests.
+
+Storyboard batches and benchmarks append every finished item to journal.jsonl
+in the output directory; pass --resume <dir> to continue an interrupted run,
+regenerating only failed or missing items and rebuilding the summary from the
+journal.
+
+Pass --probe-daemon to keep one process (warm connections, resolved provider
+routes) re-running the health checks every --probe-interval seconds, with the
+latest results and latency stats served as JSON on --probe-listen.
 """
 
 from __future__ import annotations
 
 import argparse
+import asyncio
 import base64
+import collections
+import contextlib
+import contextvars
+import email.utils
+import functools
+import hashlib
+import http.client
 import json
+import math
 import os
+import random
+import re
+import shutil
+import socket
+import ssl
+import struct
 import sys
+import threading
 import time
-import urllib.error
 import urllib.parse
-import urllib.request
-from dataclasses import dataclass
+import uuid
+import zlib
+from concurrent.futures import FIRST_COMPLETED, Future, InvalidStateError, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Generator, cast
+
+if TYPE_CHECKING:
+    from concurrent.futures import ProcessPoolExecutor
 
 
 DEFAULT_IMAGE_MODEL = "openai/gpt-image-1.5"
@@ -33,6 +126,21 @@ DEFAULT_AUDIO_MODEL = "inclusionai/ming-flash-omni-2.0"
 DEFAULT_VERTEX_IMAGE_MODEL = "gemini-2.5-flash-image"
 DEFAULT_ELEVENLABS_MODEL_ID = "eleven_multilingual_v2"
 DEFAULT_ELEVENLABS_VOICE_ID = "JBFqnCBsd6RMkjVDRZzb"
+# Same model the app's chat client uses in debug builds.
+DEFAULT_PLANNER_MODEL = "openai/gpt-4o-mini"
+
+DEFAULT_IMAGE_PROMPT = (
+    "Simple educational illustration, clean style. "
+    "A child is feeding a ticket into a train station machine. "
+    "Clear focus on the action. Minimal background clutter."
+)
+DEFAULT_AUDIO_TEXT = (
+    "Look at this scene. The child feeds a ticket into the machine. "
+    "Here, feed means to put something into a slot or machine."
+)
+
+# Frame roles enforced by the V1 storyboard planner, in playback order.
+STORYBOARD_FRAME_ROLES = ("word1_only", "word2_only", "overlap", "non_interchangeable")
 
 
 def now_utc() -> str:
@@ -69,6 +177,556 @@ def save_bytes(path: Path, data: bytes) -> None:
     path.write_bytes(data)
 
 
+def copy_media(source: Path, target: Path, link: bool = False) -> None:
+    """Copy ``source`` to ``target``, hard-linking instead when ``link`` is set and the filesystem allows it."""
+    target.parent.mkdir(parents=True, exist_ok=True)
+    if link:
+        target.unlink(missing_ok=True)
+        try:
+            os.link(source, target)
+            return
+        except OSError:
+            pass
+    shutil.copyfile(source, target)
+
+
+BROWSER_USER_AGENT = "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0 Safari/537.36"
+REDIRECT_STATUSES = {301, 302, 303, 307, 308}
+MAX_REDIRECTS = 5
+
+
+# MPEG audio frame header tables, indexed by the 4-bit bitrate field (kbps).
+_MP3_BITRATES = {
+    (1, 1): (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+    (1, 2): (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+    (1, 3): (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    (2, 1): (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+    (2, 2): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    (2, 3): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+_MP3_SAMPLE_RATES = {1: (44100, 48000, 32000), 2: (22050, 24000, 16000), 25: (11025, 12000, 8000)}
+
+
+def parse_mp3_frame_header(header: bytes | bytearray) -> dict[str, int] | None:
+    """Decode a 4-byte MPEG audio frame header; returns None if it is not a valid sync."""
+    if len(header) < 4 or header[0] != 0xFF or (header[1] & 0xE0) != 0xE0:
+        return None
+    version_bits = (header[1] >> 3) & 0x3
+    layer_bits = (header[1] >> 1) & 0x3
+    bitrate_index = header[2] >> 4
+    sample_rate_index = (header[2] >> 2) & 0x3
+    if version_bits == 1 or layer_bits == 0 or bitrate_index in (0, 15) or sample_rate_index == 3:
+        return None
+    version = {3: 1, 2: 2, 0: 25}[version_bits]
+    layer = 4 - layer_bits
+    bitrate = _MP3_BITRATES[(1 if version == 1 else 2, layer)][bitrate_index] * 1000
+    sample_rate = _MP3_SAMPLE_RATES[version][sample_rate_index]
+    padding = (header[2] >> 1) & 0x1
+    if layer == 1:
+        samples = 384
+        frame_length = (12 * bitrate // sample_rate + padding) * 4
+    else:
+        samples = 1152 if layer == 2 or version == 1 else 576
+        frame_length = samples // 8 * bitrate // sample_rate + padding
+    return {
+        "version": version,
+        "layer": layer,
+        "bitrate": bitrate,
+        "sample_rate": sample_rate,
+        "channels": 1 if (header[3] >> 6) == 3 else 2,
+        "samples_per_frame": samples,
+        "frame_length": frame_length,
+    }
+
+
+def id3v2_size(data: bytes | bytearray) -> int:
+    """Length of a leading ID3v2 tag (0 if there is none)."""
+    if len(data) < 10 or data[:3] != b"ID3":
+        return 0
+    size = 0
+    for byte in data[6:10]:
+        size = (size << 7) | (byte & 0x7F)
+    footer = 10 if data[5] & 0x10 else 0
+    return 10 + size + footer
+
+
+def first_decodable_audio_end(
+    data: bytes | bytearray, content_type: str | None, start: int = 0
+) -> tuple[int | None, int]:
+    """Byte offset at which a player could decode its first audio frame, if already reached.
+
+    MP3 needs the ID3 tag plus one complete frame whose successor also syncs;
+    WAV needs the header and the start of the ``data`` chunk. Other containers
+    never match because their first playable sample is not knowable from a prefix.
+
+    Returns ``(end, resume)``: when ``end`` is None, pass ``resume`` as ``start``
+    once more bytes have arrived so a growing prefix is scanned only once.
+    """
+    ct = (content_type or "").lower()
+    if "wav" in ct or data[:4] == b"RIFF":
+        marker = data.find(b"data", max(12, start))
+        if marker < 0:
+            return None, max(12, len(data) - 3)
+        return (marker + 8 + 1 if len(data) > marker + 8 else None), marker
+    if "mpeg" not in ct and "mp3" not in ct and data[:3] != b"ID3":
+        return None, len(data)
+    if data[:3] == b"ID3" and len(data) < 10:
+        return None, 0
+    offset = max(start, id3v2_size(data))
+    while offset + 4 <= len(data):
+        # Frames start on a 0xFF sync byte; skip straight to the next candidate.
+        offset = data.find(b"\xff", offset)
+        if offset < 0 or offset + 4 > len(data):
+            break
+        frame = parse_mp3_frame_header(data[offset : offset + 4])
+        if frame is not None and frame["frame_length"] > 0:
+            end = offset + frame["frame_length"]
+            if end + 4 > len(data):
+                return None, offset
+            if parse_mp3_frame_header(data[end : end + 4]) is not None:
+                return end, offset
+        offset += 1
+    return None, max(offset if offset >= 0 else len(data) - 3, 0)
+
+
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+@dataclass(frozen=True)
+class MediaFieldSpec:
+    """JSON path to a string holding media; ``"*"`` matches any list index."""
+
+    path: tuple[str | int, ...]
+    label: str
+    encoding: str = "base64"
+
+
+@dataclass(frozen=True)
+class MediaShape:
+    media_kind: str
+    # In priority order; the first spec present in a payload wins.
+    specs: tuple[MediaFieldSpec, ...]
+    missing_note: str
+
+
+MEDIA_SHAPES = {
+    "openai_image": MediaShape(
+        "image",
+        (
+            MediaFieldSpec(("data", 0, "b64_json"), "data[0].b64_json"),
+            MediaFieldSpec(("data", 0, "b64"), "data[0].b64"),
+            MediaFieldSpec(("data", 0, "url"), "data[0].url", encoding="url"),
+        ),
+        "No known image bytes field found",
+    ),
+    "vertex_image": MediaShape(
+        "image",
+        (
+            MediaFieldSpec(
+                ("candidates", "*", "content", "parts", "*", "inlineData", "data"),
+                "candidates[].content.parts[].inlineData",
+            ),
+        ),
+        "No image inlineData found in candidates",
+    ),
+    "audio": MediaShape(
+        "audio",
+        (
+            MediaFieldSpec(("audio", "data"), "audio.data"),
+            MediaFieldSpec(("audio", "b64"), "audio.b64"),
+            MediaFieldSpec(("data", 0, "b64"), "data[0].b64"),
+            MediaFieldSpec(("data", 0, "audio"), "data[0].audio"),
+        ),
+        "No known audio bytes field found",
+    ),
+}
+
+
+def media_shape_for(args: argparse.Namespace, media_kind: str) -> str:
+    if media_kind == "audio":
+        return "audio"
+    return "vertex_image" if args.image_protocol == "vertex" else "openai_image"
+
+
+def spec_matches(spec: MediaFieldSpec, path: tuple[str | int, ...]) -> bool:
+    return len(spec.path) == len(path) and all(
+        expected == actual or (expected == "*" and isinstance(actual, int)) for expected, actual in zip(spec.path, path)
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def _media_path_trie(shape_name: str) -> dict[Any, Any]:
+    """Prefix tree of a shape's spec paths; ``None`` keys hold ``(priority, spec)`` for specs ending at a node."""
+    root: dict[Any, Any] = {}
+    for priority, spec in enumerate(MEDIA_SHAPES[shape_name].specs):
+        node = root
+        for step in spec.path:
+            node = node.setdefault(step, {})
+        node.setdefault(None, []).append((priority, spec))
+    return root
+
+
+def find_media_field(payload: Any, shape_name: str) -> tuple[MediaFieldSpec, str] | None:
+    """Walk only the branches named by the shape's specs, once, and return the highest-priority hit.
+
+    Hits rank by spec order in ``MediaShape.specs``, not by where the trie walk
+    finds them; within a wildcard spec the first index wins. An empty base64
+    string counts as absent, so ``b64_json: ""`` falls back to ``b64``.
+    """
+    best: list[Any] = [len(MEDIA_SHAPES[shape_name].specs), None]
+
+    def visit(value: Any, node: dict[Any, Any]) -> bool:
+        """Record hits under ``node``; return True once the top-priority spec has matched."""
+        if isinstance(value, str):
+            for priority, spec in node.get(None, ()):
+                if priority < best[0] and (value or spec.encoding != "base64"):
+                    best[:] = [priority, (spec, value)]
+            return best[0] == 0
+        for step, child in node.items():
+            if step is None:
+                continue
+            if isinstance(value, dict) and isinstance(step, str) and step != "*":
+                if step in value and visit(value[step], child):
+                    return True
+            elif isinstance(value, list):
+                indices = range(len(value)) if step == "*" else [step] if isinstance(step, int) and step < len(value) else []
+                for index in indices:
+                    if visit(value[index], child):
+                        return True
+        return False
+
+    visit(payload, _media_path_trie(shape_name))
+    return best[1]
+
+
+def extract_media_bytes(payload: Any, shape_name: str) -> tuple[bytes | None, str]:
+    shape = MEDIA_SHAPES[shape_name]
+    if not isinstance(payload, dict):
+        return None, "Payload is not JSON object"
+    found = find_media_field(payload, shape_name)
+    if found is None:
+        return None, shape.missing_note
+    spec, value = found
+    if spec.encoding == "url":
+        return None, f"{shape.media_kind.capitalize()} returned URL only: {value}"
+    try:
+        return base64.b64decode(value), f"Extracted {shape.media_kind} bytes from {spec.label}"
+    except Exception as error:
+        return None, f"Failed to decode {shape.media_kind} base64 from {spec.label}: {error}"
+
+
+_NON_BASE64_BYTES = bytes(
+    value for value in range(256) if chr(value) not in "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/-_"
+)
+
+
+@dataclass
+class StreamedMedia:
+    """Media written to disk while the response was still arriving."""
+
+    path: Path
+    source: str
+    size: int
+    error: str | None = None
+    # (seconds since request start, bytes) for each chunk of a binary body.
+    chunks: list[tuple[float, int]] = field(default_factory=list)
+    first_decodable_seconds: float | None = None
+    # Time spent decoding base64 and writing the file while the body downloaded.
+    decode_seconds: float = 0.0
+    write_seconds: float = 0.0
+
+
+class IncrementalBase64Decoder:
+    """Decode base64 text fed in arbitrary chunks, as it appears inside a JSON string."""
+
+    def __init__(self) -> None:
+        self._leftover = b""
+        self._escape = b""
+
+    def feed(self, raw: bytes) -> bytes:
+        raw = self._escape + raw
+        self._escape = b""
+        if raw.endswith(b"\\") and not raw.endswith(b"\\\\"):
+            raw, self._escape = raw[:-1], b"\\"
+        # JSON may escape "/" as "\/" or wrap lines with "\n"; drop the escapes, keep the alphabet.
+        raw = raw.replace(b"\\n", b"").replace(b"\\r", b"").replace(b"\\t", b"")
+        text = self._leftover + raw.translate(None, _NON_BASE64_BYTES)
+        cut = len(text) - len(text) % 4
+        self._leftover = text[cut:]
+        return base64.urlsafe_b64decode(text[:cut].replace(b"+", b"-").replace(b"/", b"_")) if cut else b""
+
+    def finish(self) -> bytes:
+        tail, self._leftover = self._leftover, b""
+        if not tail:
+            return b""
+        if len(tail) == 1:
+            raise ValueError("Truncated base64 data")
+        return base64.urlsafe_b64decode(tail.replace(b"+", b"-").replace(b"/", b"_") + b"=" * (-len(tail) % 4))
+
+
+class StreamingMediaExtractor:
+    """Incremental JSON tokenizer that decodes a shape's base64 field straight to a file.
+
+    It tracks the container path of every string as bytes arrive. When a string
+    starts at a path matching one of the shape's base64 specs, its characters go
+    through an :class:`IncrementalBase64Decoder` into ``out_path`` and never
+    become a Python ``str``. Everything else is copied into ``skeleton``, a
+    small JSON document with the media value replaced by a placeholder.
+    """
+
+    _STRUCTURAL = re.compile(rb'[{}\[\],"]')
+    _STRING_SPECIAL = re.compile(rb'[\\"]')
+
+    def __init__(self, out_path: Path, shape: MediaShape) -> None:
+        self.out_path = out_path
+        self.specs = tuple(spec for spec in shape.specs if spec.encoding == "base64")
+        self.skeleton = bytearray()
+        # ["obj", current key, expecting key] or ["arr", current index]
+        self._stack: list[list[Any]] = []
+        self._string_role: str | None = None
+        self._escape_pending = False
+        self._key_raw = bytearray()
+        self._decoder = IncrementalBase64Decoder()
+        self._file: Any = None
+        self.spec: MediaFieldSpec | None = None
+        self.size = 0
+        self.error: str | None = None
+        self.decode_seconds = 0.0
+        self.write_seconds = 0.0
+
+    def _path(self) -> tuple[str | int, ...]:
+        return tuple(frame[1] for frame in self._stack)
+
+    def feed(self, chunk: bytes) -> None:
+        pos = 0
+        while pos < len(chunk):
+            if self._string_role is not None:
+                pos = self._consume_string(chunk, pos)
+                continue
+            match = self._STRUCTURAL.search(chunk, pos)
+            if match is None:
+                self.skeleton += chunk[pos:]
+                return
+            index = match.start()
+            self.skeleton += chunk[pos : index + 1]
+            pos = index + 1
+            char = chunk[index]
+            top = self._stack[-1] if self._stack else None
+            if char == 0x7B:  # {
+                self._stack.append(["obj", None, True])
+            elif char == 0x5B:  # [
+                self._stack.append(["arr", 0])
+            elif char in (0x7D, 0x5D):  # } ]
+                if self._stack:
+                    self._stack.pop()
+            elif char == 0x2C:  # ,
+                if top is not None and top[0] == "obj":
+                    top[2] = True
+                elif top is not None:
+                    top[1] += 1
+            elif top is not None and top[0] == "obj" and top[2]:
+                self._string_role = "key"
+                self._key_raw.clear()
+            else:
+                path = self._path()
+                spec = None
+                if self.spec is None:
+                    spec = next((candidate for candidate in self.specs if spec_matches(candidate, path)), None)
+                if spec is not None:
+                    self.spec = spec
+                    self.out_path.parent.mkdir(parents=True, exist_ok=True)
+                    self._file = self.out_path.open("wb")
+                    self._string_role = "media"
+                else:
+                    self._string_role = "value"
+
+    def _consume_string(self, chunk: bytes, pos: int) -> int:
+        if self._escape_pending:
+            self._escape_pending = False
+            self._string_bytes(chunk[pos : pos + 1])
+            return pos + 1
+        match = self._STRING_SPECIAL.search(chunk, pos)
+        if match is None:
+            self._string_bytes(chunk[pos:])
+            return len(chunk)
+        index = match.start()
+        if chunk[index] == 0x5C:  # backslash: the next byte is escaped, possibly in the next chunk
+            self._string_bytes(chunk[pos : index + 1])
+            self._escape_pending = True
+            return index + 1
+        self._string_bytes(chunk[pos:index])
+        self._end_string()
+        self.skeleton += b'"'
+        return index + 1
+
+    def _string_bytes(self, data: bytes) -> None:
+        if self._string_role == "media":
+            if self.error is None:
+                try:
+                    started = time.perf_counter()
+                    decoded = self._decoder.feed(data)
+                    decoded_at = time.perf_counter()
+                    self._file.write(decoded)
+                    self.decode_seconds += decoded_at - started
+                    self.write_seconds += time.perf_counter() - decoded_at
+                    self.size += len(decoded)
+                except Exception as error:
+                    self.error = f"Failed to decode streamed base64 from {self._field_label}: {error}"
+            return
+        if self._string_role == "key":
+            self._key_raw += data
+        self.skeleton += data
+
+    def _end_string(self) -> None:
+        role, self._string_role = self._string_role, None
+        if role == "key":
+            top = self._stack[-1]
+            top[1] = json.loads(b'"' + bytes(self._key_raw) + b'"')
+            top[2] = False
+        elif role == "media":
+            if self.error is None:
+                try:
+                    tail = self._decoder.finish()
+                    self._file.write(tail)
+                    self.size += len(tail)
+                except Exception as error:
+                    self.error = f"Failed to decode streamed base64 from {self._field_label}: {error}"
+            self._file.close()
+            self._file = None
+            if self.size == 0 and self.error is None:
+                # An empty field counts as absent, so a later spec (``b64`` after ``b64_json``) can still match.
+                self.spec = None
+                self._decoder = IncrementalBase64Decoder()
+                self.out_path.unlink(missing_ok=True)
+                return
+            self.skeleton += f"<streamed {self.size} bytes to disk>".encode("utf-8")
+
+    @property
+    def _field_label(self) -> str:
+        # Only read while a media string is open, which implies a matched spec.
+        return self.spec.label if self.spec is not None else ""
+
+    def finish(self) -> StreamedMedia | None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            self.error = self.error or f"Response ended inside streamed field {self._field_label}"
+        if self.spec is None:
+            return None
+        return StreamedMedia(
+            path=self.out_path,
+            source=self.spec.label,
+            size=self.size,
+            error=self.error,
+            decode_seconds=self.decode_seconds,
+            write_seconds=self.write_seconds,
+        )
+
+
+class _BinaryMediaWriter:
+    """Copies an ``image/*``/``audio/*`` body to disk chunk by chunk, timing each chunk."""
+
+    def __init__(self, path: Path, content_type: str, started: float) -> None:
+        self.streamed = StreamedMedia(path=path, source="binary body", size=0)
+        self.content_type = content_type
+        self.started = started
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._handle = path.open("wb")
+        # Audio bodies keep only the prefix up to their first decodable frame in
+        # memory; image bodies are never scanned, so nothing is kept for them.
+        self._scanning = content_type.startswith("audio/")
+        self._head = bytearray()
+        self._scan_offset = 0
+
+    def feed(self, chunk: bytes) -> None:
+        streamed = self.streamed
+        write_started = time.perf_counter()
+        self._handle.write(chunk)
+        self._handle.flush()
+        streamed.write_seconds += time.perf_counter() - write_started
+        arrived = time.perf_counter() - self.started
+        streamed.size += len(chunk)
+        streamed.chunks.append((round(arrived, 4), len(chunk)))
+        if self._scanning:
+            self._head += chunk
+            end, self._scan_offset = first_decodable_audio_end(self._head, self.content_type, self._scan_offset)
+            if end is not None:
+                streamed.first_decodable_seconds = round(arrived, 4)
+            if end is not None or len(self._head) >= 1024 * 1024:
+                self._scanning = False
+                self._head = bytearray()
+
+    def finish(self) -> tuple[bytes, StreamedMedia | None]:
+        self._handle.close()
+        return b"", self.streamed
+
+    def abort(self) -> None:
+        self._handle.close()
+        self.streamed.path.unlink(missing_ok=True)
+
+
+class _JSONMediaWriter:
+    def __init__(self, path: Path, shape: MediaShape) -> None:
+        self.extractor = StreamingMediaExtractor(path, shape)
+
+    def feed(self, chunk: bytes) -> None:
+        self.extractor.feed(chunk)
+
+    def finish(self) -> tuple[bytes, StreamedMedia | None]:
+        streamed = self.extractor.finish()
+        if streamed is not None and streamed.error is not None:
+            streamed.path.unlink(missing_ok=True)
+        return bytes(self.extractor.skeleton), streamed
+
+    def abort(self) -> None:
+        self.extractor.finish()
+        self.extractor.out_path.unlink(missing_ok=True)
+
+
+class MediaStreamSink:
+    """Consume a successful response in chunks, writing media to a temporary file.
+
+    ``image/*``/``audio/*`` bodies are copied to disk as they arrive; JSON bodies
+    go through :class:`StreamingMediaExtractor`. Anything else (including error
+    responses) is read into memory as before. Transports pull a chunk writer
+    from :meth:`writer` and feed it as bytes arrive. The temporary file name is unique
+    per attempt, and callers rename it to the final media path.
+    """
+
+    def __init__(self, media_prefix: Path, media_kind: str, shape_name: str) -> None:
+        self.media_prefix = media_prefix
+        self.media_kind = media_kind
+        self.shape_name = shape_name
+
+    def temp_path(self) -> Path:
+        return self.media_prefix.with_name(f"{self.media_prefix.name}.part-{uuid.uuid4().hex[:8]}")
+
+    def writer(self, status: int, content_type: str | None, started: float) -> _BinaryMediaWriter | _JSONMediaWriter | None:
+        """Return a chunk writer for this response, or None to read it into memory."""
+        content_type = (content_type or "").lower()
+        if status < 200 or status >= 300:
+            return None
+        if content_type.startswith(f"{self.media_kind}/"):
+            return _BinaryMediaWriter(self.temp_path(), content_type, started)
+        if "json" in content_type:
+            return _JSONMediaWriter(self.temp_path(), MEDIA_SHAPES[self.shape_name])
+        return None
+
+
+def media_sink_for(args: argparse.Namespace, out_dir: Path, name: str, media_kind: str) -> MediaStreamSink | None:
+    # Streaming TTS is only meaningful if chunks are written as they arrive.
+    if not args.stream_media and not (media_kind == "audio" and args.audio_streaming):
+        return None
+    return MediaStreamSink(out_dir / f"{name}_output", media_kind, media_shape_for(args, media_kind))
+
+
+def adopt_streamed_media(streamed: StreamedMedia, media_path: Path) -> Path:
+    """Move a streamed temporary file to its final media path."""
+    os.replace(streamed.path, media_path)
+    streamed.path = media_path
+    return media_path
+
+
 @dataclass
 class HTTPResult:
     status: int
@@ -76,60 +734,4083 @@ class HTTPResult:
     headers: dict[str, str]
     body: bytes
     elapsed_seconds: float
+    # Time spent opening a new TCP(+TLS) connection; 0.0 when a pooled connection was reused.
+    connect_seconds: float = 0.0
+    # Time from the start of the call until the status line and headers arrived.
+    ttfb_seconds: float = 0.0
+    connection_reused: bool = False
+    # Set when a MediaStreamSink wrote the media to disk instead of keeping it in ``body``.
+    streamed: StreamedMedia | None = None
+    # One entry per send (retries and hedges included) when a RequestScheduler was used.
+    attempts: list[dict[str, Any]] = field(default_factory=list)
+    # (phase, start, end) perf_counter spans: dns, connect, tls, upload, server_wait, download.
+    phases: list[tuple[str, float, float]] = field(default_factory=list)
+    request_bytes: int = 0
+    response_bytes: int = 0
+
+
+HTTP_PHASES = ("dns", "connect", "tls", "upload", "server_wait", "download")
+
+
+def phase_seconds(phases: list[tuple[str, float, float]]) -> dict[str, float]:
+    totals = dict.fromkeys(HTTP_PHASES, 0.0)
+    for name, start, end in phases:
+        totals[name] = totals.get(name, 0.0) + end - start
+    return {name: round(seconds, 4) for name, seconds in totals.items()}
+
+
+ConnectionKey = tuple[str, str, int]
+
+
+@functools.lru_cache(maxsize=None)
+def default_ssl_context() -> ssl.SSLContext:
+    """Shared client TLS context, built on the first HTTPS connection.
+
+    Loading the system CA store is most of the script's import time, and
+    plain-HTTP runs (the mock provider, local probes) never need it.
+    """
+    return ssl.create_default_context()
+
+
+@functools.lru_cache(maxsize=None)
+def proxy_for(key: ConnectionKey) -> tuple[str, int, dict[str, str]] | None:
+    """Proxy host, port and Proxy-Authorization header for ``key``, or None to connect directly.
+
+    Follows the same HTTP(S)_PROXY/NO_PROXY settings urllib.request.urlopen()
+    did; HTTPS goes through a CONNECT tunnel, plain HTTP as absolute-URI
+    requests to the proxy.
+    """
+    import urllib.request
+
+    scheme, host, _ = key
+    proxy_url = urllib.request.getproxies().get(scheme)
+    if not proxy_url or urllib.request.proxy_bypass(host):
+        return None
+    parts = urllib.parse.urlsplit(proxy_url if "://" in proxy_url else f"http://{proxy_url}")
+    if parts.scheme != "http" or not parts.hostname:
+        raise ValueError(f"Unsupported {scheme} proxy {proxy_url!r}: only http:// proxies are supported")
+    headers = {}
+    if parts.username:
+        credentials = f"{urllib.parse.unquote(parts.username)}:{urllib.parse.unquote(parts.password or '')}"
+        headers["Proxy-Authorization"] = "Basic " + base64.b64encode(credentials.encode("utf-8")).decode("ascii")
+    return parts.hostname, parts.port or 80, headers
+
+
+def _proxied_target(key: ConnectionKey, target: str, headers: dict[str, str]) -> tuple[str, dict[str, str]]:
+    """Plain HTTP through a proxy sends the absolute URI (and proxy credentials) to the proxy."""
+    scheme, host, port = key
+    proxy = proxy_for(key)
+    if proxy is None or scheme != "http":
+        return target, headers
+    return f"http://{host}:{port}{target}", {**headers, **proxy[2]}
+
+
+class ConnectionPool:
+    """Keep-alive HTTP(S) connections, bucketed per (scheme, host, port).
+
+    A connection is checked out for exactly one request at a time and returned
+    to its bucket only after the response body has been fully read, so the pool
+    is safe to share between the concurrent case and storyboard workers.
+    """
+
+    def __init__(self, max_idle_per_host: int = 16) -> None:
+        self.max_idle_per_host = max_idle_per_host
+        self._idle: dict[ConnectionKey, list[http.client.HTTPConnection]] = {}
+        self._lock = threading.Lock()
+        self.opened = 0
+        self.reused = 0
+
+    def new_connection(self, key: ConnectionKey, timeout: float) -> http.client.HTTPConnection:
+        scheme, host, port = key
+        with self._lock:
+            self.opened += 1
+        proxy = proxy_for(key)
+        if proxy is not None:
+            proxy_host, proxy_port, proxy_headers = proxy
+            if scheme == "https":
+                conn = http.client.HTTPSConnection(proxy_host, proxy_port, timeout=timeout, context=default_ssl_context())
+                conn.set_tunnel(host, port, headers=proxy_headers)
+                return conn
+            return http.client.HTTPConnection(proxy_host, proxy_port, timeout=timeout)
+        if scheme == "https":
+            return http.client.HTTPSConnection(host, port, timeout=timeout, context=default_ssl_context())
+        return http.client.HTTPConnection(host, port, timeout=timeout)
+
+    def connect(self, conn: http.client.HTTPConnection, key: ConnectionKey, timeout: float) -> list[tuple[str, float, float]]:
+        """Open ``conn``'s socket step by step, returning its dns/connect/tls spans."""
+        scheme, host, port = key
+        started = time.perf_counter()
+        if proxy_for(key) is not None:
+            # http.client resolves, connects, tunnels and handshakes in one go; time it as one span.
+            conn.connect()
+            return [("connect", started, time.perf_counter())]
+        addresses = socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+        resolved = time.perf_counter()
+        sock = None
+        last_error: OSError | None = None
+        for family, sock_type, proto, _, address in addresses:
+            sock = socket.socket(family, sock_type, proto)
+            sock.settimeout(timeout)
+            try:
+                sock.connect(address)
+                break
+            except OSError as error:
+                sock.close()
+                sock, last_error = None, error
+        if sock is None:
+            raise last_error or OSError(f"No addresses for {host}")
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        connected = time.perf_counter()
+        phases = [("dns", started, resolved), ("connect", resolved, connected)]
+        if scheme == "https":
+            sock = default_ssl_context().wrap_socket(sock, server_hostname=host)
+            phases.append(("tls", connected, time.perf_counter()))
+        conn.sock = sock
+        return phases
+
+    def acquire(self, key: ConnectionKey, timeout: float) -> tuple[http.client.HTTPConnection, bool]:
+        with self._lock:
+            bucket = self._idle.get(key)
+            if bucket:
+                self.reused += 1
+                conn = bucket.pop()
+                conn.timeout = timeout
+                if conn.sock is not None:
+                    conn.sock.settimeout(timeout)
+                return conn, True
+        return self.new_connection(key, timeout), False
+
+    def release(self, key: ConnectionKey, conn: http.client.HTTPConnection) -> None:
+        with self._lock:
+            bucket = self._idle.setdefault(key, [])
+            if len(bucket) < self.max_idle_per_host:
+                bucket.append(conn)
+                return
+        conn.close()
+
+    def close_all(self) -> None:
+        with self._lock:
+            buckets, self._idle = self._idle, {}
+        for bucket in buckets.values():
+            for conn in bucket:
+                conn.close()
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            idle = sum(len(bucket) for bucket in self._idle.values())
+        return {"connections_opened": self.opened, "connections_reused": self.reused, "idle_connections": idle}
+
+
+# Shared by every case and repeated run in this process; see connection_pool_for().
+DEFAULT_CONNECTION_POOL = ConnectionPool()
+# Only used as a connection factory (and counter) when pooling is disabled.
+UNPOOLED_CONNECTIONS = ConnectionPool(max_idle_per_host=0)
+
+
+def connection_pool_for(args: argparse.Namespace) -> ConnectionPool | None:
+    return None if args.no_connection_pool else DEFAULT_CONNECTION_POOL
+
+
+def connection_pool_summary(args: argparse.Namespace) -> dict[str, Any]:
+    if args.no_connection_pool:
+        return {"enabled": False, "connections_opened": UNPOOLED_CONNECTIONS.opened + UNPOOLED_ASYNC_CONNECTIONS.opened}
+    summary: dict[str, Any] = {"enabled": True, **DEFAULT_CONNECTION_POOL.stats()}
+    if args.async_transport:
+        with _ASYNC_CONNECTION_TOTALS_LOCK:
+            summary["async"] = dict(_ASYNC_CONNECTION_TOTALS)
+    return summary
+
+
+def _connection_key(url: str) -> tuple[ConnectionKey, str]:
+    parts = urllib.parse.urlsplit(url)
+    scheme = parts.scheme.lower()
+    if scheme not in ("http", "https") or not parts.hostname:
+        raise ValueError(f"Unsupported URL: {url}")
+    port = parts.port or (443 if scheme == "https" else 80)
+    target = parts.path or "/"
+    if parts.query:
+        target = f"{target}?{parts.query}"
+    return (scheme, parts.hostname, port), target
+
+
+def _send_once(
+    method: str,
+    url: str,
+    headers: dict[str, str],
+    data: bytes | None,
+    timeout: float,
+    pool: ConnectionPool | None,
+    started: float,
+    sink: MediaStreamSink | ChatStreamSink | None = None,
+) -> HTTPResult:
+    key, target = _connection_key(url)
+    target, headers = _proxied_target(key, target, headers)
+    factory = pool or UNPOOLED_CONNECTIONS
+    # A reused keep-alive socket may have been closed by the server while idle;
+    # retry such failures once on a fresh connection before giving up.
+    for attempt in range(2):
+        if pool is not None and attempt == 0:
+            conn, reused = pool.acquire(key, timeout)
+        else:
+            conn = factory.new_connection(key, timeout)
+            reused = False
+        phases: list[tuple[str, float, float]] = []
+        try:
+            if not reused:
+                phases.extend(factory.connect(conn, key, timeout))
+            upload_started = time.perf_counter()
+            conn.request(method, target, body=data, headers=headers)
+            uploaded = time.perf_counter()
+            response = conn.getresponse()
+        except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+            conn.close()
+            if reused:
+                continue
+            raise
+        except Exception:
+            conn.close()
+            raise
+        head_received = time.perf_counter()
+        phases.append(("upload", upload_started, uploaded))
+        phases.append(("server_wait", uploaded, head_received))
+        writer = None
+        if sink is not None and response.status not in REDIRECT_STATUSES:
+            writer = sink.writer(response.status, response.headers.get("Content-Type"), started)
+        streamed = None
+        try:
+            if writer is not None:
+                received = 0
+                # read1 returns whatever has arrived, so chunk timestamps reflect the wire.
+                while chunk := response.read1(STREAM_CHUNK_SIZE):
+                    received += len(chunk)
+                    writer.feed(chunk)
+                # read1() never marks a Content-Length body as finished, which would
+                # leave the pooled connection unable to send its next request.
+                if not response.isclosed():
+                    response.read()
+                body, streamed = writer.finish()
+            else:
+                body = response.read()
+                received = len(body)
+        except BaseException:
+            conn.close()
+            if writer is not None:
+                writer.abort()
+            raise
+        finished = time.perf_counter()
+        phases.append(("download", head_received, finished))
+        if pool is not None and not response.will_close:
+            pool.release(key, conn)
+        else:
+            conn.close()
+        return HTTPResult(
+            status=response.status,
+            content_type=response.headers.get("Content-Type"),
+            headers=dict(response.headers.items()),
+            body=body,
+            elapsed_seconds=finished - started,
+            connect_seconds=_connect_seconds(phases),
+            ttfb_seconds=head_received - started,
+            connection_reused=reused,
+            streamed=streamed,
+            phases=phases,
+            request_bytes=len(data or b""),
+            response_bytes=received,
+        )
+    raise ConnectionError(f"Connection to {url} closed before a response was received")
+
+
+def _connect_seconds(phases: list[tuple[str, float, float]]) -> float:
+    return sum(end - start for name, start, end in phases if name in ("dns", "connect", "tls"))
+
+
+def send_request(
+    method: str,
+    url: str,
+    headers: dict[str, str],
+    data: bytes | None,
+    timeout: float,
+    pool: ConnectionPool | None,
+    sink: MediaStreamSink | ChatStreamSink | None = None,
+) -> HTTPResult:
+    """Send one request, following redirects; pass ``pool=None`` for a fresh connection per call."""
+    started = time.perf_counter()
+    connect_seconds = 0.0
+    phases: list[tuple[str, float, float]] = []
+    request_bytes = response_bytes = 0
+    for _ in range(MAX_REDIRECTS + 1):
+        result = _send_once(method, url, headers, data, timeout, pool, started, sink)
+        connect_seconds += result.connect_seconds
+        phases.extend(result.phases)
+        request_bytes += result.request_bytes
+        response_bytes += result.response_bytes
+        location = result.headers.get("Location") or result.headers.get("location")
+        if result.status not in REDIRECT_STATUSES or not location:
+            break
+        url = urllib.parse.urljoin(url, location)
+        if result.status == 303 or (result.status in (301, 302) and method == "POST"):
+            method, data = "GET", None
+            headers = {name: value for name, value in headers.items() if name.lower() != "content-type"}
+    result.connect_seconds = connect_seconds
+    result.phases, result.request_bytes, result.response_bytes = phases, request_bytes, response_bytes
+    return result
+
+
+class AsyncConnection:
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.reader = reader
+        self.writer = writer
+
+    def usable(self) -> bool:
+        return not self.reader.at_eof() and not self.writer.is_closing()
+
+    def close(self) -> None:
+        self.writer.close()
+
+
+class AsyncConnectionPool:
+    """asyncio counterpart of :class:`ConnectionPool` for one event loop.
+
+    No locking is needed: every acquire/release runs on the loop thread.
+    """
+
+    def __init__(self, max_idle_per_host: int = 64) -> None:
+        self.max_idle_per_host = max_idle_per_host
+        self._idle: dict[ConnectionKey, list[AsyncConnection]] = {}
+        self.opened = 0
+        self.reused = 0
+
+    async def new_connection(self, key: ConnectionKey, timeout: float) -> tuple[AsyncConnection, list[tuple[str, float, float]]]:
+        """Open a connection step by step, returning it with its dns/connect/tls spans."""
+        scheme, host, port = key
+        self.opened += 1
+        proxy = proxy_for(key)
+        connect_host, connect_port = (proxy[0], proxy[1]) if proxy is not None else (host, port)
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        addresses = await asyncio.wait_for(loop.getaddrinfo(connect_host, connect_port, type=socket.SOCK_STREAM), timeout)
+        resolved = time.perf_counter()
+        last_error: OSError | None = None
+        for *_, address in addresses:
+            try:
+                # getaddrinfo's (host, port, ...) is typed loosely enough to include AF_PACKET tuples.
+                ip, port = cast(tuple[str, int], address[:2])
+                reader, writer = await asyncio.wait_for(
+                    asyncio.open_connection(ip, port, limit=STREAM_CHUNK_SIZE * 4), timeout
+                )
+                break
+            except OSError as error:
+                last_error = error
+        else:
+            raise last_error or OSError(f"No addresses for {connect_host}")
+        if proxy is not None and scheme == "https":
+            tunnel = [f"CONNECT {host}:{port} HTTP/1.1", f"Host: {host}:{port}"]
+            tunnel.extend(f"{name}: {value}" for name, value in proxy[2].items())
+            writer.write(("\r\n".join(tunnel) + "\r\n\r\n").encode("latin-1"))
+            status, _ = await _read_response_head(reader, timeout)
+            if status != 200:
+                writer.close()
+                raise OSError(f"Tunnel connection failed: {status}")
+        connected = time.perf_counter()
+        phases = [("dns", started, resolved), ("connect", resolved, connected)]
+        if scheme == "https":
+            await asyncio.wait_for(writer.start_tls(default_ssl_context(), server_hostname=host), timeout)
+            phases.append(("tls", connected, time.perf_counter()))
+        return AsyncConnection(reader, writer), phases
+
+    def take_idle(self, key: ConnectionKey) -> AsyncConnection | None:
+        bucket = self._idle.get(key)
+        while bucket:
+            conn = bucket.pop()
+            if conn.usable():
+                self.reused += 1
+                return conn
+            conn.close()
+        return None
+
+    def release(self, key: ConnectionKey, conn: AsyncConnection) -> None:
+        bucket = self._idle.setdefault(key, [])
+        if len(bucket) < self.max_idle_per_host and conn.usable():
+            bucket.append(conn)
+        else:
+            conn.close()
+
+    async def close_all(self) -> None:
+        buckets, self._idle = self._idle, {}
+        writers = [conn.writer for bucket in buckets.values() for conn in bucket]
+        for writer in writers:
+            writer.close()
+        await asyncio.gather(*(writer.wait_closed() for writer in writers), return_exceptions=True)
+
+    def stats(self) -> dict[str, int]:
+        idle = sum(len(bucket) for bucket in self._idle.values())
+        return {"connections_opened": self.opened, "connections_reused": self.reused, "idle_connections": idle}
+
+
+def _header(headers: dict[str, str], name: str) -> str | None:
+    name = name.lower()
+    return next((value for key, value in headers.items() if key.lower() == name), None)
+
+
+async def _read_response_head(reader: asyncio.StreamReader, timeout: float) -> tuple[int, dict[str, str]]:
+    try:
+        head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), timeout)
+    except asyncio.IncompleteReadError as error:
+        if not error.partial:
+            raise http.client.RemoteDisconnected("Remote end closed connection without response") from None
+        raise http.client.BadStatusLine(error.partial.decode("latin-1", "replace")) from None
+    status_line, *header_lines = head.decode("latin-1").split("\r\n")
+    parts = status_line.split(" ", 2)
+    if len(parts) < 2 or not parts[0].startswith("HTTP/") or not parts[1].isdigit():
+        raise http.client.BadStatusLine(status_line)
+    headers: dict[str, str] = {}
+    for line in header_lines:
+        if ":" in line:
+            name, value = line.split(":", 1)
+            headers[name.strip()] = value.strip()
+    return int(parts[1]), headers
+
+
+async def _iter_response_body(reader: asyncio.StreamReader, method: str, status: int, headers: dict[str, str], timeout: float):
+    """Yield body chunks framed by chunked encoding, Content-Length or connection close."""
+    if method == "HEAD" or status in (204, 304) or 100 <= status < 200:
+        return
+    if "chunked" in (_header(headers, "Transfer-Encoding") or "").lower():
+        while True:
+            size_line = await asyncio.wait_for(reader.readline(), timeout)
+            try:
+                size = int(size_line.split(b";", 1)[0].strip(), 16)
+            except ValueError:
+                raise http.client.IncompleteRead(b"") from None
+            if size == 0:
+                # Skip trailers up to the blank line that ends the message.
+                while (await asyncio.wait_for(reader.readline(), timeout)) not in (b"\r\n", b"\n", b""):
+                    pass
+                return
+            while size:
+                chunk = await asyncio.wait_for(reader.read(min(size, STREAM_CHUNK_SIZE)), timeout)
+                if not chunk:
+                    raise http.client.IncompleteRead(b"")
+                size -= len(chunk)
+                yield chunk
+            await asyncio.wait_for(reader.readexactly(2), timeout)
+    length = _header(headers, "Content-Length")
+    if length is not None:
+        remaining = int(length)
+        while remaining:
+            chunk = await asyncio.wait_for(reader.read(min(remaining, STREAM_CHUNK_SIZE)), timeout)
+            if not chunk:
+                raise http.client.IncompleteRead(b"", remaining)
+            remaining -= len(chunk)
+            yield chunk
+        return
+    while chunk := await asyncio.wait_for(reader.read(STREAM_CHUNK_SIZE), timeout):
+        yield chunk
+
+
+def _encode_request(method: str, key: ConnectionKey, target: str, headers: dict[str, str], data: bytes | None) -> bytes:
+    scheme, host, port = key
+    default_port = 443 if scheme == "https" else 80
+    lines = [f"{method} {target} HTTP/1.1", f"Host: {host if port == default_port else f'{host}:{port}'}"]
+    if _header(headers, "Accept-Encoding") is None:
+        lines.append("Accept-Encoding: identity")
+    lines.extend(f"{name}: {value}" for name, value in headers.items())
+    if data is not None:
+        lines.append(f"Content-Length: {len(data)}")
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + (data or b"")
+
+
+async def _async_send_once(
+    method: str,
+    url: str,
+    headers: dict[str, str],
+    data: bytes | None,
+    timeout: float,
+    pool: AsyncConnectionPool | None,
+    started: float,
+    sink: MediaStreamSink | ChatStreamSink | None = None,
+) -> HTTPResult:
+    key, target = _connection_key(url)
+    target, headers = _proxied_target(key, target, headers)
+    request_data = _encode_request(method, key, target, headers, data)
+    for attempt in range(2):
+        conn = pool.take_idle(key) if pool is not None and attempt == 0 else None
+        reused = conn is not None
+        phases: list[tuple[str, float, float]] = []
+        try:
+            if conn is None:
+                conn, phases = await (pool or UNPOOLED_ASYNC_CONNECTIONS).new_connection(key, timeout)
+            upload_started = time.perf_counter()
+            conn.writer.write(request_data)
+            await asyncio.wait_for(conn.writer.drain(), timeout)
+            uploaded = time.perf_counter()
+            status, response_headers = await _read_response_head(conn.reader, timeout)
+        except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+            if conn is not None:
+                conn.close()
+            if reused:
+                continue
+            raise
+        except BaseException:
+            if conn is not None:
+                conn.close()
+            raise
+        head_received = time.perf_counter()
+        phases.append(("upload", upload_started, uploaded))
+        phases.append(("server_wait", uploaded, head_received))
+        content_type = _header(response_headers, "Content-Type")
+        writer = sink.writer(status, content_type, started) if sink is not None and status not in REDIRECT_STATUSES else None
+        body: bytes | bytearray = bytearray()
+        received = 0
+        try:
+            async for chunk in _iter_response_body(conn.reader, method, status, response_headers, timeout):
+                received += len(chunk)
+                if writer is not None:
+                    writer.feed(chunk)
+                else:
+                    body += chunk
+        except BaseException:
+            conn.close()
+            if writer is not None:
+                writer.abort()
+            raise
+        streamed = None
+        if writer is not None:
+            body, streamed = writer.finish()
+        finished = time.perf_counter()
+        phases.append(("download", head_received, finished))
+        will_close = (_header(response_headers, "Connection") or "").lower() == "close" or (
+            _header(response_headers, "Content-Length") is None
+            and "chunked" not in (_header(response_headers, "Transfer-Encoding") or "").lower()
+            and method != "HEAD"
+            and status not in (204, 304)
+        )
+        if pool is not None and not will_close:
+            pool.release(key, conn)
+        else:
+            conn.close()
+        return HTTPResult(
+            status=status,
+            content_type=content_type,
+            headers=response_headers,
+            body=bytes(body),
+            elapsed_seconds=finished - started,
+            connect_seconds=_connect_seconds(phases),
+            ttfb_seconds=head_received - started,
+            connection_reused=reused,
+            streamed=streamed,
+            phases=phases,
+            request_bytes=len(data or b""),
+            response_bytes=received,
+        )
+    raise ConnectionError(f"Connection to {url} closed before a response was received")
+
+
+async def async_send_request(
+    method: str,
+    url: str,
+    headers: dict[str, str],
+    data: bytes | None,
+    timeout: float,
+    pool: AsyncConnectionPool | None,
+    sink: MediaStreamSink | ChatStreamSink | None = None,
+) -> HTTPResult:
+    """asyncio counterpart of :func:`send_request`, with the same redirect handling."""
+    started = time.perf_counter()
+    connect_seconds = 0.0
+    phases: list[tuple[str, float, float]] = []
+    request_bytes = response_bytes = 0
+    for _ in range(MAX_REDIRECTS + 1):
+        result = await _async_send_once(method, url, headers, data, timeout, pool, started, sink)
+        connect_seconds += result.connect_seconds
+        phases.extend(result.phases)
+        request_bytes += result.request_bytes
+        response_bytes += result.response_bytes
+        location = _header(result.headers, "Location")
+        if result.status not in REDIRECT_STATUSES or not location:
+            break
+        url = urllib.parse.urljoin(url, location)
+        if result.status == 303 or (result.status in (301, 302) and method == "POST"):
+            method, data = "GET", None
+            headers = {name: value for name, value in headers.items() if name.lower() != "content-type"}
+    result.connect_seconds = connect_seconds
+    result.phases, result.request_bytes, result.response_bytes = phases, request_bytes, response_bytes
+    return result
+
+
+# Idle connections belong to the event loop that opened them, so every run_async()
+# call gets its own pool and closes it when its loop finishes. Closed pools add
+# their counters to _ASYNC_CONNECTION_TOTALS for the run summary.
+_ASYNC_CONNECTION_POOL: contextvars.ContextVar[AsyncConnectionPool | None] = contextvars.ContextVar(
+    "phase0_async_connection_pool", default=None
+)
+_ASYNC_CONNECTION_TOTALS = {"connections_opened": 0, "connections_reused": 0, "idle_connections": 0}
+_ASYNC_CONNECTION_TOTALS_LOCK = threading.Lock()
+# Connection factory (and counter) for async sends when pooling is disabled.
+UNPOOLED_ASYNC_CONNECTIONS = AsyncConnectionPool(max_idle_per_host=0)
+
+
+def async_connection_pool_for(args: argparse.Namespace) -> AsyncConnectionPool | None:
+    if args.no_connection_pool:
+        return None
+    pool = _ASYNC_CONNECTION_POOL.get()
+    if pool is None:
+        raise RuntimeError("the async transport only runs inside run_async()")
+    return pool
+
+
+def run_async(awaitable: Awaitable[Any]) -> Any:
+    """Run ``awaitable`` on a fresh event loop with its own connection pool, closed afterwards."""
+
+    async def runner() -> Any:
+        pool = AsyncConnectionPool()
+        # Tasks and to_thread() calls started from here inherit the pool through the context.
+        _ASYNC_CONNECTION_POOL.set(pool)
+        try:
+            return await awaitable
+        finally:
+            await pool.close_all()
+            with _ASYNC_CONNECTION_TOTALS_LOCK:
+                _ASYNC_CONNECTION_TOTALS["connections_opened"] += pool.opened
+                _ASYNC_CONNECTION_TOTALS["connections_reused"] += pool.reused
+
+    return asyncio.run(runner())
+
+
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+
+
+def parse_delay_header(value: str | None, now: float | None = None) -> float | None:
+    """Seconds to wait according to a Retry-After or rate-limit reset header.
+
+    Accepts plain seconds, epoch timestamps, HTTP dates and OpenAI-style
+    durations such as ``"6m0s"`` or ``"20ms"``.
+    """
+    if not value:
+        return None
+    value = value.strip()
+    now = time.time() if now is None else now
+    try:
+        number = float(value)
+    except ValueError:
+        number = None
+    if number is not None:
+        # Large values are absolute epoch seconds (X-RateLimit-Reset style).
+        return max(0.0, number - now) if number > 1e9 else max(0.0, number)
+    parts = _DURATION_PART.findall(value)
+    if parts and "".join(amount + unit for amount, unit in parts) == value:
+        scale = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+        return sum(float(amount) * scale[unit] for amount, unit in parts)
+    try:
+        return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - now)
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """Per-host request budget; ``pause_until`` lets rate-limit headers freeze it."""
+
+    def __init__(self, rate_per_second: float, burst: int) -> None:
+        self.rate = rate_per_second
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _take(self) -> float:
+        """Take a token and return 0.0, or return how long to wait before trying again."""
+        with self._lock:
+            now = time.monotonic()
+            if self.rate > 0:
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if now >= self.paused_until and (self.rate <= 0 or self.tokens >= 1.0):
+                if self.rate > 0:
+                    self.tokens -= 1.0
+                return 0.0
+            return max(self.paused_until - now, (1.0 - self.tokens) / self.rate if self.rate > 0 else 0.0)
+
+    def acquire(self) -> float:
+        waited = 0.0
+        while delay := self._take():
+            time.sleep(delay)
+            waited += delay
+        return waited
+
+    async def async_acquire(self) -> float:
+        waited = 0.0
+        while delay := self._take():
+            await asyncio.sleep(delay)
+            waited += delay
+        return waited
+
+    def pause_until(self, deadline: float) -> None:
+        with self._lock:
+            self.paused_until = max(self.paused_until, deadline)
+
+
+def _resolve_waiter(waiter: asyncio.Future[None]) -> None:
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+class AdaptiveConcurrencyLimiter:
+    """AIMD in-flight limit for one endpoint, adjusted once per window of completed calls.
+
+    A window is ``max(min_window, limit)`` completions, roughly one round at the
+    current limit. Any 429/5xx or connection error in it halves the limit; a
+    window p90 above ``latency_tolerance`` times the best p90 seen recently cuts
+    it by a fifth; otherwise, if every slot was busy during the window, the
+    limit grows by one. Calls started before a cut are not sampled, so one
+    overload is not punished twice. Each change is appended to ``timeline``.
+    Blocking and asyncio callers can share one limiter.
+    """
+
+    def __init__(self, initial: int, max_limit: int, latency_tolerance: float = 1.5, min_window: int = 4) -> None:
+        self.max_limit = max(1, max_limit)
+        self.limit = max(1, min(initial, self.max_limit))
+        self.latency_tolerance = latency_tolerance
+        self.min_window = min_window
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        # Latency baseline; drifts up 2% per window unless refreshed, so a provider
+        # that becomes slower overall is re-learned instead of throttled forever.
+        self.best_p90: float | None = None
+        self.waits = 0
+        self.wait_seconds = 0.0
+        self.created = time.perf_counter()
+        self.timeline: list[dict[str, Any]] = [{"offset_seconds": 0.0, "limit": self.limit, "reason": "initial"}]
+        self._window_latencies: list[float] = []
+        self._window_errors = 0
+        self._window_saturated = False
+        # Bumped on every cut; release() drops samples from calls acquired before it.
+        self._generation = 0
+        self._condition = threading.Condition()
+        self._async_waiters: collections.deque[tuple[asyncio.AbstractEventLoop, asyncio.Future[None]]] = collections.deque()
+
+    def _try_acquire(self) -> bool:
+        if self.in_flight >= self.limit:
+            return False
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        if self.in_flight >= self.limit:
+            self._window_saturated = True
+        return True
+
+    def _waited(self, started: float) -> int:
+        waited = time.perf_counter() - started
+        with self._condition:
+            if waited > 0.001:
+                self.waits += 1
+                self.wait_seconds += waited
+            return self._generation
+
+    def acquire(self) -> int:
+        """Wait for a slot; returns the generation to hand back to :meth:`release`."""
+        started = time.perf_counter()
+        with self._condition:
+            while not self._try_acquire():
+                self._condition.wait()
+        return self._waited(started)
+
+    async def async_acquire(self) -> int:
+        started = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._condition:
+                if self._try_acquire():
+                    break
+                waiter = loop.create_future()
+                self._async_waiters.append((loop, waiter))
+            await waiter
+        return self._waited(started)
+
+    def release(self, generation: int, latency: float | None, overloaded: bool) -> None:
+        """Free a slot. ``latency`` is None when the call produced no usable sample."""
+        with self._condition:
+            self.in_flight -= 1
+            if generation == self._generation:
+                if overloaded:
+                    self._window_errors += 1
+                elif latency is not None:
+                    self._window_latencies.append(latency)
+                if self._window_errors + len(self._window_latencies) >= max(self.min_window, self.limit):
+                    self._adjust()
+            self._condition.notify_all()
+            while self._async_waiters:
+                loop, waiter = self._async_waiters.popleft()
+                loop.call_soon_threadsafe(_resolve_waiter, waiter)
+
+    def _adjust(self) -> None:
+        latencies, errors = self._window_latencies, self._window_errors
+        p90 = percentile(latencies, 90) if latencies else None
+        previous = self.limit
+        reason = None
+        if errors:
+            self.limit, reason = max(1, previous // 2), "errors"
+        elif p90 is not None and self.best_p90 is not None and p90 > self.best_p90 * self.latency_tolerance:
+            self.limit, reason = max(1, math.floor(previous * 0.8)), "latency"
+        elif self._window_saturated and previous < self.max_limit:
+            self.limit, reason = previous + 1, "increase"
+        if p90 is not None:
+            self.best_p90 = p90 if self.best_p90 is None else min(p90, self.best_p90 * 1.02)
+        if self.limit < previous:
+            self._generation += 1
+        if self.limit != previous:
+            self.timeline.append(
+                {
+                    "offset_seconds": round(time.perf_counter() - self.created, 3),
+                    "limit": self.limit,
+                    "previous": previous,
+                    "reason": reason,
+                    "window_calls": len(latencies) + errors,
+                    "window_errors": errors,
+                    "window_p90_seconds": round(p90, 3) if p90 is not None else None,
+                }
+            )
+        self._window_latencies = []
+        self._window_errors = 0
+        self._window_saturated = self.in_flight >= self.limit
+
+    def limited(self, send: Callable[[], HTTPResult]) -> Callable[[], HTTPResult]:
+        def send_limited() -> HTTPResult:
+            generation = self.acquire()
+            started = time.perf_counter()
+            try:
+                result = send()
+            except (OSError, http.client.HTTPException):
+                self.release(generation, None, overloaded=True)
+                raise
+            except BaseException:
+                self.release(generation, None, overloaded=False)
+                raise
+            self.release(generation, time.perf_counter() - started, overloaded=result.status in RETRYABLE_STATUSES)
+            return result
+
+        return send_limited
+
+    def async_limited(self, send: Callable[[], Awaitable[HTTPResult]]) -> Callable[[], Awaitable[HTTPResult]]:
+        async def send_limited() -> HTTPResult:
+            generation = await self.async_acquire()
+            started = time.perf_counter()
+            try:
+                result = await send()
+            except (OSError, http.client.HTTPException):
+                self.release(generation, None, overloaded=True)
+                raise
+            except BaseException:
+                self.release(generation, None, overloaded=False)
+                raise
+            self.release(generation, time.perf_counter() - started, overloaded=result.status in RETRYABLE_STATUSES)
+            return result
+
+        return send_limited
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._condition:
+            timeline = list(self.timeline)
+            elapsed = time.perf_counter() - self.created
+            # Time-weighted mean limit: a starting point for fixed production worker pools.
+            weighted = 0.0
+            for entry, following in zip(timeline, timeline[1:] + [{"offset_seconds": elapsed}]):
+                weighted += entry["limit"] * (following["offset_seconds"] - entry["offset_seconds"])
+            return {
+                "limit": self.limit,
+                "max_limit": self.max_limit,
+                "time_weighted_limit": round(weighted / elapsed, 2) if elapsed > 0 else float(self.limit),
+                "peak_in_flight": self.peak_in_flight,
+                "best_p90_seconds": round(self.best_p90, 3) if self.best_p90 is not None else None,
+                "waits": self.waits,
+                "wait_seconds": round(self.wait_seconds, 3),
+                "timeline": timeline,
+            }
+
+
+def endpoint_key(url: str) -> str:
+    """Host and path of an API URL; adaptive concurrency limits are kept per endpoint."""
+    parts = urllib.parse.urlsplit(url)
+    return f"{parts.netloc}{parts.path}"
+
+
+class RequestScheduler:
+    """Wraps sends with retries, per-host rate limiting and optional hedging.
+
+    Retries cover 429/5xx and connection errors with full-jitter exponential
+    backoff, preferring the server's Retry-After. ``x-ratelimit-remaining*: 0``
+    pauses that host's bucket until the advertised reset. With ``hedge`` on, a
+    call still running past the host's observed p95 gets a duplicate request
+    (charged to the bucket like any other) and the first 2xx or non-429 4xx
+    response wins; a 5xx/429 still beats a connection error. With
+    ``adaptive_concurrency`` on, API calls (``limit_key`` set) also hold a slot
+    of their endpoint's :class:`AdaptiveConcurrencyLimiter` while each attempt
+    is in flight. Every attempt is recorded on the returned
+    ``HTTPResult.attempts``.
+    """
+
+    def __init__(
+        self,
+        max_retries: int = 0,
+        base_delay: float = 0.5,
+        max_delay: float = 20.0,
+        rate_per_second: float = 0.0,
+        burst: int = 1,
+        hedge: bool = False,
+        hedge_min_samples: int = 10,
+        adaptive_concurrency: bool = False,
+        adaptive_initial: int = 2,
+        adaptive_max: int = 16,
+        adaptive_latency_tolerance: float = 1.5,
+    ) -> None:
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.rate_per_second = rate_per_second
+        self.burst = burst
+        self.hedge = hedge
+        self.hedge_min_samples = hedge_min_samples
+        self.adaptive_concurrency = adaptive_concurrency
+        self.adaptive_initial = adaptive_initial
+        self.adaptive_max = adaptive_max
+        self.adaptive_latency_tolerance = adaptive_latency_tolerance
+        self._buckets: dict[str, TokenBucket] = {}
+        self._limiters: dict[str, AdaptiveConcurrencyLimiter] = {}
+        self._latencies: dict[str, collections.deque[float]] = {}
+        self._lock = threading.Lock()
+        self._hedge_pool: ThreadPoolExecutor | None = None
+        self._rng = random.Random()
+        self.stats = {"requests": 0, "retries": 0, "hedges": 0, "hedge_wins": 0, "rate_limit_wait_seconds": 0.0}
+
+    def _bucket(self, host: str) -> TokenBucket:
+        with self._lock:
+            if host not in self._buckets:
+                self._buckets[host] = TokenBucket(self.rate_per_second, self.burst)
+            return self._buckets[host]
+
+    def limiter(self, limit_key: str | None) -> AdaptiveConcurrencyLimiter | None:
+        if not self.adaptive_concurrency or limit_key is None:
+            return None
+        with self._lock:
+            if limit_key not in self._limiters:
+                self._limiters[limit_key] = AdaptiveConcurrencyLimiter(
+                    self.adaptive_initial, self.adaptive_max, self.adaptive_latency_tolerance
+                )
+            return self._limiters[limit_key]
+
+    def _count(self, name: str, amount: float = 1) -> None:
+        with self._lock:
+            self.stats[name] += amount
+
+    def backoff(self, attempt: int) -> float:
+        return self._rng.uniform(0.0, min(self.max_delay, self.base_delay * (2**attempt)))
+
+    def _observe(self, host: str, result: HTTPResult) -> None:
+        headers = {name.lower(): value for name, value in result.headers.items()}
+        for suffix in ("-requests", ""):
+            if headers.get(f"x-ratelimit-remaining{suffix}", "").strip() == "0":
+                reset = parse_delay_header(headers.get(f"x-ratelimit-reset{suffix}") or headers.get("ratelimit-reset"))
+                if reset:
+                    self._bucket(host).pause_until(time.monotonic() + reset)
+                break
+        if result.status < 400:
+            with self._lock:
+                self._latencies.setdefault(host, collections.deque(maxlen=200)).append(result.elapsed_seconds)
+
+    def hedge_threshold(self, host: str) -> float | None:
+        with self._lock:
+            samples = list(self._latencies.get(host, ()))
+        if not self.hedge or len(samples) < self.hedge_min_samples:
+            return None
+        return percentile(samples, 95)
+
+    def _hedge_send(self, host: str, send: Callable[[], HTTPResult]) -> HTTPResult:
+        # A hedge is a real extra request, so it pays for a token like any other.
+        if waited := self._bucket(host).acquire():
+            self._count("rate_limit_wait_seconds", waited)
+        return send()
+
+    def _send_hedged(self, host: str, send: Callable[[], HTTPResult], record: Callable[..., None]) -> HTTPResult:
+        threshold = self.hedge_threshold(host)
+        started = {"primary": time.perf_counter()}
+        if threshold is None:
+            try:
+                result = send()
+            except Exception as error:
+                record("primary", started["primary"], error=error)
+                raise
+            record("primary", started["primary"], result=result)
+            return result
+
+        # The primary gets a thread of its own and only hedges go to the shared pool,
+        # so a burst of slow calls can never queue primaries behind hedges.
+        finished: dict[str, float] = {}
+
+        def timed(kind: str, call: Callable[[], HTTPResult]) -> Callable[[], HTTPResult]:
+            def run() -> HTTPResult:
+                try:
+                    return call()
+                finally:
+                    finished[kind] = time.perf_counter()
+
+            return run
+
+        futures = {"primary": _run_on_thread(timed("primary", send), "phase0-primary")}
+        if not wait(futures.values(), timeout=threshold).done:
+            with self._lock:
+                if self._hedge_pool is None:
+                    self._hedge_pool = ThreadPoolExecutor(max_workers=32, thread_name_prefix="phase0-hedge")
+                pool = self._hedge_pool
+            self._count("hedges")
+            started["hedge"] = time.perf_counter()
+            hedge = functools.partial(self._hedge_send, host, send)
+            futures["hedge"] = pool.submit(contextvars.copy_context().run, timed("hedge", hedge))
+        kinds = {future: kind for kind, future in futures.items()}
+        pending = set(kinds)
+        outcomes: dict[str, HTTPResult | BaseException] = {}
+        order: list[str] = []
+        while pending and not any(_hedge_winner(outcome) for outcome in outcomes.values()):
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in sorted(done, key=lambda future: finished[kinds[future]]):
+                kind = kinds[future]
+                outcomes[kind] = future.exception() or future.result()
+                order.append(kind)
+                _record_outcome(record, kind, started[kind], outcomes[kind], finished[kind])
+        for future in pending:
+            # The slower duplicate keeps running; drop whatever it streams to disk.
+            future.add_done_callback(_discard_streamed_result)
+        return self._pick_hedged(outcomes, order)
+
+    def _pick_hedged(self, outcomes: dict[str, HTTPResult | BaseException], order: list[str]) -> HTTPResult:
+        """First winning response in completion order, else any response (a 5xx/429 beats an exception)."""
+        kind = next((kind for kind in order if _hedge_winner(outcomes[kind])), None)
+        if kind is None:
+            kind = next((kind for kind in order if isinstance(outcomes[kind], HTTPResult)), None)
+        if kind is None:
+            # Every attempt raised; surface the primary's error.
+            raise cast(BaseException, outcomes["primary"])
+        for other, outcome in outcomes.items():
+            if other != kind and isinstance(outcome, HTTPResult) and outcome.streamed is not None:
+                outcome.streamed.path.unlink(missing_ok=True)
+        if kind == "hedge":
+            self._count("hedge_wins")
+        return cast(HTTPResult, outcomes[kind])
+
+    def _recorder(self, attempts: list[dict[str, Any]], attempt: int, origin: float, waited: float) -> Callable[..., None]:
+        def record(
+            kind: str,
+            started: float,
+            result: HTTPResult | None = None,
+            error: BaseException | None = None,
+            finished: float | None = None,
+        ) -> None:
+            entry: dict[str, Any] = {
+                "attempt": attempt,
+                "kind": kind,
+                "started_offset_seconds": round(started - origin, 3),
+                "elapsed_seconds": round((finished or time.perf_counter()) - started, 3),
+                "rate_limit_wait_seconds": round(waited, 3),
+            }
+            if result is not None:
+                entry["status"] = result.status
+            else:
+                entry["error"] = f"{type(error).__name__}: {error}"
+            attempts.append(entry)
+
+        return record
+
+    def _retry_delay(self, attempt: int, result: HTTPResult | None) -> float:
+        """Delay before the next attempt after ``result`` (``None`` for a connection error)."""
+        if result is None:
+            return self.backoff(attempt)
+        retry_after = parse_delay_header(
+            next((value for name, value in result.headers.items() if name.lower() == "retry-after"), None)
+        )
+        return min(retry_after, self.max_delay) if retry_after is not None else self.backoff(attempt)
+
+    def execute(self, url: str, send: Callable[[], HTTPResult], limit_key: str | None = None) -> HTTPResult:
+        host = urllib.parse.urlsplit(url).hostname or ""
+        if limiter := self.limiter(limit_key):
+            send = limiter.limited(send)
+        origin = time.perf_counter()
+        attempts: list[dict[str, Any]] = []
+        self._count("requests")
+
+        for attempt in range(self.max_retries + 1):
+            waited = self._bucket(host).acquire()
+            if waited:
+                self._count("rate_limit_wait_seconds", waited)
+            record = self._recorder(attempts, attempt, origin, waited)
+            try:
+                result = self._send_hedged(host, send, record)
+            except (OSError, http.client.HTTPException):
+                if attempt >= self.max_retries:
+                    raise
+                delay = self._retry_delay(attempt, None)
+                attempts[-1]["retry_after_seconds"] = round(delay, 3)
+                self._count("retries")
+                time.sleep(delay)
+                continue
+            self._observe(host, result)
+            if result.status in RETRYABLE_STATUSES and attempt < self.max_retries:
+                delay = self._retry_delay(attempt, result)
+                attempts[-1]["retry_after_seconds"] = round(delay, 3)
+                if result.streamed is not None:
+                    result.streamed.path.unlink(missing_ok=True)
+                self._count("retries")
+                time.sleep(delay)
+                continue
+            result.attempts = attempts
+            return result
+        raise AssertionError("unreachable")
+
+    async def _async_hedge_send(self, host: str, send: Callable[[], Awaitable[HTTPResult]]) -> HTTPResult:
+        if waited := await self._bucket(host).async_acquire():
+            self._count("rate_limit_wait_seconds", waited)
+        return await send()
+
+    async def _async_send_hedged(
+        self,
+        host: str,
+        send: Callable[[], Awaitable[HTTPResult]],
+        record: Callable[..., None],
+    ) -> HTTPResult:
+        threshold = self.hedge_threshold(host)
+        started = {"primary": time.perf_counter()}
+        if threshold is None:
+            try:
+                result = await send()
+            except Exception as error:
+                record("primary", started["primary"], error=error)
+                raise
+            record("primary", started["primary"], result=result)
+            return result
+
+        tasks = {asyncio.ensure_future(send()): "primary"}
+        outcomes: dict[str, HTTPResult | BaseException] = {}
+        order: list[str] = []
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=threshold)
+            if not done:
+                self._count("hedges")
+                started["hedge"] = time.perf_counter()
+                tasks[asyncio.ensure_future(self._async_hedge_send(host, send))] = "hedge"
+            pending = set(tasks)
+            while pending and not any(_hedge_winner(outcome) for outcome in outcomes.values()):
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    kind = tasks[task]
+                    outcomes[kind] = task.exception() or task.result()
+                    order.append(kind)
+                    _record_outcome(record, kind, started[kind], outcomes[kind])
+        finally:
+            # Cancelling aborts the slower duplicate's stream writer, which removes its file.
+            # This also runs when the caller itself is cancelled mid-wait.
+            for task in tasks:
+                task.cancel()
+        return self._pick_hedged(outcomes, order)
+
+    async def async_execute(
+        self, url: str, send: Callable[[], Awaitable[HTTPResult]], limit_key: str | None = None
+    ) -> HTTPResult:
+        """asyncio counterpart of :meth:`execute`; ``send`` must return a fresh awaitable per call."""
+        host = urllib.parse.urlsplit(url).hostname or ""
+        if limiter := self.limiter(limit_key):
+            send = limiter.async_limited(send)
+        origin = time.perf_counter()
+        attempts: list[dict[str, Any]] = []
+        self._count("requests")
+
+        for attempt in range(self.max_retries + 1):
+            waited = await self._bucket(host).async_acquire()
+            if waited:
+                self._count("rate_limit_wait_seconds", waited)
+            record = self._recorder(attempts, attempt, origin, waited)
+            try:
+                result = await self._async_send_hedged(host, send, record)
+            except (OSError, http.client.HTTPException):
+                if attempt >= self.max_retries:
+                    raise
+                delay = self._retry_delay(attempt, None)
+                attempts[-1]["retry_after_seconds"] = round(delay, 3)
+                self._count("retries")
+                await asyncio.sleep(delay)
+                continue
+            self._observe(host, result)
+            if result.status in RETRYABLE_STATUSES and attempt < self.max_retries:
+                delay = self._retry_delay(attempt, result)
+                attempts[-1]["retry_after_seconds"] = round(delay, 3)
+                if result.streamed is not None:
+                    result.streamed.path.unlink(missing_ok=True)
+                self._count("retries")
+                await asyncio.sleep(delay)
+                continue
+            result.attempts = attempts
+            return result
+        raise AssertionError("unreachable")
+
+    def summary(self) -> dict[str, Any]:
+        with self._lock:
+            stats = dict(self.stats)
+        stats["rate_limit_wait_seconds"] = round(stats["rate_limit_wait_seconds"], 3)
+        summary: dict[str, Any] = {
+            "max_retries": self.max_retries,
+            "rate_limit_rps": self.rate_per_second,
+            "hedge": self.hedge,
+            **stats,
+        }
+        if self.adaptive_concurrency:
+            summary["adaptive_concurrency"] = self.adaptive_summary()
+        return summary
+
+    def adaptive_summary(self) -> dict[str, Any]:
+        with self._lock:
+            limiters = dict(self._limiters)
+        return {key: limiter.snapshot() for key, limiter in sorted(limiters.items())}
+
+
+def _hedge_winner(outcome: HTTPResult | BaseException) -> bool:
+    """A hedged attempt only wins with a 2xx/3xx or a 4xx that retrying would not change."""
+    return isinstance(outcome, HTTPResult) and outcome.status < 500 and outcome.status != 429
+
+
+def _record_outcome(
+    record: Callable[..., None],
+    kind: str,
+    started: float,
+    outcome: HTTPResult | BaseException,
+    finished: float | None = None,
+) -> None:
+    if isinstance(outcome, BaseException):
+        record(kind, started, error=outcome, finished=finished)
+    else:
+        record(kind, started, result=outcome, finished=finished)
+
+
+def _run_on_thread(fn: Callable[[], Any], name: str) -> Future[Any]:
+    """Run ``fn`` on a fresh daemon thread (in a copy of the caller's context) and return its future."""
+    future: Future[Any] = Future()
+    context = contextvars.copy_context()
+
+    def run() -> None:
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            result = context.run(fn)
+        except BaseException as error:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    threading.Thread(target=run, name=name, daemon=True).start()
+    return future
+
+
+def _discard_streamed_result(future: Any) -> None:
+    if future.exception() is None and future.result().streamed is not None:
+        future.result().streamed.path.unlink(missing_ok=True)
+
+
+_SCHEDULERS: dict[tuple[Any, ...], RequestScheduler] = {}
+_SCHEDULERS_LOCK = threading.Lock()
+
+
+def request_scheduler_for(args: argparse.Namespace) -> RequestScheduler:
+    settings = (
+        args.max_retries,
+        args.retry_base_delay,
+        args.retry_max_delay,
+        args.rate_limit_rps,
+        args.rate_limit_burst,
+        args.hedge,
+        args.hedge_min_samples,
+        args.adaptive_concurrency,
+        args.adaptive_initial_concurrency,
+        args.adaptive_max_concurrency,
+        args.adaptive_latency_tolerance,
+    )
+    with _SCHEDULERS_LOCK:
+        if settings not in _SCHEDULERS:
+            _SCHEDULERS[settings] = RequestScheduler(*settings)
+        return _SCHEDULERS[settings]
+
+
+def http_request(
+    method: str,
+    url: str,
+    headers: dict[str, str],
+    payload: dict[str, Any] | None = None,
+    timeout: float = 120.0,
+    pool: ConnectionPool | None = DEFAULT_CONNECTION_POOL,
+    sink: MediaStreamSink | ChatStreamSink | None = None,
+    scheduler: RequestScheduler | None = None,
+) -> HTTPResult:
+    headers, data = _api_request(headers, payload)
+    if scheduler is None:
+        return send_request(method, url, headers, data, timeout, pool, sink)
+    return scheduler.execute(
+        url, lambda: send_request(method, url, headers, data, timeout, pool, sink), limit_key=endpoint_key(url)
+    )
+
+
+def _api_request(headers: dict[str, str], payload: dict[str, Any] | None) -> tuple[dict[str, str], bytes | None]:
+    data = None
+    if payload is not None:
+        data = json.dumps(payload).encode("utf-8")
+        headers = {**headers, "Content-Type": "application/json"}
+
+    if "User-Agent" not in headers:
+        headers = {
+            **headers,
+            "User-Agent": BROWSER_USER_AGENT,
+            "Accept": "application/json, */*",
+        }
+    return headers, data
+
+
+async def async_http_request(
+    method: str,
+    url: str,
+    headers: dict[str, str],
+    payload: dict[str, Any] | None = None,
+    timeout: float = 120.0,
+    pool: AsyncConnectionPool | None = None,
+    sink: MediaStreamSink | ChatStreamSink | None = None,
+    scheduler: RequestScheduler | None = None,
+) -> HTTPResult:
+    headers, data = _api_request(headers, payload)
+    if scheduler is None:
+        return await async_send_request(method, url, headers, data, timeout, pool, sink)
+    return await scheduler.async_execute(
+        url, lambda: async_send_request(method, url, headers, data, timeout, pool, sink), limit_key=endpoint_key(url)
+    )
+
+
+def maybe_json(body: bytes) -> Any | None:
+    try:
+        return json.loads(body.decode("utf-8"))
+    except Exception:
+        return None
+
+
+DEBUG_CAPTURE_LEVELS = ("off", "meta", "full")
+# Strings at least this long made only of base64 characters are treated as media
+# in debug captures and replaced by a reference.
+DEBUG_REDACT_MIN_CHARS = 256
+# Line breaks are allowed (MIME-wrapped base64) but not spaces, so prose stays readable.
+_BASE64_TEXT = re.compile(r"[A-Za-z0-9+/_\-]+(?:\r?\n[A-Za-z0-9+/_\-]+)*={0,2}\s*")
+# Captures queued with their body at once; past this the body is dropped and only meta is written.
+DEBUG_QUEUE_BODIES = 16
+
+
+def redact_media_strings(value: Any, media_path: str | None) -> Any:
+    if isinstance(value, dict):
+        return {key: redact_media_strings(item, media_path) for key, item in value.items()}
+    if isinstance(value, list):
+        return [redact_media_strings(item, media_path) for item in value]
+    if isinstance(value, str) and len(value) >= DEBUG_REDACT_MIN_CHARS and _BASE64_TEXT.fullmatch(value):
+        try:
+            decoded = base64.b64decode(value)
+        except ValueError:
+            return f"{value[:64]}...<truncated {len(value)} chars>"
+        return {
+            "redacted": "base64",
+            "chars": len(value),
+            "decoded_bytes": len(decoded),
+            "sha256": hashlib.sha256(decoded).hexdigest(),
+            "media_path": media_path,
+        }
+    return value
+
+
+class DebugArtifactWriter:
+    """Writes HTTP debug captures on one background thread, off the request path.
+
+    ``meta`` keeps only status/timing/headers; ``full`` also writes the body with
+    base64 media replaced by the saved media path and its sha256, and skips
+    bodies that were saved verbatim as the media file. At most
+    ``DEBUG_QUEUE_BODIES`` bodies wait in the queue; when the writer falls
+    behind, further captures keep their meta and drop the body.
+    """
+
+    def __init__(self, level: str) -> None:
+        self.level = level
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="phase0-debug")
+        self._lock = threading.Lock()
+        self._body_slots = threading.BoundedSemaphore(DEBUG_QUEUE_BODIES)
+        self._pending: list[Any] = []
+        self.artifacts = 0
+        self.bytes_written = 0
+        self.write_seconds = 0.0
+        self.bodies_dropped = 0
+        self.errors: list[str] = []
+
+    def submit(self, prefix: Path, result: HTTPResult, media_path: str | None) -> None:
+        if self.level == "off":
+            return
+        # The queued job holds the small meta dict, never the HTTPResult itself.
+        meta = self._meta(result, media_path)
+        body = b""
+        if self.level == "full" and result.body:
+            if self._body_slots.acquire(blocking=False):
+                body = result.body
+            else:
+                meta["body_dropped"] = "debug writer queue full"
+                with self._lock:
+                    self.bodies_dropped += 1
+        future = self._executor.submit(self._write, prefix, meta, body, media_path)
+        with self._lock:
+            self._pending.append(future)
+
+    def _dump(self, path: Path, data: bytes) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+        with self._lock:
+            self.artifacts += 1
+            self.bytes_written += len(data)
+
+    @staticmethod
+    def _meta(result: HTTPResult, media_path: str | None) -> dict[str, Any]:
+        meta: dict[str, Any] = {
+            "status": result.status,
+            "content_type": result.content_type,
+            "elapsed_seconds": round(result.elapsed_seconds, 3),
+            "connect_seconds": round(result.connect_seconds, 3),
+            "ttfb_seconds": round(result.ttfb_seconds, 3),
+            "connection_reused": result.connection_reused,
+            "phase_seconds": phase_seconds(result.phases),
+            "headers": result.headers,
+            "body_bytes": len(result.body),
+            "media_path": media_path,
+        }
+        if result.streamed is not None:
+            meta["streamed_media"] = {
+                "source": result.streamed.source,
+                "size": result.streamed.size,
+                "error": result.streamed.error,
+            }
+        return meta
+
+    def _write(self, prefix: Path, meta: dict[str, Any], body: bytes, media_path: str | None) -> None:
+        started = time.perf_counter()
+        try:
+            self._dump(prefix.with_suffix(".meta.json"), (json.dumps(meta, indent=2, ensure_ascii=False) + "\n").encode("utf-8"))
+            if not body:
+                return
+            payload = maybe_json(body)
+            if payload is not None:
+                redacted = redact_media_strings(payload, media_path)
+                self._dump(prefix.with_suffix(".response.json"), (json.dumps(redacted, indent=2, ensure_ascii=False) + "\n").encode("utf-8"))
+            elif media_path is None:
+                # A binary body that became the media file is already on disk.
+                self._dump(prefix.with_suffix(".response.bin"), body)
+        except Exception as error:
+            with self._lock:
+                self.errors.append(f"{prefix.name}: {error}")
+        finally:
+            if body:
+                self._body_slots.release()
+            with self._lock:
+                self.write_seconds += time.perf_counter() - started
+
+    def flush(self) -> None:
+        with self._lock:
+            pending, self._pending = self._pending, []
+        wait(pending)
+
+    def stats(self) -> dict[str, Any]:
+        self.flush()
+        with self._lock:
+            return {
+                "level": self.level,
+                "artifacts_written": self.artifacts,
+                "bytes_written": self.bytes_written,
+                "background_write_seconds": round(self.write_seconds, 4),
+                "bodies_dropped": self.bodies_dropped,
+                "errors": list(self.errors),
+            }
+
+
+_DEBUG_WRITERS: dict[str, DebugArtifactWriter] = {}
+_DEBUG_WRITERS_LOCK = threading.Lock()
+
+
+def debug_writer_for(args: argparse.Namespace) -> DebugArtifactWriter:
+    with _DEBUG_WRITERS_LOCK:
+        writer = _DEBUG_WRITERS.get(args.debug_capture)
+        if writer is None:
+            writer = _DEBUG_WRITERS[args.debug_capture] = DebugArtifactWriter(args.debug_capture)
+        return writer
+
+
+def debug_capture_summary(args: argparse.Namespace) -> dict[str, Any]:
+    return debug_writer_for(args).stats()
+
+
+def write_http_debug(args: argparse.Namespace, prefix: Path, result: HTTPResult, media_path: str | None = None) -> None:
+    debug_writer_for(args).submit(prefix, result, media_path)
+
+
+def fetch_url_bytes(
+    url: str,
+    headers: dict[str, str],
+    timeout: float = 120.0,
+    pool: ConnectionPool | None = DEFAULT_CONNECTION_POOL,
+    sink: MediaStreamSink | ChatStreamSink | None = None,
+    scheduler: RequestScheduler | None = None,
+) -> HTTPResult:
+    headers = _fetch_headers(headers)
+    if scheduler is None:
+        return send_request("GET", url, headers, None, timeout, pool, sink)
+    return scheduler.execute(url, lambda: send_request("GET", url, headers, None, timeout, pool, sink))
+
+
+def _fetch_headers(headers: dict[str, str]) -> dict[str, str]:
+    if "User-Agent" not in headers:
+        headers = {
+            **headers,
+            "User-Agent": BROWSER_USER_AGENT,
+            "Accept": "*/*",
+        }
+    return headers
+
+
+async def async_fetch_url_bytes(
+    url: str,
+    headers: dict[str, str],
+    timeout: float = 120.0,
+    pool: AsyncConnectionPool | None = None,
+    sink: MediaStreamSink | ChatStreamSink | None = None,
+    scheduler: RequestScheduler | None = None,
+) -> HTTPResult:
+    headers = _fetch_headers(headers)
+    if scheduler is None:
+        return await async_send_request("GET", url, headers, None, timeout, pool, sink)
+    return await scheduler.async_execute(url, lambda: async_send_request("GET", url, headers, None, timeout, pool, sink))
+
+
+class TraceRecorder:
+    """Collects timed spans for a Chrome trace (chrome://tracing, Perfetto) and a JSON-lines log.
+
+    Every case label gets its own lane, so a batch shows each asset's
+    dns/connect/tls/upload/server_wait/download spans next to our own
+    json_parse/base64_decode/file_write spans.
+    """
+
+    def __init__(self) -> None:
+        self.origin = time.perf_counter()
+        self.events: list[dict[str, Any]] = []
+        self._lanes: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def span(self, label: str, name: str, category: str, start: float, end: float, **details: Any) -> None:
+        with self._lock:
+            lane = self._lanes.get(label)
+            if lane is None:
+                lane = self._lanes[label] = len(self._lanes) + 1
+                self.events.append({"name": "thread_name", "ph": "M", "pid": 1, "tid": lane, "args": {"name": label}})
+            self.events.append(
+                {
+                    "name": name,
+                    "cat": category,
+                    "ph": "X",
+                    "pid": 1,
+                    "tid": lane,
+                    "ts": round((start - self.origin) * 1e6, 1),
+                    "dur": round((end - start) * 1e6, 1),
+                    "args": {"case": label, **details},
+                }
+            )
+
+    def record_http(self, label: str, call: HTTPCall, result: HTTPResult) -> None:
+        for name, start, end in result.phases:
+            details: dict[str, Any] = {"method": call.method, "url": call.url, "status": result.status}
+            if name == "upload":
+                details["request_bytes"] = result.request_bytes
+            elif name == "download":
+                details["response_bytes"] = result.response_bytes
+                if result.streamed is not None:
+                    details["streamed_decode_seconds"] = round(result.streamed.decode_seconds, 4)
+                    details["streamed_write_seconds"] = round(result.streamed.write_seconds, 4)
+            self.span(label, name, "http", start, end, **details)
+
+    def export(self, root: Path) -> dict[str, Any]:
+        with self._lock:
+            events = list(self.events)
+        chrome_path, jsonl_path = root / "trace.json", root / "trace.jsonl"
+        json_dump(chrome_path, {"traceEvents": events, "displayTimeUnit": "ms"})
+        with jsonl_path.open("w", encoding="utf-8") as handle:
+            for event in events:
+                handle.write(json.dumps(event, ensure_ascii=False) + "\n")
+        return {"chrome_trace": str(chrome_path), "jsonl": str(jsonl_path), "events": len(events)}
+
+
+_TRACE_RECORDER: TraceRecorder | None = None
+_TRACE_RECORDER_LOCK = threading.Lock()
+
+
+def trace_recorder_for(args: argparse.Namespace) -> TraceRecorder | None:
+    global _TRACE_RECORDER
+    if not args.trace:
+        return None
+    with _TRACE_RECORDER_LOCK:
+        if _TRACE_RECORDER is None:
+            _TRACE_RECORDER = TraceRecorder()
+        return _TRACE_RECORDER
+
+
+def http_timing(result: HTTPResult) -> dict[str, Any]:
+    """Per-phase seconds and byte counts for a case summary."""
+    timing: dict[str, Any] = {
+        **phase_seconds(result.phases),
+        "request_bytes": result.request_bytes,
+        "response_bytes": result.response_bytes,
+    }
+    if result.streamed is not None:
+        timing["base64_decode"] = round(result.streamed.decode_seconds, 4)
+        timing["file_write"] = round(result.streamed.write_seconds, 4)
+    return timing
+
+
+@contextlib.contextmanager
+def timed_step(args: argparse.Namespace, summary: dict[str, Any], label: str, name: str) -> Any:
+    """Add the block's duration to ``summary["timing"][name]`` and the trace."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        finished = time.perf_counter()
+        timing = summary.setdefault("timing", {})
+        timing[name] = round(timing.get(name, 0.0) + finished - started, 4)
+        recorder = trace_recorder_for(args)
+        if recorder is not None:
+            recorder.span(label, name, "local", started, finished)
+
+
+@dataclass
+class HTTPCall:
+    """One request a case step generator asks its driver to perform."""
+
+    method: str
+    url: str
+    headers: dict[str, str]
+    payload: dict[str, Any] | None = None
+    sink: MediaStreamSink | ChatStreamSink | None = None
+    # GET a URL returned by the provider (fetch_url_bytes headers) instead of an API call.
+    fetch: bool = False
+    # Case this call belongs to; names its lane in the trace.
+    label: str = ""
+
+
+@dataclass
+class WorkerCall:
+    """CPU-bound work a case step generator hands to the post-processing process pool."""
+
+    fn: Callable[..., Any]
+    args: tuple[Any, ...]
+
+
+@dataclass
+class JoinCall:
+    """Wait for an identical case already in flight (see SingleFlight) instead of calling upstream."""
+
+    future: Future
+
+
+@dataclass
+class BlockingCall:
+    """Blocking file or parsing work; run inline by run_case_steps(), on a thread under asyncio."""
+
+    fn: Callable[..., Any]
+    args: tuple[Any, ...]
+
+
+# Case logic is written once as a generator that yields HTTPCalls (sent back
+# HTTPResults), WorkerCalls and BlockingCalls (sent back the function's return
+# value) or JoinCalls (sent back the leading case's summary), or has the
+# exception thrown in. The same steps then run on the blocking transport via
+# run_case_steps() and on asyncio via async_run_case_steps().
+CaseSteps = Generator[HTTPCall | WorkerCall | BlockingCall | JoinCall, Any, dict[str, Any]]
+
+_POSTPROCESS_POOLS: dict[int, ProcessPoolExecutor] = {}
+_POSTPROCESS_POOLS_LOCK = threading.Lock()
+
+
+def postprocess_pool_for(args: argparse.Namespace) -> ProcessPoolExecutor:
+    # Imported here so runs without post-processing do not pay for multiprocessing at startup.
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    with _POSTPROCESS_POOLS_LOCK:
+        pool = _POSTPROCESS_POOLS.get(args.postprocess_workers)
+        if pool is None:
+            # spawn, not fork: this process already runs transport, debug-writer and mock threads.
+            pool = _POSTPROCESS_POOLS[args.postprocess_workers] = ProcessPoolExecutor(
+                max_workers=args.postprocess_workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return pool
+
+
+def perform_http_call(args: argparse.Namespace, call: HTTPCall) -> HTTPResult:
+    pool, scheduler = connection_pool_for(args), request_scheduler_for(args)
+    if call.fetch:
+        result = fetch_url_bytes(call.url, call.headers, pool=pool, sink=call.sink, scheduler=scheduler)
+    else:
+        result = http_request(call.method, call.url, call.headers, call.payload, pool=pool, sink=call.sink, scheduler=scheduler)
+    record_http_call(args, call, result)
+    return result
+
+
+async def async_perform_http_call(args: argparse.Namespace, call: HTTPCall) -> HTTPResult:
+    pool, scheduler = async_connection_pool_for(args), request_scheduler_for(args)
+    if call.fetch:
+        result = await async_fetch_url_bytes(call.url, call.headers, pool=pool, sink=call.sink, scheduler=scheduler)
+    else:
+        result = await async_http_request(
+            call.method, call.url, call.headers, call.payload, pool=pool, sink=call.sink, scheduler=scheduler
+        )
+    record_http_call(args, call, result)
+    return result
+
+
+def record_http_call(args: argparse.Namespace, call: HTTPCall, result: HTTPResult) -> None:
+    recorder = trace_recorder_for(args)
+    if recorder is not None:
+        recorder.record_http(call.label or call.url, call, result)
+
+
+def run_case_steps(args: argparse.Namespace, steps: CaseSteps) -> dict[str, Any]:
+    try:
+        call = next(steps)
+        while True:
+            try:
+                if isinstance(call, WorkerCall):
+                    result = postprocess_pool_for(args).submit(call.fn, *call.args).result()
+                elif isinstance(call, BlockingCall):
+                    result = call.fn(*call.args)
+                elif isinstance(call, JoinCall):
+                    result = call.future.result()
+                else:
+                    result = perform_http_call(args, call)
+            except Exception as error:
+                call = steps.throw(error)
+            else:
+                call = steps.send(result)
+    except StopIteration as stop:
+        return stop.value
+
+
+async def async_run_case_steps(args: argparse.Namespace, steps: CaseSteps) -> dict[str, Any]:
+    try:
+        call = next(steps)
+        while True:
+            try:
+                if isinstance(call, WorkerCall):
+                    result = await asyncio.wrap_future(postprocess_pool_for(args).submit(call.fn, *call.args))
+                elif isinstance(call, BlockingCall):
+                    result = await asyncio.to_thread(call.fn, *call.args)
+                elif isinstance(call, JoinCall):
+                    # Shielded: a cancelled follower must not cancel the Future other followers share.
+                    result = await asyncio.shield(asyncio.wrap_future(call.future))
+                else:
+                    result = await async_perform_http_call(args, call)
+            except Exception as error:
+                call = steps.throw(error)
+            else:
+                call = steps.send(result)
+    except StopIteration as stop:
+        return stop.value
+
+
+@dataclass
+class CaseRequest:
+    """One generation call: where it goes, what it sends and what identifies its output."""
+
+    endpoint: str
+    headers: dict[str, str]
+    payload: dict[str, Any]
+    model_label: str
+    # Inputs that fully determine the generated media; hashed into the cache key.
+    cache_fields: dict[str, Any]
+
+
+class MediaCache:
+    """Content-addressed store of generated media, shared across spike runs.
+
+    Entries live at ``<root>/<key[:2]>/<key><ext>`` with a ``<key>.json``
+    sidecar. A hit refreshes the media file's mtime, which is the LRU order
+    used when the store grows past ``max_bytes``; entries older than ``ttl_seconds``
+    (by creation time) are treated as misses and removed.
+
+    The directory is scanned once per process into an LRU index with a running
+    total, so a store only evicts (oldest first) when the total goes over the
+    limit. Entries written by another process meanwhile are not counted until
+    the next process scans the directory.
+    """
+
+    def __init__(self, root: Path, max_bytes: int, ttl_seconds: float | None) -> None:
+        self.root = root
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.expired = 0
+        self.evicted = 0
+        self.root.mkdir(parents=True, exist_ok=True)
+        # meta path -> media size, least recently used first; built by _load_index().
+        self._index: collections.OrderedDict[Path, int] | None = None
+        self._total = 0
+
+    @staticmethod
+    def key(fields: dict[str, Any]) -> str:
+        canonical = json.dumps(fields, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def _meta_path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.json"
+
+    def _load_index(self) -> collections.OrderedDict[Path, int]:
+        if self._index is None:
+            entries = []
+            for meta_path in self.root.glob("*/*.json"):
+                try:
+                    meta = json.loads(meta_path.read_text(encoding="utf-8"))
+                    stat = (meta_path.parent / meta["file"]).stat()
+                except (OSError, ValueError, KeyError):
+                    continue
+                entries.append((stat.st_mtime, meta_path, stat.st_size))
+            self._index = collections.OrderedDict((meta_path, size) for _, meta_path, size in sorted(entries))
+            self._total = sum(self._index.values())
+        return self._index
+
+    def _remove(self, meta_path: Path) -> None:
+        try:
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+            (meta_path.parent / meta["file"]).unlink(missing_ok=True)
+        except (OSError, ValueError, KeyError):
+            pass
+        meta_path.unlink(missing_ok=True)
+        self._total -= self._load_index().pop(meta_path, 0)
+
+    def get(self, key: str) -> tuple[Path, dict[str, Any]] | None:
+        meta_path = self._meta_path(key)
+        with self._lock:
+            try:
+                meta = json.loads(meta_path.read_text(encoding="utf-8"))
+                media_path = meta_path.parent / meta["file"]
+                if not media_path.is_file():
+                    raise FileNotFoundError(media_path)
+            except (OSError, ValueError, KeyError):
+                self.misses += 1
+                return None
+            if self.ttl_seconds is not None and time.time() - meta.get("created_at", 0.0) > self.ttl_seconds:
+                self._remove(meta_path)
+                self.expired += 1
+                self.misses += 1
+                return None
+            os.utime(media_path)
+            index = self._load_index()
+            if meta_path in index:
+                index.move_to_end(meta_path)
+            self.hits += 1
+            return media_path, meta
+
+    def put(self, key: str, source: Path, fields: dict[str, Any], content_type: str | None) -> None:
+        meta_path = self._meta_path(key)
+        meta_path.parent.mkdir(parents=True, exist_ok=True)
+        media_path = meta_path.with_name(f"{key}{source.suffix}")
+        staging = media_path.with_name(f"{media_path.name}.part-{uuid.uuid4().hex[:8]}")
+        shutil.copyfile(source, staging)
+        meta: dict[str, Any] = {
+            "file": media_path.name,
+            "content_type": content_type,
+            "size": staging.stat().st_size,
+            "created_at": time.time(),
+            "fields": fields,
+        }
+        with self._lock:
+            index = self._load_index()
+            os.replace(staging, media_path)
+            json_dump(meta_path, meta)
+            self._total += meta["size"] - index.pop(meta_path, 0)
+            index[meta_path] = meta["size"]
+            self.stores += 1
+            self._evict()
+
+    def _evict(self) -> None:
+        index = self._load_index()
+        while self._total > self.max_bytes and index:
+            self._remove(next(iter(index)))
+            self.evicted += 1
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "root": str(self.root),
+            "hits": self.hits,
+            "misses": self.misses,
+            "stores": self.stores,
+            "expired": self.expired,
+            "evicted": self.evicted,
+        }
+
+
+_MEDIA_CACHES: dict[Path, MediaCache] = {}
+_MEDIA_CACHES_LOCK = threading.Lock()
+
+
+def media_cache_for(args: argparse.Namespace) -> MediaCache | None:
+    if args.cache_mode == "off":
+        return None
+    root = Path(args.cache_dir)
+    with _MEDIA_CACHES_LOCK:
+        if root not in _MEDIA_CACHES:
+            ttl = args.cache_ttl_hours * 3600.0 if args.cache_ttl_hours > 0 else None
+            _MEDIA_CACHES[root] = MediaCache(root, int(args.cache_max_mb * 1024 * 1024), ttl)
+        return _MEDIA_CACHES[root]
+
+
+def media_cache_summary(args: argparse.Namespace) -> dict[str, Any]:
+    cache = media_cache_for(args)
+    if cache is None:
+        return {"mode": "off"}
+    return {"mode": args.cache_mode, **cache.stats()}
+
+
+class SingleFlight:
+    """Coalesces concurrent generations of the same normalized request onto one upstream call.
+
+    The first case for a key leads and runs its steps; cases that arrive while it
+    is in flight wait on its Future and link its media instead of calling upstream.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._flights: dict[str, tuple[Future, str]] = {}
+        self.leaders = 0
+        self.coalesced = 0
+        self.failed = 0
+
+    @staticmethod
+    def key(fields: dict[str, Any]) -> str:
+        # Whitespace differences in prompts do not change what the provider generates.
+        normalized = {name: " ".join(value.split()) if isinstance(value, str) else value for name, value in fields.items()}
+        return MediaCache.key(normalized)
+
+    def join(self, key: str, label: str) -> tuple[Future, str | None]:
+        """Return the in-flight Future and its leader's label, or a new Future and None to lead."""
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                self.coalesced += 1
+                return flight
+            future: Future = Future()
+            self._flights[key] = (future, label)
+            self.leaders += 1
+            return future, None
+
+    def finish(self, key: str, future: Future, summary: dict[str, Any] | None, error: BaseException | None) -> None:
+        with self._lock:
+            self._flights.pop(key, None)
+            if error is not None:
+                self.failed += 1
+        # Resolved after leaving the table so a late arrival leads a fresh call rather than joining a finished one.
+        if future.done():
+            # Cancelled by a waiter: there is no one left to hand the result to.
+            return
+        try:
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(summary)
+        except InvalidStateError:
+            pass
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "leaders": self.leaders,
+                "coalesced": self.coalesced,
+                "failed_leaders": self.failed,
+                "in_flight": len(self._flights),
+            }
+
+
+_SINGLE_FLIGHT: SingleFlight | None = None
+_SINGLE_FLIGHT_LOCK = threading.Lock()
+
+
+def single_flight_for(args: argparse.Namespace) -> SingleFlight | None:
+    global _SINGLE_FLIGHT
+    if not args.coalesce:
+        return None
+    with _SINGLE_FLIGHT_LOCK:
+        if _SINGLE_FLIGHT is None:
+            _SINGLE_FLIGHT = SingleFlight()
+        return _SINGLE_FLIGHT
+
+
+def coalescing_summary(args: argparse.Namespace) -> dict[str, Any]:
+    flights = single_flight_for(args)
+    if flights is None:
+        return {"enabled": False}
+    return {"enabled": True, **flights.stats()}
+
+
+def coalesced_case_steps(
+    args: argparse.Namespace,
+    out_dir: Path,
+    name: str,
+    request: CaseRequest,
+    generate: CaseSteps,
+) -> CaseSteps:
+    """Run ``generate``, or share the result of an identical case that is already in flight."""
+    flights = single_flight_for(args)
+    if flights is None:
+        return (yield from generate)
+    key = flights.key(request.cache_fields)
+    future, leader = flights.join(key, str(out_dir / name))
+    if leader is None:
+        try:
+            summary = yield from generate
+        except Exception as error:
+            flights.finish(key, future, None, error)
+            raise
+        except BaseException:
+            # Closed or cancelled mid-flight: followers must not wait forever.
+            flights.finish(key, future, None, RuntimeError(f"coalesced call for {out_dir / name} was abandoned"))
+            raise
+        flights.finish(key, future, summary, None)
+        return summary
+
+    generate.close()
+    started = time.perf_counter()
+    shared = yield JoinCall(future)
+    summary = {
+        "endpoint": shared.get("endpoint", request.endpoint),
+        "model": shared.get("model", request.model_label),
+        "elapsed_seconds": round(time.perf_counter() - started, 3),
+        "status": shared.get("status"),
+        "content_type": shared.get("content_type"),
+        "success": bool(shared.get("success")),
+        "media_path": None,
+        "notes": [f"Coalesced with in-flight call for {leader}", *shared.get("notes", [])],
+        "coalesced_with": leader,
+    }
+    if summary["success"] and shared.get("media_path"):
+        source = Path(shared["media_path"])
+        media_path = out_dir / f"{name}_output{source.suffix}"
+        try:
+            if media_path != source:
+                yield BlockingCall(copy_media, (source, media_path, True))
+        except OSError as error:
+            summary["success"] = False
+            summary["notes"].append(f"Could not copy coalesced media: {error}")
+        else:
+            summary["media_path"] = str(media_path)
+    return summary
+
+
+def cached_case_steps(
+    args: argparse.Namespace,
+    out_dir: Path,
+    name: str,
+    request: CaseRequest,
+    generate: CaseSteps,
+) -> CaseSteps:
+    """Serve a case from the media cache, or run ``generate`` and store the result.
+
+    ``read-write`` looks up before generating; ``refresh`` always generates and
+    overwrites the entry.
+    """
+    generate = coalesced_case_steps(args, out_dir, name, request, generate)
+    cache = media_cache_for(args)
+    if cache is None:
+        return (yield from generate)
+    key = cache.key(request.cache_fields)
+    if args.cache_mode == "read-write":
+        started = time.perf_counter()
+        cached = yield BlockingCall(cache.get, (key,))
+        if cached is not None:
+            cached_path, meta = cached
+            media_path = out_dir / f"{name}_output{cached_path.suffix}"
+            yield BlockingCall(copy_media, (cached_path, media_path))
+            return {
+                "endpoint": request.endpoint,
+                "model": request.model_label,
+                "elapsed_seconds": round(time.perf_counter() - started, 3),
+                # No request was made, so there is no HTTP status to report.
+                "status": None,
+                "content_type": meta.get("content_type"),
+                "success": True,
+                "media_path": str(media_path),
+                "notes": [f"Served from media cache entry {key[:12]}"],
+                "cache": "hit",
+            }
+    summary = yield from generate
+    summary["cache"] = "miss" if args.cache_mode == "read-write" else "refresh"
+    if summary.get("success") and summary.get("media_path") and not summary.get("coalesced_with"):
+        yield BlockingCall(cache.put, (key, Path(summary["media_path"]), request.cache_fields, summary.get("content_type")))
+    return summary
+
+
+_PROVIDER_ROUTES: dict[tuple[str, ...], dict[str, str]] = {}
+_PROVIDER_ROUTES_LOCK = threading.Lock()
+
+
+def provider_routes_for(args: argparse.Namespace) -> dict[str, str]:
+    """Endpoint URL per provider/protocol, resolved once per base-URL/model settings.
+
+    Keys match the benchmark targets (``image:openai``, ``audio:elevenlabs``...)
+    plus ``audio:elevenlabs:stream`` and ``chat``.
+    """
+    settings = (
+        args.base_url,
+        args.image_endpoint,
+        args.vertex_image_provider,
+        args.vertex_image_model,
+        args.audio_endpoint,
+        args.elevenlabs_base_url,
+        args.elevenlabs_voice_id,
+        args.chat_endpoint,
+    )
+    with _PROVIDER_ROUTES_LOCK:
+        routes = _PROVIDER_ROUTES.get(settings)
+        if routes is None:
+            base = args.base_url.rstrip("/") + "/"
+            elevenlabs = urllib.parse.urljoin(
+                args.elevenlabs_base_url.rstrip("/") + "/", f"v1/text-to-speech/{args.elevenlabs_voice_id}"
+            )
+            routes = _PROVIDER_ROUTES[settings] = {
+                "image:openai": urllib.parse.urljoin(base, args.image_endpoint.lstrip("/")),
+                "image:vertex": urllib.parse.urljoin(
+                    base, f"publishers/{args.vertex_image_provider}/models/{args.vertex_image_model}:generateContent"
+                ),
+                "audio:zenmux": urllib.parse.urljoin(base, args.audio_endpoint.lstrip("/")),
+                "audio:elevenlabs": elevenlabs,
+                "audio:elevenlabs:stream": elevenlabs + "/stream",
+                "chat": f"{args.base_url.rstrip('/')}{args.chat_endpoint}",
+            }
+        return routes
+
+
+# Stands in for the bundled mock's host:port in cache and journal keys.
+MOCK_PROVIDER_NETLOC = "mock-provider"
+
+
+def cache_endpoint(args: argparse.Namespace, endpoint: str) -> str:
+    """``endpoint`` as it enters cache and journal keys.
+
+    The bundled mock listens on a fresh port every run, so under --mock-provider
+    its host:port is replaced by a fixed name; otherwise no cached or resumed
+    mock request would ever match. Real providers keep their full URL.
+    """
+    if not args.mock_provider:
+        return endpoint
+    return urllib.parse.urlsplit(endpoint)._replace(netloc=MOCK_PROVIDER_NETLOC).geturl()
+
+
+def build_image_request(args: argparse.Namespace, auth_headers: dict[str, str], prompt: str) -> CaseRequest:
+    if args.image_protocol == "vertex":
+        endpoint = provider_routes_for(args)["image:vertex"]
+        payload = {
+            "contents": [
+                {
+                    "role": "user",
+                    "parts": [{"text": prompt}],
+                }
+            ],
+            "generationConfig": {
+                "responseModalities": ["TEXT", "IMAGE"]
+            },
+        }
+        model_label = f"{args.vertex_image_provider}/{args.vertex_image_model}"
+    else:
+        endpoint = provider_routes_for(args)["image:openai"]
+        payload = {
+            "model": args.image_model,
+            "prompt": prompt,
+            "size": args.image_size,
+        }
+        model_label = args.image_model
+    return CaseRequest(
+        endpoint=endpoint,
+        headers=auth_headers,
+        payload=payload,
+        model_label=model_label,
+        cache_fields={
+            "endpoint": cache_endpoint(args, endpoint),
+            "model": model_label,
+            "prompt": prompt,
+            "voice": None,
+            "size": payload.get("size"),
+        },
+    )
+
+
+def image_case_steps(
+    args: argparse.Namespace,
+    out_dir: Path,
+    auth_headers: dict[str, str],
+    prompt: str = DEFAULT_IMAGE_PROMPT,
+    name: str = "image",
+) -> CaseSteps:
+    request = build_image_request(args, auth_headers, prompt)
+    summary = yield from cached_case_steps(args, out_dir, name, request, generate_image_steps(args, out_dir, request, name))
+    if args.image_postprocess and summary.get("success") and summary.get("media_path"):
+        summary["postprocess"] = yield from image_postprocess_steps(args, summary, str(out_dir / name))
+    return summary
+
+
+def run_image_case(
+    args: argparse.Namespace,
+    out_dir: Path,
+    auth_headers: dict[str, str],
+    prompt: str = DEFAULT_IMAGE_PROMPT,
+    name: str = "image",
+) -> dict[str, Any]:
+    return run_case_steps(args, image_case_steps(args, out_dir, auth_headers, prompt, name))
+
+
+async def async_run_image_case(
+    args: argparse.Namespace,
+    out_dir: Path,
+    auth_headers: dict[str, str],
+    prompt: str = DEFAULT_IMAGE_PROMPT,
+    name: str = "image",
+) -> dict[str, Any]:
+    return await async_run_case_steps(args, image_case_steps(args, out_dir, auth_headers, prompt, name))
+
+
+def generate_image_steps(args: argparse.Namespace, out_dir: Path, request: CaseRequest, name: str) -> CaseSteps:
+    endpoint, model_label = request.endpoint, request.model_label
+    label = str(out_dir / name)
+    result = yield HTTPCall(
+        "POST", endpoint, request.headers, request.payload, sink=media_sink_for(args, out_dir, name, "image"), label=label
+    )
+    debug_prefix = out_dir / f"{name}_case"
+
+    summary: dict[str, Any] = {
+        "endpoint": endpoint,
+        "model": model_label,
+        "elapsed_seconds": round(result.elapsed_seconds, 3),
+        "connect_seconds": round(result.connect_seconds, 3),
+        "ttfb_seconds": round(result.ttfb_seconds, 3),
+        "status": result.status,
+        "content_type": result.content_type,
+        "success": False,
+        "media_path": None,
+        "attempts": result.attempts,
+        "timing": http_timing(result),
+        "notes": [],
+    }
+
+    try:
+        if result.status < 200 or result.status >= 300:
+            summary["notes"].append(f"HTTP error; see {name}_case.response.*")
+            return summary
+
+        # Some providers may return binary image directly.
+        if result.content_type and result.content_type.lower().startswith("image/"):
+            ext = guess_ext_from_content_type(result.content_type, ".png")
+            media_path = out_dir / f"{name}_output{ext}"
+            if result.streamed is not None:
+                adopt_streamed_media(result.streamed, media_path)
+            else:
+                with timed_step(args, summary, label, "file_write"):
+                    yield BlockingCall(save_bytes, (media_path, result.body))
+            summary["success"] = True
+            summary["media_path"] = str(media_path)
+            summary["notes"].append("Binary image response")
+            return summary
+
+        with timed_step(args, summary, label, "json_parse"):
+            payload_json = yield BlockingCall(maybe_json, (result.body,))
+        if payload_json is None:
+            if result.streamed is not None:
+                result.streamed.path.unlink(missing_ok=True)
+            summary["notes"].append("Non-JSON non-image response")
+            return summary
+
+        if result.streamed is not None:
+            if result.streamed.error is not None:
+                summary["notes"].append(result.streamed.error)
+                return summary
+            media_path = adopt_streamed_media(result.streamed, out_dir / f"{name}_output.png")
+            summary["success"] = True
+            summary["media_path"] = str(media_path)
+            summary["notes"].append(f"Streamed image bytes from {result.streamed.source}")
+            return summary
+
+        with timed_step(args, summary, label, "base64_decode"):
+            image_bytes, note = yield BlockingCall(extract_media_bytes, (payload_json, media_shape_for(args, "image")))
+        summary["notes"].append(note)
+        if image_bytes:
+            media_path = out_dir / f"{name}_output.png"
+            with timed_step(args, summary, label, "file_write"):
+                yield BlockingCall(save_bytes, (media_path, image_bytes))
+            summary["success"] = True
+            summary["media_path"] = str(media_path)
+            return summary
+
+        data = payload_json.get("data") if isinstance(payload_json, dict) else None
+        if isinstance(data, list) and data and isinstance(data[0], dict) and isinstance(data[0].get("url"), str):
+            image_url = data[0]["url"]
+            try:
+                fetched = yield HTTPCall(
+                    "GET", image_url, {}, sink=media_sink_for(args, out_dir, name, "image"), fetch=True, label=label
+                )
+                summary["url_fetch_timing"] = http_timing(fetched)
+                if fetched.status >= 200 and fetched.status < 300 and fetched.content_type and fetched.content_type.lower().startswith("image/"):
+                    ext = guess_ext_from_content_type(fetched.content_type, ".png")
+                    media_path = out_dir / f"{name}_output{ext}"
+                    if fetched.streamed is not None:
+                        adopt_streamed_media(fetched.streamed, media_path)
+                    else:
+                        with timed_step(args, summary, label, "file_write"):
+                            yield BlockingCall(save_bytes, (media_path, fetched.body))
+                    summary["success"] = True
+                    summary["media_path"] = str(media_path)
+                    summary["notes"].append("Fetched image from returned URL")
+                write_http_debug(args, out_dir / f"{name}_url_fetch", fetched, summary["media_path"])
+            except Exception as error:
+                summary["notes"].append(f"Failed to fetch returned URL: {error}")
+        return summary
+    finally:
+        write_http_debug(args, debug_prefix, result, summary["media_path"])
+
+
+# Image post-processing. postprocess_image() runs in the process pool, so it and
+# its helpers stay at module level and only exchange paths and plain dicts.
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+BLURHASH_CHARACTERS = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz#$%*+,-.:;=?@[]^_{|}~"
+# Longest side of the thumbnail the blurhash is computed from.
+BLURHASH_SAMPLE_SIZE = 32
+
+
+def _paeth(left: int, up: int, up_left: int) -> int:
+    estimate = left + up - up_left
+    distance_left, distance_up, distance_up_left = abs(estimate - left), abs(estimate - up), abs(estimate - up_left)
+    if distance_left <= distance_up and distance_left <= distance_up_left:
+        return left
+    return up if distance_up <= distance_up_left else up_left
+
+
+def decode_png_rgb(data: bytes) -> tuple[int, int, bytes]:
+    """Decode an 8-bit, non-interlaced grey/RGB(A) PNG to packed RGB (alpha dropped)."""
+    if not data.startswith(PNG_SIGNATURE):
+        raise ValueError("not a PNG")
+    offset, chunks, header = len(PNG_SIGNATURE), [], None
+    while offset + 8 <= len(data):
+        length, kind = struct.unpack(">I4s", data[offset : offset + 8])
+        body = data[offset + 8 : offset + 8 + length]
+        offset += 12 + length
+        if kind == b"IHDR":
+            header = struct.unpack(">IIBBBBB", body)
+        elif kind == b"IDAT":
+            chunks.append(body)
+        elif kind == b"IEND":
+            break
+    if header is None:
+        raise ValueError("PNG has no IHDR chunk")
+    width, height, depth, color_type, _, _, interlace = header
+    channels = {0: 1, 2: 3, 4: 2, 6: 4}.get(color_type)
+    if depth != 8 or interlace or channels is None:
+        raise ValueError(f"unsupported PNG (bit depth {depth}, color type {color_type}, interlace {interlace})")
+    raw = zlib.decompress(b"".join(chunks))
+    stride = width * channels
+    pixels = bytearray(height * stride)
+    previous = bytearray(stride)
+    for y in range(height):
+        start = y * (stride + 1)
+        kind, line = raw[start], bytearray(raw[start + 1 : start + 1 + stride])
+        if kind == 1:
+            for index in range(channels, stride):
+                line[index] = (line[index] + line[index - channels]) & 0xFF
+        elif kind == 2:
+            line = bytearray((value + above) & 0xFF for value, above in zip(line, previous))
+        elif kind == 3:
+            for index in range(stride):
+                left = line[index - channels] if index >= channels else 0
+                line[index] = (line[index] + ((left + previous[index]) >> 1)) & 0xFF
+        elif kind == 4:
+            for index in range(stride):
+                if index >= channels:
+                    line[index] = (line[index] + _paeth(line[index - channels], previous[index], previous[index - channels])) & 0xFF
+                else:
+                    line[index] = (line[index] + previous[index]) & 0xFF
+        pixels[y * stride : (y + 1) * stride] = line
+        previous = line
+    if channels == 3:
+        return width, height, bytes(pixels)
+    rgb = bytearray(width * height * 3)
+    for component in range(3):
+        # Grey(+alpha) replicates channel 0; RGBA copies R, G and B.
+        rgb[component::3] = pixels[(component if channels == 4 else 0) :: channels]
+    return width, height, bytes(rgb)
+
+
+def encode_png_rgb(width: int, height: int, rgb: bytes) -> bytes:
+    stride = width * 3
+    raw = b"".join(b"\x00" + rgb[y * stride : (y + 1) * stride] for y in range(height))
+
+    def chunk(kind: bytes, body: bytes) -> bytes:
+        return struct.pack(">I", len(body)) + kind + body + struct.pack(">I", zlib.crc32(kind + body) & 0xFFFFFFFF)
+
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    return PNG_SIGNATURE + chunk(b"IHDR", header) + chunk(b"IDAT", zlib.compress(raw, 9)) + chunk(b"IEND", b"")
+
+
+def _halve_rgb(width: int, height: int, rgb: bytes) -> tuple[int, int, bytes]:
+    """2x2 box downscale."""
+    half_width, half_height, stride = width // 2, height // 2, width * 3
+    picks = [6 * x + component for x in range(half_width) for component in range(3)]
+    out = bytearray()
+    for y in range(half_height):
+        top, bottom = rgb[2 * y * stride : (2 * y + 1) * stride], rgb[(2 * y + 1) * stride : (2 * y + 2) * stride]
+        pair = [a + b for a, b in zip(top, bottom)]
+        out += bytes((pair[index] + pair[index + 3] + 2) >> 2 for index in picks)
+    return half_width, half_height, bytes(out)
+
+
+def scale_rgb(width: int, height: int, rgb: bytes, longest_side: int) -> tuple[int, int, bytes]:
+    """Downscale so the longest side is ``longest_side``: box-halve, then nearest-neighbour the rest."""
+    scale = longest_side / max(width, height)
+    target_width, target_height = max(1, round(width * scale)), max(1, round(height * scale))
+    while width >= 2 * target_width and height >= 2 * target_height:
+        width, height, rgb = _halve_rgb(width, height, rgb)
+    if (width, height) == (target_width, target_height):
+        return width, height, rgb
+    columns = [((2 * x + 1) * width // (2 * target_width)) * 3 for x in range(target_width)]
+    out = bytearray()
+    for y in range(target_height):
+        row = rgb[((2 * y + 1) * height // (2 * target_height)) * width * 3 :]
+        for column in columns:
+            out += row[column : column + 3]
+    return target_width, target_height, bytes(out)
+
+
+def _base83(value: int, length: int) -> str:
+    return "".join(BLURHASH_CHARACTERS[value // 83 ** (length - 1 - place) % 83] for place in range(length))
+
+
+def _srgb_to_linear(value: int) -> float:
+    channel = value / 255
+    return channel / 12.92 if channel <= 0.04045 else ((channel + 0.055) / 1.055) ** 2.4
+
+
+def _linear_to_srgb(value: float) -> int:
+    channel = max(0.0, min(1.0, value))
+    if channel <= 0.0031308:
+        return int(channel * 12.92 * 255 + 0.5)
+    return int((1.055 * channel ** (1 / 2.4) - 0.055) * 255 + 0.5)
+
+
+def blurhash_encode(width: int, height: int, rgb: bytes, x_components: int = 4, y_components: int = 3) -> str:
+    """Encode packed RGB as a BlurHash string (https://blurha.sh); pass a small thumbnail."""
+    linear = [_srgb_to_linear(value) for value in range(256)]
+    factors = []
+    for j in range(y_components):
+        row_basis = [math.cos(math.pi * j * y / height) for y in range(height)]
+        for i in range(x_components):
+            column_basis = [math.cos(math.pi * i * x / width) for x in range(width)]
+            red = green = blue = 0.0
+            for y in range(height):
+                for x in range(width):
+                    basis = column_basis[x] * row_basis[y]
+                    offset = (y * width + x) * 3
+                    red += basis * linear[rgb[offset]]
+                    green += basis * linear[rgb[offset + 1]]
+                    blue += basis * linear[rgb[offset + 2]]
+            scale = (1 if i == 0 and j == 0 else 2) / (width * height)
+            factors.append((red * scale, green * scale, blue * scale))
+    dc, ac = factors[0], factors[1:]
+    blurhash = _base83((x_components - 1) + (y_components - 1) * 9, 1)
+    maximum = 1.0
+    if ac:
+        quantised = max(0, min(82, math.floor(max(abs(value) for factor in ac for value in factor) * 166 - 0.5)))
+        maximum = (quantised + 1) / 166
+        blurhash += _base83(quantised, 1)
+    else:
+        blurhash += _base83(0, 1)
+    blurhash += _base83((_linear_to_srgb(dc[0]) << 16) + (_linear_to_srgb(dc[1]) << 8) + _linear_to_srgb(dc[2]), 4)
+
+    def quantise(value: float) -> int:
+        return max(0, min(18, math.floor(math.copysign(abs(value / maximum) ** 0.5, value) * 9 + 9.5)))
+
+    for red, green, blue in ac:
+        blurhash += _base83(quantise(red) * 19 * 19 + quantise(green) * 19 + quantise(blue), 2)
+    return blurhash
+
+
+def postprocess_image(media_path: str, sizes: tuple[int, ...], quality: int) -> dict[str, Any]:
+    """Write downscaled/compressed variants next to ``media_path`` and compute a blurhash.
+
+    Uses Pillow when it is installed (WebP variants, JPEG if this Pillow lacks
+    WebP). Without it, PNGs are decoded in pure Python and downscaled PNG
+    variants are written; other formats are reported and skipped.
+    """
+    started = time.perf_counter()
+    source = Path(media_path)
+    result: dict[str, Any] = {"source_bytes": source.stat().st_size, "variants": [], "notes": []}
+    try:
+        from PIL import Image, features  # type: ignore[import-not-found]
+    except ImportError:
+        Image = None
+    if Image is not None:
+        result["backend"] = "pillow"
+        with Image.open(source) as opened:
+            opened.load()
+            has_alpha = opened.mode in ("RGBA", "LA") or "transparency" in opened.info
+            image = opened.convert("RGBA" if has_alpha else "RGB")
+        result["decode_seconds"] = round(time.perf_counter() - started, 4)
+        width, height = image.size
+        image_format, ext = ("WEBP", ".webp") if features.check("webp") else ("JPEG", ".jpg")
+        if image_format == "JPEG":
+            result["notes"].append("Pillow built without WebP; wrote JPEG variants")
+        resample = getattr(Image, "Resampling", Image).LANCZOS
+        for size in (None, *sizes):
+            if size is not None and size >= max(width, height):
+                continue
+            variant_started = time.perf_counter()
+            variant = image.copy()
+            if size is not None:
+                variant.thumbnail((size, size), resample)
+            if image_format == "JPEG" and variant.mode == "RGBA":
+                variant = variant.convert("RGB")
+            out_path = source.with_name(f"{source.stem}{'' if size is None else f'_{size}'}{ext}")
+            variant.save(out_path, image_format, quality=quality)
+            result["variants"].append(
+                {
+                    "path": str(out_path),
+                    "format": image_format.lower(),
+                    "width": variant.width,
+                    "height": variant.height,
+                    "bytes": out_path.stat().st_size,
+                    "seconds": round(time.perf_counter() - variant_started, 4),
+                }
+            )
+        blurhash_started = time.perf_counter()
+        thumbnail = image.convert("RGB")
+        thumbnail.thumbnail((BLURHASH_SAMPLE_SIZE, BLURHASH_SAMPLE_SIZE), resample)
+        result["blurhash"] = blurhash_encode(thumbnail.width, thumbnail.height, thumbnail.tobytes())
+    else:
+        result["backend"] = "pure-python"
+        result["notes"].append("Pillow not installed; wrote PNG variants only (install Pillow for WebP)")
+        data = source.read_bytes()
+        if not data.startswith(PNG_SIGNATURE):
+            result["notes"].append("Not a PNG; skipped without Pillow")
+            result["worker_seconds"] = round(time.perf_counter() - started, 4)
+            return result
+        width, height, rgb = decode_png_rgb(data)
+        result["decode_seconds"] = round(time.perf_counter() - started, 4)
+        for size in sizes:
+            if size >= max(width, height):
+                continue
+            variant_started = time.perf_counter()
+            variant_width, variant_height, variant_rgb = scale_rgb(width, height, rgb, size)
+            out_path = source.with_name(f"{source.stem}_{size}.png")
+            save_bytes(out_path, encode_png_rgb(variant_width, variant_height, variant_rgb))
+            result["variants"].append(
+                {
+                    "path": str(out_path),
+                    "format": "png",
+                    "width": variant_width,
+                    "height": variant_height,
+                    "bytes": out_path.stat().st_size,
+                    "seconds": round(time.perf_counter() - variant_started, 4),
+                }
+            )
+        blurhash_started = time.perf_counter()
+        result["blurhash"] = blurhash_encode(*scale_rgb(width, height, rgb, BLURHASH_SAMPLE_SIZE))
+    result["width"], result["height"] = width, height
+    result["blurhash_seconds"] = round(time.perf_counter() - blurhash_started, 4)
+    result["worker_seconds"] = round(time.perf_counter() - started, 4)
+    return result
+
+
+def image_postprocess_steps(args: argparse.Namespace, summary: dict[str, Any], label: str) -> CaseSteps:
+    try:
+        with timed_step(args, summary, label, "image_postprocess"):
+            return (
+                yield WorkerCall(
+                    postprocess_image, (summary["media_path"], tuple(args.image_variant_sizes), args.image_variant_quality)
+                )
+            )
+    except Exception as error:
+        return {"notes": [f"Image post-processing failed: {type(error).__name__}: {error}"]}
+
+
+# Audio post-processing. Probing reads only container headers; normalization
+# runs in the process pool through normalize_audio().
+def _probe_wav(read_at: Callable[[int, int], bytes], size: int) -> dict[str, Any]:
+    offset, fmt = 12, None
+    while offset + 8 <= size:
+        kind, length = struct.unpack("<4sI", read_at(offset, 8))
+        if kind == b"fmt ":
+            fmt = struct.unpack("<HHIIHH", read_at(offset + 8, 16))
+        elif kind == b"data" and fmt is not None:
+            # Streamed WAVs may carry a placeholder data size; fall back to the bytes on disk.
+            data_bytes = length if 0 < length < 0xFFFFFFFF and offset + 8 + length <= size else size - offset - 8
+            _, channels, sample_rate, byte_rate, _, bits = fmt
+            return {
+                "container": "wav",
+                "method": "wav header",
+                "duration_seconds": round(data_bytes / byte_rate, 3) if byte_rate else None,
+                "bitrate": byte_rate * 8,
+                "sample_rate": sample_rate,
+                "channels": channels,
+                "bits_per_sample": bits,
+            }
+        offset += 8 + length + (length & 1)
+    return {"container": "wav", "method": "wav header", "duration_seconds": None, "bitrate": None, "notes": ["No fmt/data chunk"]}
+
+
+def _probe_mp4(read_at: Callable[[int, int], bytes], size: int) -> dict[str, Any]:
+    def find_box(start: int, end: int, wanted: bytes) -> tuple[int, int] | None:
+        offset = start
+        while offset + 8 <= end:
+            box_size, kind = struct.unpack(">I4s", read_at(offset, 8))
+            header = 8
+            if box_size == 1:
+                box_size, header = struct.unpack(">Q", read_at(offset + 8, 8))[0], 16
+            elif box_size == 0:
+                box_size = end - offset
+            if box_size < header:
+                break
+            if kind == wanted:
+                return offset + header, offset + box_size
+            offset += box_size
+        return None
+
+    moov = find_box(0, size, b"moov")
+    mvhd = find_box(*moov, b"mvhd") if moov else None
+    if mvhd is None:
+        return {"container": "mp4", "method": "mvhd", "duration_seconds": None, "bitrate": None, "notes": ["No moov/mvhd box"]}
+    body = read_at(mvhd[0], min(32, mvhd[1] - mvhd[0]))
+    if len(body) < (32 if body[:1] == b"\x01" else 20):
+        return {"container": "mp4", "method": "mvhd", "duration_seconds": None, "bitrate": None, "notes": ["Truncated mvhd box"]}
+    if body[0] == 1:
+        timescale, duration = struct.unpack(">IQ", body[20:32])
+    else:
+        timescale, duration = struct.unpack(">II", body[12:20])
+    seconds = duration / timescale if timescale else None
+    return {
+        "container": "mp4",
+        "method": "mvhd",
+        "duration_seconds": round(seconds, 3) if seconds else None,
+        "bitrate": int(size * 8 / seconds) if seconds else None,
+    }
+
+
+def _probe_mp3(read_at: Callable[[int, int], bytes], size: int, head: bytes) -> dict[str, Any]:
+    tag = id3v2_size(head)
+    window = read_at(tag, 4096)
+    frame, index = None, 0
+    for index in range(max(0, len(window) - 3)):
+        frame = parse_mp3_frame_header(window[index : index + 4])
+        following = index + frame["frame_length"] if frame else 0
+        if frame and (following + 4 > len(window) or parse_mp3_frame_header(window[following : following + 4])):
+            break
+        frame = None
+    if frame is None:
+        return {"container": "unknown", "method": None, "duration_seconds": None, "bitrate": None, "notes": ["No MPEG audio frame after the ID3 tag"]}
+    start = tag + index
+    # The Xing/Info tag sits after the side information of the first frame.
+    side_info = (32 if frame["channels"] == 2 else 17) if frame["version"] == 1 else (17 if frame["channels"] == 2 else 9)
+    xing_at = index + 4 + side_info
+    frames = stream_bytes = None
+    if window[xing_at : xing_at + 4] in (b"Xing", b"Info"):
+        method = "xing" if window[xing_at : xing_at + 4] == b"Xing" else "info"
+        flags = int.from_bytes(window[xing_at + 4 : xing_at + 8], "big")
+        position = xing_at + 8
+        if flags & 1:
+            frames = int.from_bytes(window[position : position + 4], "big")
+            position += 4
+        if flags & 2:
+            stream_bytes = int.from_bytes(window[position : position + 4], "big")
+    elif window[index + 36 : index + 40] == b"VBRI":
+        method = "vbri"
+        stream_bytes = int.from_bytes(window[index + 46 : index + 50], "big")
+        frames = int.from_bytes(window[index + 50 : index + 54], "big")
+    else:
+        method = "cbr estimate"
+    if frames:
+        seconds = frames * frame["samples_per_frame"] / frame["sample_rate"]
+        bitrate = int((stream_bytes or size - start) * 8 / seconds)
+    else:
+        audio_bytes = size - start - (128 if size - start >= 128 and read_at(size - 128, 3) == b"TAG" else 0)
+        bitrate = frame["bitrate"]
+        seconds = audio_bytes * 8 / bitrate
+    return {
+        "container": "mp3",
+        "method": method,
+        "duration_seconds": round(seconds, 3),
+        "bitrate": bitrate,
+        "sample_rate": frame["sample_rate"],
+        "channels": frame["channels"],
+    }
+
+
+AUDIO_CONTAINER_EXTENSIONS = {"wav": ".wav", "mp4": ".m4a", "mp3": ".mp3"}
+
+
+def probe_audio_file(path: Path) -> dict[str, Any]:
+    """Duration and bitrate from WAV, MP4/M4A (mvhd) or MP3 (Xing/Info/VBRI, else CBR) headers.
+
+    Seeks between headers instead of reading the stream, so the cost does not
+    grow with clip length. The container is sniffed from the bytes rather than
+    trusted from the extension.
+    """
+    size = path.stat().st_size
+    read_bytes = 0
+    with path.open("rb") as handle:
+
+        def read_at(offset: int, length: int) -> bytes:
+            nonlocal read_bytes
+            handle.seek(offset)
+            data = handle.read(length)
+            read_bytes += len(data)
+            return data
+
+        head = read_at(0, 12)
+        if head[:4] == b"RIFF" and head[8:12] == b"WAVE":
+            info = _probe_wav(read_at, size)
+        elif head[4:8] == b"ftyp":
+            info = _probe_mp4(read_at, size)
+        else:
+            info = _probe_mp3(read_at, size, head)
+    info["file_bytes"] = size
+    info["header_bytes_read"] = read_bytes
+    expected = AUDIO_CONTAINER_EXTENSIONS.get(info["container"])
+    if expected and path.suffix.lower() != expected:
+        info.setdefault("notes", []).append(f"Saved as {path.suffix} but the bytes are {info['container']}")
+    return info
+
+
+def normalize_audio(media_path: str, target_loudness: float, silence_threshold_db: float, ffmpeg: str | None) -> dict[str, Any]:
+    """Trim leading/trailing silence and normalize loudness into ``<stem>_normalized<ext>``.
+
+    With ffmpeg this is ``silenceremove`` at both ends plus ``loudnorm`` to
+    ``target_loudness`` LUFS. Without it, 16-bit PCM WAV is handled in pure
+    Python: RMS loudness (dBFS, not K-weighted) is brought to the target with
+    peaks capped at -1 dBFS. Other formats are reported and skipped.
+    """
+    import array
+    import subprocess
+    import wave
+
+    started = time.perf_counter()
+    source = Path(media_path)
+    out_path = source.with_name(f"{source.stem}_normalized{source.suffix}")
+    result: dict[str, Any] = {"notes": []}
+    if ffmpeg is not None:
+        result["backend"] = "ffmpeg"
+        sample_rate = probe_audio_or_note(source, result["notes"]).get("sample_rate") or 44100
+        trim = f"silenceremove=start_periods=1:start_threshold={silence_threshold_db}dB"
+        filters = f"{trim},areverse,{trim},areverse,loudnorm=I={target_loudness}:TP=-1.5:LRA=11"
+        completed = subprocess.run(
+            [ffmpeg, "-hide_banner", "-nostdin", "-y", "-i", str(source), "-af", filters, "-ar", str(sample_rate), str(out_path)],
+            capture_output=True,
+            timeout=300,
+        )
+        if completed.returncode != 0:
+            out_path.unlink(missing_ok=True)
+            last_line = (completed.stderr.decode("utf-8", errors="replace").strip().splitlines() or [""])[-1]
+            result["notes"].append(f"ffmpeg exited {completed.returncode}: {last_line}")
+            result["seconds"] = round(time.perf_counter() - started, 4)
+            return result
+    else:
+        result["backend"] = "pure-python"
+        result["notes"].append("ffmpeg not found; only 16-bit PCM WAV can be normalized")
+        if source.read_bytes()[:4] != b"RIFF":
+            result["notes"].append("Not a WAV file; skipped")
+            result["seconds"] = round(time.perf_counter() - started, 4)
+            return result
+        with wave.open(str(source), "rb") as reader:
+            params = reader.getparams()
+            frames = reader.readframes(params.nframes)
+        if params.sampwidth != 2 or params.comptype != "NONE":
+            result["notes"].append(f"Unsupported WAV sample width {params.sampwidth * 8} bits; skipped")
+            result["seconds"] = round(time.perf_counter() - started, 4)
+            return result
+        samples = array.array("h")
+        samples.frombytes(frames)
+        if sys.byteorder == "big":
+            samples.byteswap()
+        channels, rate = params.nchannels, params.framerate
+        threshold = 32768 * 10 ** (silence_threshold_db / 20)
+        first = next((index for index, value in enumerate(samples) if abs(value) >= threshold), None)
+        if first is None:
+            result["notes"].append("Clip is silent below the threshold; skipped")
+            result["seconds"] = round(time.perf_counter() - started, 4)
+            return result
+        last = next(index for index in range(len(samples) - 1, -1, -1) if abs(samples[index]) >= threshold)
+        first -= first % channels
+        last = last - last % channels + channels
+        kept = samples[first:last]
+        rms_dbfs = 20 * math.log10(max(1e-9, math.sqrt(sum(value * value for value in kept) / len(kept)) / 32768))
+        peak_dbfs = 20 * math.log10(max(abs(min(kept)), max(kept), 1) / 32768)
+        gain_db = target_loudness - rms_dbfs
+        result["peak_limited"] = gain_db > -1.0 - peak_dbfs
+        gain_db = min(gain_db, -1.0 - peak_dbfs)
+        gain = 10 ** (gain_db / 20)
+        normalized = array.array("h", (max(-32768, min(32767, round(value * gain))) for value in kept))
+        if sys.byteorder == "big":
+            normalized.byteswap()
+        with wave.open(str(out_path), "wb") as writer:
+            writer.setnchannels(channels)
+            writer.setsampwidth(2)
+            writer.setframerate(rate)
+            writer.writeframes(normalized.tobytes())
+        result["trimmed_leading_seconds"] = round(first / channels / rate, 3)
+        result["trimmed_trailing_seconds"] = round((len(samples) - last) / channels / rate, 3)
+        result["input_rms_dbfs"] = round(rms_dbfs, 2)
+        result["output_rms_dbfs"] = round(rms_dbfs + gain_db, 2)
+        result["gain_db"] = round(gain_db, 2)
+    result["output_path"] = str(out_path)
+    result["output_bytes"] = out_path.stat().st_size
+    result["output_duration_seconds"] = probe_audio_or_note(out_path, result["notes"]).get("duration_seconds")
+    result["seconds"] = round(time.perf_counter() - started, 4)
+    return result
+
+
+def probe_audio_or_note(path: Path, notes: list[str]) -> dict[str, Any]:
+    """:func:`probe_audio_file`, appending a note instead of raising when the header is unreadable."""
+    try:
+        return probe_audio_file(path)
+    except (OSError, struct.error, IndexError, ValueError) as error:
+        notes.append(f"Header probe of {path.name} failed: {type(error).__name__}: {error}")
+        return {"duration_seconds": None}
+
+
+def audio_postprocess_steps(args: argparse.Namespace, summary: dict[str, Any], label: str) -> CaseSteps:
+    with timed_step(args, summary, label, "audio_probe"):
+        try:
+            summary["audio_probe"] = yield BlockingCall(probe_audio_file, (Path(summary["media_path"]),))
+        except (OSError, struct.error, IndexError, ValueError) as error:
+            # Truncated or corrupt headers surface as any of these; the case itself still succeeded.
+            summary["audio_probe"] = {"duration_seconds": None, "notes": [f"Header probe failed: {type(error).__name__}: {error}"]}
+    summary["duration_seconds"] = summary["audio_probe"]["duration_seconds"]
+    if not args.audio_normalize:
+        return summary
+    try:
+        with timed_step(args, summary, label, "audio_normalize"):
+            summary["audio_normalize"] = yield WorkerCall(
+                normalize_audio,
+                (summary["media_path"], args.audio_target_loudness, args.audio_silence_threshold, shutil.which("ffmpeg")),
+            )
+    except Exception as error:
+        summary["audio_normalize"] = {"notes": [f"Audio normalization failed: {type(error).__name__}: {error}"]}
+    return summary
+
+
+def build_audio_request(args: argparse.Namespace, auth_headers: dict[str, str], text: str) -> CaseRequest:
+    if args.audio_provider == "elevenlabs":
+        endpoint = provider_routes_for(args)["audio:elevenlabs:stream" if args.audio_streaming else "audio:elevenlabs"]
+        headers = {
+            "xi-api-key": os.environ.get(args.elevenlabs_api_key_env, "").strip(),
+            "Accept": "audio/mpeg",
+        }
+        payload = {
+            "text": text,
+            "model_id": args.elevenlabs_model_id,
+        }
+        model_label = args.elevenlabs_model_id
+        voice = args.elevenlabs_voice_id
+        audio_format = None
+    else:
+        endpoint = provider_routes_for(args)["audio:zenmux"]
+        headers = auth_headers
+        payload = {
+            "model": args.audio_model,
+            "input": text,
+            "voice": args.audio_voice,
+            "format": args.audio_format,
+        }
+        model_label = args.audio_model
+        voice = args.audio_voice
+        audio_format = args.audio_format
+    return CaseRequest(
+        endpoint=endpoint,
+        headers=headers,
+        payload=payload,
+        model_label=model_label,
+        cache_fields={
+            # The streaming and non-streaming routes return the same audio.
+            "endpoint": cache_endpoint(args, endpoint).removesuffix("/stream"),
+            "model": model_label,
+            "prompt": text,
+            "voice": voice,
+            "size": None,
+            "format": audio_format,
+        },
+    )
+
+
+def audio_case_steps(
+    args: argparse.Namespace,
+    out_dir: Path,
+    auth_headers: dict[str, str],
+    text: str = DEFAULT_AUDIO_TEXT,
+    name: str = "audio",
+) -> CaseSteps:
+    request = build_audio_request(args, auth_headers, text)
+    if args.audio_provider == "elevenlabs" and not request.headers["xi-api-key"]:
+        return {
+            "endpoint": request.endpoint,
+            "model": request.model_label,
+            "elapsed_seconds": 0.0,
+            "status": 0,
+            "content_type": None,
+            "success": False,
+            "media_path": None,
+            "notes": [f"Missing ElevenLabs API key in env var {args.elevenlabs_api_key_env}"],
+        }
+    summary = yield from cached_case_steps(args, out_dir, name, request, generate_audio_steps(args, out_dir, request, name))
+    if summary.get("success") and summary.get("media_path"):
+        summary = yield from audio_postprocess_steps(args, summary, str(out_dir / name))
+    return summary
+
+
+def run_audio_case(
+    args: argparse.Namespace,
+    out_dir: Path,
+    auth_headers: dict[str, str],
+    text: str = DEFAULT_AUDIO_TEXT,
+    name: str = "audio",
+) -> dict[str, Any]:
+    return run_case_steps(args, audio_case_steps(args, out_dir, auth_headers, text, name))
+
+
+async def async_run_audio_case(
+    args: argparse.Namespace,
+    out_dir: Path,
+    auth_headers: dict[str, str],
+    text: str = DEFAULT_AUDIO_TEXT,
+    name: str = "audio",
+) -> dict[str, Any]:
+    return await async_run_case_steps(args, audio_case_steps(args, out_dir, auth_headers, text, name))
+
+
+def generate_audio_steps(args: argparse.Namespace, out_dir: Path, request: CaseRequest, name: str) -> CaseSteps:
+    endpoint, model_label = request.endpoint, request.model_label
+    label = str(out_dir / name)
+    result = yield HTTPCall(
+        "POST", endpoint, request.headers, request.payload, sink=media_sink_for(args, out_dir, name, "audio"), label=label
+    )
+    debug_prefix = out_dir / f"{name}_case"
+
+    summary: dict[str, Any] = {
+        "endpoint": endpoint,
+        "model": model_label,
+        "elapsed_seconds": round(result.elapsed_seconds, 3),
+        "connect_seconds": round(result.connect_seconds, 3),
+        "ttfb_seconds": round(result.ttfb_seconds, 3),
+        "status": result.status,
+        "content_type": result.content_type,
+        "success": False,
+        "media_path": None,
+        "attempts": result.attempts,
+        "timing": http_timing(result),
+        "notes": [],
+    }
+
+    try:
+        if result.status < 200 or result.status >= 300:
+            summary["notes"].append(f"HTTP error; see {name}_case.response.*")
+            return summary
+
+        if result.content_type and result.content_type.lower().startswith("audio/"):
+            ext = guess_ext_from_content_type(result.content_type, ".m4a")
+            media_path = out_dir / f"{name}_output{ext}"
+            if result.streamed is not None:
+                adopt_streamed_media(result.streamed, media_path)
+                if args.audio_streaming:
+                    summary["streaming"] = {
+                        "ttfb_seconds": round(result.ttfb_seconds, 4),
+                        "first_decodable_frame_seconds": result.streamed.first_decodable_seconds,
+                        "chunk_count": len(result.streamed.chunks),
+                        "bytes": result.streamed.size,
+                        "chunks": result.streamed.chunks,
+                    }
+            else:
+                with timed_step(args, summary, label, "file_write"):
+                    yield BlockingCall(save_bytes, (media_path, result.body))
+            summary["success"] = True
+            summary["media_path"] = str(media_path)
+            summary["notes"].append("Binary audio response")
+            return summary
+
+        with timed_step(args, summary, label, "json_parse"):
+            payload_json = yield BlockingCall(maybe_json, (result.body,))
+        if payload_json is None:
+            if result.streamed is not None:
+                result.streamed.path.unlink(missing_ok=True)
+            summary["notes"].append("Non-JSON non-audio response")
+            return summary
+
+        ext = f".{args.audio_format}" if not args.audio_format.startswith(".") else args.audio_format
+        if result.streamed is not None:
+            if result.streamed.error is not None:
+                summary["notes"].append(result.streamed.error)
+                return summary
+            media_path = adopt_streamed_media(result.streamed, out_dir / f"{name}_output{ext}")
+            summary["success"] = True
+            summary["media_path"] = str(media_path)
+            summary["notes"].append(f"Streamed audio bytes from {result.streamed.source}")
+            return summary
+
+        with timed_step(args, summary, label, "base64_decode"):
+            audio_bytes, note = yield BlockingCall(extract_media_bytes, (payload_json, "audio"))
+        summary["notes"].append(note)
+        if audio_bytes:
+            media_path = out_dir / f"{name}_output{ext}"
+            with timed_step(args, summary, label, "file_write"):
+                yield BlockingCall(save_bytes, (media_path, audio_bytes))
+            summary["success"] = True
+            summary["media_path"] = str(media_path)
+        return summary
+    finally:
+        write_http_debug(args, debug_prefix, result, summary["media_path"])
+
+
+def malformed_case_steps(args: argparse.Namespace, out_dir: Path, auth_headers: dict[str, str]) -> CaseSteps:
+    if args.image_protocol == "vertex":
+        endpoint = provider_routes_for(args)["image:vertex"]
+        payload: dict[str, Any] = {"contents": []}  # intentionally malformed
+    else:
+        endpoint = provider_routes_for(args)["image:openai"]
+        payload = {"model": args.image_model}  # intentionally malformed (missing prompt)
+    result = yield HTTPCall("POST", endpoint, auth_headers, payload, label=str(out_dir / "malformed_image_case"))
+    write_http_debug(args, out_dir / "malformed_image_case", result)
+    return {
+        "endpoint": endpoint,
+        "elapsed_seconds": round(result.elapsed_seconds, 3),
+        "status": result.status,
+        "content_type": result.content_type,
+        "attempts": result.attempts,
+        "timing": http_timing(result),
+    }
+
+
+def run_malformed_case(args: argparse.Namespace, out_dir: Path, auth_headers: dict[str, str]) -> dict[str, Any]:
+    return run_case_steps(args, malformed_case_steps(args, out_dir, auth_headers))
+
+
+async def async_run_malformed_case(args: argparse.Namespace, out_dir: Path, auth_headers: dict[str, str]) -> dict[str, Any]:
+    return await async_run_case_steps(args, malformed_case_steps(args, out_dir, auth_headers))
+
+
+@dataclass
+class StoryboardFrame:
+    index: int
+    role: str
+    image_prompt: str
+    narration_text: str
+
+
+@dataclass
+class Storyboard:
+    lesson_id: str
+    frames: list[StoryboardFrame]
+
+
+def template_storyboard_frames(word1: str, word2: str, style_token: str) -> list[StoryboardFrame]:
+    """Build the four V1 frames for a word pair when a storyboard line has no explicit frames."""
+    scenes = {
+        "word1_only": (
+            f"A scene where only '{word1}' fits, and '{word2}' would be wrong.",
+            f"This is {word1}. Notice what makes it {word1}.",
+        ),
+        "word2_only": (
+            f"A scene where only '{word2}' fits, and '{word1}' would be wrong.",
+            f"This is {word2}. Notice what makes it {word2}.",
+        ),
+        "overlap": (
+            f"A scene that could be described with either '{word1}' or '{word2}'.",
+            f"Here, both {word1} and {word2} work.",
+        ),
+        "non_interchangeable": (
+            f"Two side-by-side scenes contrasting '{word1}' and '{word2}'.",
+            f"You cannot swap {word1} and {word2} here. Compare the two scenes.",
+        ),
+    }
+    return [
+        StoryboardFrame(index=index, role=role, image_prompt=f"{style_token} {scenes[role][0]}", narration_text=scenes[role][1])
+        for index, role in enumerate(STORYBOARD_FRAME_ROLES)
+    ]
+
+
+def load_storyboards(path: Path, limit: int | None = None) -> list[Storyboard]:
+    """Read storyboards from a JSONL file.
+
+    Each line is either a full plan (``{"lesson_id", "frames": [{"role",
+    "image_prompt", "narration_text"}]}``) or a bare word pair (``{"word1",
+    "word2"}``) that is expanded with the four-role template.
+    """
+    storyboards: list[Storyboard] = []
+    for line_number, line in enumerate(path.read_text(encoding="utf-8").splitlines(), start=1):
+        if not line.strip():
+            continue
+        if limit is not None and len(storyboards) >= limit:
+            break
+        try:
+            entry = json.loads(line)
+        except json.JSONDecodeError as error:
+            raise ValueError(f"{path}:{line_number}: invalid JSON: {error}") from error
+        if not isinstance(entry, dict):
+            raise ValueError(f"{path}:{line_number}: expected a JSON object")
+        raw_id = str(entry.get("lesson_id") or entry.get("id") or entry.get("request_id") or f"lesson-{line_number}")
+        # Lesson ids become directory names under the output root.
+        lesson_id = "".join(ch if ch.isalnum() or ch in "-_." else "_" for ch in raw_id)
+        raw_frames = entry.get("frames")
+        if isinstance(raw_frames, list) and raw_frames:
+            frames = []
+            for index, raw in enumerate(raw_frames):
+                if not isinstance(raw, dict) or not isinstance(raw.get("image_prompt"), str) or not isinstance(raw.get("narration_text"), str):
+                    raise ValueError(f"{path}:{line_number}: frame {index} needs image_prompt and narration_text strings")
+                frames.append(
+                    StoryboardFrame(
+                        index=index,
+                        role=str(raw.get("role") or f"frame_{index}"),
+                        image_prompt=raw["image_prompt"],
+                        narration_text=raw["narration_text"],
+                    )
+                )
+        elif isinstance(entry.get("word1"), str) and isinstance(entry.get("word2"), str):
+            style_token = str(entry.get("style_token") or "Simple educational illustration, clean style.")
+            frames = template_storyboard_frames(entry["word1"], entry["word2"], style_token)
+        else:
+            raise ValueError(f"{path}:{line_number}: expected either a frames list or word1/word2")
+        storyboards.append(Storyboard(lesson_id=lesson_id, frames=frames))
+    return storyboards
+
+
+class StoryboardPlanParser:
+    """Pull storyboard frames out of planner text as soon as each frame object closes.
+
+    Accepts ``{"frames": [...]}``, a bare array or one object per line, with or
+    without a Markdown fence around it. Only objects that are array elements or
+    top-level values are considered, so objects nested inside a frame never
+    surface on their own.
+    """
+
+    def __init__(self) -> None:
+        self.text = ""
+        self.frames: list[StoryboardFrame] = []
+        self._scanned = 0
+        # (opening bracket, offset) for each container we are inside.
+        self._stack: list[tuple[str, int]] = []
+        self._in_string = False
+        self._escaped = False
+
+    def feed(self, text: str) -> list[StoryboardFrame]:
+        """Add planner text; returns the frames completed by it."""
+        self.text += text
+        completed: list[StoryboardFrame] = []
+        for offset in range(self._scanned, len(self.text)):
+            char = self.text[offset]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                # Quotes in prose around the JSON are not strings.
+                self._in_string = bool(self._stack)
+            elif char in "{[":
+                self._stack.append((char, offset))
+            elif char in "}]" and self._stack:
+                opener, start = self._stack.pop()
+                if char == "}" and opener == "{" and (not self._stack or self._stack[-1][0] == "["):
+                    frame = self._frame(self.text[start : offset + 1])
+                    if frame is not None:
+                        completed.append(frame)
+        self._scanned = len(self.text)
+        return completed
+
+    def _frame(self, raw_text: str) -> StoryboardFrame | None:
+        try:
+            raw = json.loads(raw_text)
+        except json.JSONDecodeError:
+            return None
+        if not isinstance(raw, dict) or not isinstance(raw.get("image_prompt"), str) or not isinstance(raw.get("narration_text"), str):
+            return None
+        index = len(self.frames)
+        frame = StoryboardFrame(
+            index=index,
+            role=str(raw.get("role") or f"frame_{index}"),
+            image_prompt=raw["image_prompt"],
+            narration_text=raw["narration_text"],
+        )
+        self.frames.append(frame)
+        return frame
+
+
+class _ChatEventWriter:
+    """Decodes an OpenAI-style ``text/event-stream`` body into message content as it arrives."""
+
+    def __init__(self, sink: ChatStreamSink, started: float) -> None:
+        self.sink = sink
+        self.started = started
+        self.parser = StoryboardPlanParser()
+        self._pending = bytearray()
+
+    def feed(self, chunk: bytes) -> None:
+        self._pending += chunk
+        while (newline := self._pending.find(b"\n")) >= 0:
+            line = bytes(self._pending[:newline]).strip()
+            del self._pending[: newline + 1]
+            self._event_line(line)
+
+    def _event_line(self, line: bytes) -> None:
+        if not line.startswith(b"data:"):
+            return
+        data = line[len(b"data:") :].strip()
+        if data == b"[DONE]":
+            return
+        event = maybe_json(data)
+        choices = event.get("choices") if isinstance(event, dict) else None
+        delta = choices[0].get("delta") if isinstance(choices, list) and choices and isinstance(choices[0], dict) else None
+        content = delta.get("content") if isinstance(delta, dict) else None
+        if isinstance(content, str) and content:
+            for frame in self.parser.feed(content):
+                self.sink.frame_parsed(frame, time.perf_counter() - self.started)
+
+    def finish(self) -> tuple[bytes, StreamedMedia | None]:
+        self._event_line(bytes(self._pending).strip())
+        return self.parser.text.encode("utf-8"), None
+
+    def abort(self) -> None:
+        pass
+
+
+class ChatStreamSink:
+    """Stream a chat completion and report each storyboard frame the moment it parses.
+
+    Plugs into the transports like :class:`MediaStreamSink`: a ``text/event-stream``
+    response is decoded event by event and the body handed back is the
+    assembled message content. Anything else is read into memory as usual.
+    """
+
+    def __init__(self, on_frame: Callable[[StoryboardFrame], object] | None = None) -> None:
+        self.on_frame = on_frame
+        # Seconds from the start of the call until each frame parsed.
+        self.frame_offsets: list[float] = []
+
+    def writer(self, status: int, content_type: str | None, started: float) -> _ChatEventWriter | None:
+        if status < 200 or status >= 300 or "event-stream" not in (content_type or "").lower():
+            return None
+        # A retried or hedged attempt re-parses the plan from the start.
+        self.frame_offsets = []
+        return _ChatEventWriter(self, started)
+
+    def frame_parsed(self, frame: StoryboardFrame, offset: float) -> None:
+        self.frame_offsets.append(round(offset, 4))
+        if self.on_frame is not None:
+            self.on_frame(frame)
+
+
+def build_storyboard_prompt(word1: str, word2: str, style_token: str) -> str:
+    roles = ", ".join(STORYBOARD_FRAME_ROLES)
+    return (
+        "Plan a four-frame illustrated lesson that teaches the difference between two English words.\n"
+        f"Word 1: {word1}\n"
+        f"Word 2: {word2}\n"
+        f"Return only JSON of the form {{\"frames\": [{{\"role\", \"image_prompt\", \"narration_text\"}}]}} "
+        f"with exactly one frame per role, in this order: {roles}. "
+        f"Start every image_prompt with \"{style_token}\". Put each frame object on its own line."
+    )
+
+
+def storyboard_plan_steps(
+    args: argparse.Namespace,
+    out_dir: Path,
+    auth_headers: dict[str, str],
+    word1: str,
+    word2: str,
+    on_frame: Callable[[StoryboardFrame], object] | None = None,
+    name: str = "storyboard_plan",
+) -> CaseSteps:
+    """Ask the chat route for a storyboard plan and validate it against the V1 frame roles.
+
+    With ``on_frame``, frames are reported while the plan is still streaming
+    (and once more from the full text for non-streaming responses; callers
+    dedupe by frame index).
+    """
+    endpoint = provider_routes_for(args)["chat"]
+    payload = {
+        "model": args.planner_model,
+        "messages": [{"role": "user", "content": build_storyboard_prompt(word1, word2, "Simple educational illustration, clean style.")}],
+        "stream": True,
+        "temperature": 0.7,
+    }
+    sink = ChatStreamSink(on_frame)
+    result = yield HTTPCall(
+        "POST", endpoint, {**auth_headers, "Content-Type": "application/json"}, payload, sink=sink, label=str(out_dir / name)
+    )
+    summary: dict[str, Any] = {
+        "endpoint": endpoint,
+        "model": args.planner_model,
+        "elapsed_seconds": round(result.elapsed_seconds, 3),
+        "ttfb_seconds": round(result.ttfb_seconds, 3),
+        "status": result.status,
+        "content_type": result.content_type,
+        "success": False,
+        "frames": [],
+        "frame_parsed_seconds": sink.frame_offsets,
+        "attempts": result.attempts,
+        "timing": http_timing(result),
+        "notes": [],
+    }
+    try:
+        if result.status < 200 or result.status >= 300:
+            summary["notes"].append(f"HTTP error; see {name}_case.response.*")
+            return summary
+        streamed = "event-stream" in (result.content_type or "").lower()
+        if streamed:
+            content = result.body.decode("utf-8", errors="replace")
+        else:
+            payload_json = yield BlockingCall(maybe_json, (result.body,))
+            choices = payload_json.get("choices") if isinstance(payload_json, dict) else None
+            message = choices[0].get("message") if isinstance(choices, list) and choices and isinstance(choices[0], dict) else None
+            content = message.get("content") if isinstance(message, dict) else None
+            if not isinstance(content, str):
+                summary["notes"].append("No choices[0].message.content in chat response")
+                return summary
+        frames = StoryboardPlanParser().feed(content)
+        if on_frame is not None and not streamed:
+            for frame in frames:
+                on_frame(frame)
+        summary["frames"] = [dict(vars(frame)) for frame in frames]
+        roles = tuple(frame.role for frame in frames)
+        if roles != STORYBOARD_FRAME_ROLES:
+            summary["notes"].append(f"Storyboard plan failed validation: expected roles {list(STORYBOARD_FRAME_ROLES)}, got {list(roles)}")
+            return summary
+        summary["success"] = True
+        summary["notes"].append("Streamed storyboard plan" if streamed else "Non-streaming storyboard plan")
+        return summary
+    finally:
+        write_http_debug(args, out_dir / f"{name}_case", result)
+
+
+def worker_count(args: argparse.Namespace, fixed: int) -> int:
+    """Workers for a batch: the fixed setting, or the adaptive limiter's ceiling when it decides."""
+    return args.adaptive_max_concurrency if args.adaptive_concurrency else fixed
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """Nearest-rank percentile; returns 0.0 for an empty sample."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100.0 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def latency_stats(values: list[float]) -> dict[str, float]:
+    return {
+        "count": len(values),
+        "p50": round(percentile(values, 50), 3),
+        "p90": round(percentile(values, 90), 3),
+        "max": round(max(values), 3) if values else 0.0,
+    }
+
+
+def sum_timings(timings: list[dict[str, Any]]) -> dict[str, float]:
+    """Add up per-case ``timing`` blocks to show where a batch's time and bytes went."""
+    totals: dict[str, float] = {}
+    for timing in timings:
+        for name, value in timing.items():
+            totals[name] = totals.get(name, 0) + value
+    return {name: round(value, 4) for name, value in totals.items()}
+
+
+class RunJournal:
+    """Append-only JSONL record of finished work items in an output directory.
+
+    Each line is one item's outcome (key, request key, status, media path,
+    timings and full summary), appended as soon as the item finishes, so an
+    interrupted run keeps everything it completed. Reopening the journal
+    replays it; the last entry per key wins and a torn final line is ignored.
+    """
+
+    FILENAME = "journal.jsonl"
+
+    def __init__(self, root: Path, resume: bool) -> None:
+        self.path = root / self.FILENAME
+        self._lock = threading.Lock()
+        self.entries: dict[str, dict[str, Any]] = {}
+        self.replayed = 0
+        self.reused = 0
+        if not resume:
+            self.path.unlink(missing_ok=True)
+            return
+        if self.path.is_file():
+            text = self.path.read_text(encoding="utf-8")
+            if text and not text.endswith("\n"):
+                # Drop a line torn by the interruption so the next append starts cleanly.
+                text = text[: text.rfind("\n") + 1]
+                with self.path.open("r+", encoding="utf-8") as handle:
+                    handle.truncate(len(text.encode("utf-8")))
+            for line in text.splitlines():
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if isinstance(entry, dict) and "key" in entry:
+                    self.entries[entry["key"]] = entry
+                    self.replayed += 1
+
+    @staticmethod
+    def request_key(request: CaseRequest) -> str:
+        return MediaCache.key(request.cache_fields)
+
+    def completed(self, key: str, request_key: str) -> dict[str, Any] | None:
+        """Return the journaled summary when ``key`` already succeeded for the same request and its media still exists."""
+        with self._lock:
+            entry = self.entries.get(key)
+        if entry is None or entry.get("status") != "ok" or entry.get("request_key") != request_key:
+            return None
+        media_path = entry.get("media_path")
+        if media_path and not Path(media_path).is_file():
+            return None
+        with self._lock:
+            self.reused += 1
+        return entry["summary"]
+
+    def record(self, key: str, request_key: str, summary: dict[str, Any]) -> None:
+        entry = {
+            "key": key,
+            "request_key": request_key,
+            "status": "ok" if summary.get("success") else "failed",
+            "media_path": summary.get("media_path"),
+            "wall_seconds": summary.get("wall_seconds"),
+            "timing": summary.get("timing", {}),
+            "recorded_at": datetime.now(timezone.utc).isoformat(),
+            "summary": summary,
+        }
+        line = json.dumps(entry, ensure_ascii=False) + "\n"
+        with self._lock:
+            with self.path.open("a", encoding="utf-8") as handle:
+                handle.write(line)
+            self.entries[key] = entry
+
+    def summary(self, key: str) -> dict[str, Any]:
+        with self._lock:
+            return self.entries[key]["summary"]
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            statuses = collections.Counter(entry.get("status") for entry in self.entries.values())
+            return {
+                "path": str(self.path),
+                "items": len(self.entries),
+                "ok": statuses["ok"],
+                "failed": statuses["failed"],
+                "replayed_lines": self.replayed,
+                "reused": self.reused,
+            }
+
+
+def run_storyboard_batch(args: argparse.Namespace, root: Path, auth_headers: dict[str, str]) -> dict[str, Any]:
+    """Generate every frame's image and audio for each storyboard through bounded pools.
+
+    Images and audio use separate executors so each provider's concurrency
+    limit can be sized independently. Jobs are submitted lesson by lesson, so
+    earlier lessons finish first when the pools are saturated. With
+    --async-transport the same limits are semaphores around asyncio tasks.
+    With --adaptive-concurrency the pools are sized to the limiter's ceiling
+    and each endpoint's in-flight count is left to the request scheduler.
+
+    Every finished asset is appended to the run journal and the lesson
+    summaries are rebuilt from it, so with --resume only failed or missing
+    assets are generated again.
+    """
+    storyboards = load_storyboards(Path(args.storyboard_file), args.storyboard_limit)
+    journal = RunJournal(root, resume=bool(args.resume))
+    image_workers = worker_count(args, args.image_concurrency)
+    audio_workers = worker_count(args, args.audio_concurrency)
+    print(
+        f"[phase0] storyboard batch: {len(storyboards)} lessons, "
+        + (
+            f"adaptive concurrency up to {args.adaptive_max_concurrency} per endpoint"
+            if args.adaptive_concurrency
+            else f"image_concurrency={args.image_concurrency}, audio_concurrency={args.audio_concurrency}"
+        )
+    )
+    batch_started = time.perf_counter()
+
+    def asset_steps(kind: str, lesson_dir: Path, frame: StoryboardFrame) -> CaseSteps:
+        name = f"frame-{frame.index}-{kind}"
+        if kind == "image":
+            return image_case_steps(args, lesson_dir, auth_headers, prompt=frame.image_prompt, name=name)
+        return audio_case_steps(args, lesson_dir, auth_headers, text=frame.narration_text, name=name)
+
+    def asset_request(kind: str, frame: StoryboardFrame) -> CaseRequest:
+        if kind == "image":
+            return build_image_request(args, auth_headers, frame.image_prompt)
+        return build_audio_request(args, auth_headers, frame.narration_text)
+
+    def asset_keys(kind: str, lesson_dir: Path, frame: StoryboardFrame) -> tuple[str, str]:
+        key = f"{lesson_dir.relative_to(root).as_posix()}/frame-{frame.index}-{kind}"
+        return key, journal.request_key(asset_request(kind, frame))
+
+    def failed_asset(kind: str, frame: StoryboardFrame, error: Exception) -> dict[str, Any]:
+        # A transport error fails its own asset, not the whole batch.
+        request = asset_request(kind, frame)
+        return {
+            "endpoint": request.endpoint,
+            "model": request.model_label,
+            "status": None,
+            "success": False,
+            "media_path": None,
+            "notes": [f"{type(error).__name__}: {error}"],
+        }
+
+    def run_asset(kind: str, lesson_dir: Path, frame: StoryboardFrame) -> dict[str, Any]:
+        started = time.perf_counter()
+        try:
+            summary = run_case_steps(args, asset_steps(kind, lesson_dir, frame))
+        except Exception as error:
+            summary = failed_asset(kind, frame, error)
+        return record_asset(kind, lesson_dir, summary, frame, started, time.perf_counter())
+
+    async def async_run_asset(
+        kind: str, lesson_dir: Path, frame: StoryboardFrame, limit: asyncio.Semaphore
+    ) -> dict[str, Any]:
+        async with limit:
+            started = time.perf_counter()
+            try:
+                summary = await async_run_case_steps(args, asset_steps(kind, lesson_dir, frame))
+            except Exception as error:
+                summary = failed_asset(kind, frame, error)
+            return record_asset(kind, lesson_dir, summary, frame, started, time.perf_counter())
+
+    def record_asset(
+        kind: str, lesson_dir: Path, summary: dict[str, Any], frame: StoryboardFrame, started: float, finished: float
+    ) -> dict[str, Any]:
+        summary["frame_index"] = frame.index
+        summary["frame_role"] = frame.role
+        summary["started_offset_seconds"] = round(started - batch_started, 3)
+        summary["finished_offset_seconds"] = round(finished - batch_started, 3)
+        summary["wall_seconds"] = round(finished - started, 3)
+        journal.record(*asset_keys(kind, lesson_dir, frame), summary)
+        return summary
+
+    reused: set[str] = set()
+
+    def pending(storyboard: Storyboard, lesson_dir: Path) -> list[tuple[str, StoryboardFrame]]:
+        items = []
+        for frame in storyboard.frames:
+            for kind in ("image", "audio"):
+                key, request_key = asset_keys(kind, lesson_dir, frame)
+                if journal.completed(key, request_key) is None:
+                    items.append((kind, frame))
+                else:
+                    reused.add(key)
+        return items
+
+    def journaled_assets(storyboard: Storyboard, lesson_dir: Path) -> list[dict[str, Any]]:
+        assets = []
+        for frame in storyboard.frames:
+            for kind in ("image", "audio"):
+                key = asset_keys(kind, lesson_dir, frame)[0]
+                assets.append({**journal.summary(key), "resumed": True} if key in reused else journal.summary(key))
+        return assets
+
+    def summarize_lesson(storyboard: Storyboard, assets: list[dict[str, Any]]) -> dict[str, Any]:
+        first_start = min(asset["started_offset_seconds"] for asset in assets)
+        last_finish = max(asset["finished_offset_seconds"] for asset in assets)
+        lesson = {
+            "lesson_id": storyboard.lesson_id,
+            "frame_count": len(storyboard.frames),
+            "success": all(asset.get("success") for asset in assets),
+            "end_to_end_seconds": round(last_finish - first_start, 3),
+            "completed_offset_seconds": round(last_finish, 3),
+            "serial_estimate_seconds": round(sum(asset["wall_seconds"] for asset in assets), 3),
+            "slowest_asset_seconds": round(max(asset["wall_seconds"] for asset in assets), 3),
+            "assets": assets,
+        }
+        print(f"[phase0] lesson {storyboard.lesson_id}: {'ok' if lesson['success'] else 'FAILED'} in {lesson['end_to_end_seconds']}s")
+        return lesson
+
+    lesson_dirs = []
+    for storyboard in storyboards:
+        lesson_dir = root / "storyboards" / storyboard.lesson_id
+        lesson_dir.mkdir(parents=True, exist_ok=True)
+        lesson_dirs.append(lesson_dir)
+    work = [pending(storyboard, lesson_dir) for storyboard, lesson_dir in zip(storyboards, lesson_dirs)]
+    if args.resume:
+        remaining = sum(len(items) for items in work)
+        print(f"[phase0] resuming {root}: {remaining} of {sum(len(s.frames) * 2 for s in storyboards)} assets left to generate")
+
+    if args.async_transport:
+
+        async def run_all() -> None:
+            limits = {"image": asyncio.Semaphore(image_workers), "audio": asyncio.Semaphore(audio_workers)}
+            lesson_tasks = [
+                asyncio.gather(*(async_run_asset(kind, lesson_dir, frame, limits[kind]) for kind, frame in items))
+                for items, lesson_dir in zip(work, lesson_dirs)
+            ]
+            await asyncio.gather(*lesson_tasks)
+
+        run_async(run_all())
+    else:
+        with ThreadPoolExecutor(max_workers=image_workers, thread_name_prefix="phase0-image") as image_pool, \
+                ThreadPoolExecutor(max_workers=audio_workers, thread_name_prefix="phase0-audio") as audio_pool:
+            pools = {"image": image_pool, "audio": audio_pool}
+            submitted = [
+                [pools[kind].submit(run_asset, kind, lesson_dir, frame) for kind, frame in items]
+                for items, lesson_dir in zip(work, lesson_dirs)
+            ]
+            for futures in submitted:
+                for future in futures:
+                    future.result()
+    lessons = [
+        summarize_lesson(storyboard, journaled_assets(storyboard, lesson_dir))
+        for storyboard, lesson_dir in zip(storyboards, lesson_dirs)
+    ]
+
+    total_wall_seconds = time.perf_counter() - batch_started
+    end_to_end = [lesson["end_to_end_seconds"] for lesson in lessons]
+    batch = {
+        "storyboard_file": str(args.storyboard_file),
+        "image_concurrency": args.image_concurrency,
+        "audio_concurrency": args.audio_concurrency,
+        "lesson_count": len(lessons),
+        "successful_lessons": sum(1 for lesson in lessons if lesson["success"]),
+        "asset_count": sum(len(lesson["assets"]) for lesson in lessons),
+        "total_wall_seconds": round(total_wall_seconds, 3),
+        "lessons_per_minute": round(len(lessons) / total_wall_seconds * 60.0, 3) if total_wall_seconds > 0 else 0.0,
+        "lesson_end_to_end_seconds": latency_stats(end_to_end),
+        "serial_estimate_seconds": latency_stats([lesson["serial_estimate_seconds"] for lesson in lessons]),
+        "slowest_asset_seconds": latency_stats([lesson["slowest_asset_seconds"] for lesson in lessons]),
+        "timing_totals": sum_timings([asset.get("timing", {}) for lesson in lessons for asset in lesson["assets"]]),
+        "journal": journal.stats(),
+        "lessons": lessons,
+    }
+    if args.adaptive_concurrency:
+        batch["adaptive_concurrency"] = request_scheduler_for(args).adaptive_summary()
+    if args.coalesce:
+        batch["coalesced_assets"] = sum(
+            1 for lesson in lessons for asset in lesson["assets"] if asset.get("coalesced_with")
+        )
+    return batch
+
+
+async def run_lesson(
+    args: argparse.Namespace,
+    lesson_dir: Path,
+    auth_headers: dict[str, str],
+    word1: str,
+    word2: str,
+    pipelined: bool,
+) -> dict[str, Any]:
+    """Generate one lesson end to end: storyboard plan, then every frame's image and audio.
+
+    ``pipelined`` starts a frame's image and audio as soon as that frame parses
+    out of the streamed plan. Otherwise this is the V1 serial baseline: the whole
+    plan, then each frame's image and audio one after another. In both modes the
+    first failure cancels whatever is still in flight and deletes the lesson's
+    media, including ``.part-*`` files from interrupted streams.
+    """
+    lesson_dir.mkdir(parents=True, exist_ok=True)
+    started = time.perf_counter()
+    failed = asyncio.Event()
+    failures: list[str] = []
+    assets: dict[tuple[int, str], asyncio.Task[dict[str, Any]]] = {}
+
+    def watch(task: asyncio.Task[dict[str, Any]], label: str) -> asyncio.Task[dict[str, Any]]:
+        def done(task: asyncio.Task[dict[str, Any]]) -> None:
+            if task.cancelled():
+                return
+            if task.exception() is not None or not task.result().get("success"):
+                failures.append(label)
+                failed.set()
+
+        task.add_done_callback(done)
+        return task
+
+    async def run_asset(kind: str, frame: StoryboardFrame) -> dict[str, Any]:
+        asset_started = time.perf_counter()
+        name = f"frame-{frame.index}-{kind}"
+        if kind == "image":
+            steps = image_case_steps(args, lesson_dir, auth_headers, prompt=frame.image_prompt, name=name)
+        else:
+            steps = audio_case_steps(args, lesson_dir, auth_headers, text=frame.narration_text, name=name)
+        summary = await async_run_case_steps(args, steps)
+        summary["frame_role"] = frame.role
+        summary["started_offset_seconds"] = round(asset_started - started, 3)
+        summary["finished_offset_seconds"] = round(time.perf_counter() - started, 3)
+        return summary
+
+    def launch(frame: StoryboardFrame) -> asyncio.Task[dict[str, Any]] | None:
+        task = None
+        for kind in ("image", "audio"):
+            if (frame.index, kind) not in assets and not failed.is_set():
+                task = assets[(frame.index, kind)] = watch(
+                    asyncio.create_task(run_asset(kind, frame)), f"frame-{frame.index}-{kind}"
+                )
+        return task
+
+    def plan_frames() -> list[StoryboardFrame]:
+        return [StoryboardFrame(**frame) for frame in plan_task.result()["frames"]]
+
+    plan_steps = storyboard_plan_steps(args, lesson_dir, auth_headers, word1, word2, on_frame=launch if pipelined else None)
+    plan_task = watch(asyncio.create_task(async_run_case_steps(args, plan_steps)), "storyboard_plan")
+    if pipelined:
+        while not failed.is_set():
+            if plan_task.done():
+                # Non-streaming responses (or a retried stream) may leave frames unlaunched.
+                for frame in plan_frames():
+                    launch(frame)
+            outstanding = [task for task in (plan_task, *assets.values()) if not task.done()]
+            if not outstanding:
+                break
+            failure = asyncio.create_task(failed.wait())
+            await asyncio.wait([*outstanding, failure], return_when=asyncio.FIRST_COMPLETED)
+            failure.cancel()
+    else:
+        await asyncio.wait([plan_task])
+        if not failed.is_set():
+            for frame in plan_frames():
+                for kind in ("image", "audio"):
+                    task = assets[(frame.index, kind)] = watch(
+                        asyncio.create_task(run_asset(kind, frame)), f"frame-{frame.index}-{kind}"
+                    )
+                    await asyncio.wait([task])
+                    if failed.is_set():
+                        break
+                if failed.is_set():
+                    break
+
+    outstanding = [task for task in (plan_task, *assets.values()) if not task.done()]
+    for task in outstanding:
+        task.cancel()
+    await asyncio.gather(*outstanding, return_exceptions=True)
+    finished = time.perf_counter()
+    deleted: list[str] = []
+    if failures:
+        # All-or-nothing: debug artifacts stay for diagnosis, media goes.
+        for path in sorted(lesson_dir.glob("frame-*_output*")):
+            path.unlink(missing_ok=True)
+            deleted.append(path.name)
+
+    def outcome(task: asyncio.Task[dict[str, Any]]) -> dict[str, Any]:
+        if task.cancelled():
+            return {"success": False, "notes": [f"Cancelled after {failures[0]} failed"]}
+        if task.exception() is not None:
+            error = task.exception()
+            return {"success": False, "notes": [f"{type(error).__name__}: {error}"]}
+        return task.result()
+
+    asset_summaries = [{"frame_index": index, "kind": kind, **outcome(task)} for (index, kind), task in sorted(assets.items())]
+    plan = outcome(plan_task)
+    lesson = {
+        "mode": "pipelined" if pipelined else "serial",
+        "lesson_dir": str(lesson_dir),
+        "success": not failures,
+        "end_to_end_seconds": round(finished - started, 3),
+        "plan_seconds": plan.get("elapsed_seconds"),
+        "first_frame_parsed_seconds": (plan.get("frame_parsed_seconds") or [None])[0],
+        "first_asset_started_seconds": min((asset["started_offset_seconds"] for asset in asset_summaries if "started_offset_seconds" in asset), default=None),
+        "first_failure": failures[0] if failures else None,
+        "cancelled_tasks": len(outstanding),
+        "deleted_files": deleted,
+        "plan": plan,
+        "assets": asset_summaries,
+    }
+    status = "ok" if lesson["success"] else f"FAILED at {lesson['first_failure']}, cancelled {len(outstanding)}, deleted {len(deleted)} files"
+    print(f"[phase0] {lesson['mode']} lesson {lesson_dir.name}: {status} in {lesson['end_to_end_seconds']}s")
+    return lesson
+
+
+def run_lesson_pipeline(args: argparse.Namespace, root: Path, auth_headers: dict[str, str]) -> dict[str, Any]:
+    """Compare pipelined lesson generation against the serial V1 orchestrator.
+
+    Each run generates the same word pair once per mode on the asyncio
+    transport, alternating which mode goes first so neither always gets the
+    warm connections.
+    """
+    word1, word2 = args.lesson_words
+    print(f"[phase0] lesson pipeline: '{word1}' vs '{word2}', {args.lesson_runs} run(s) per mode")
+
+    async def run_all() -> list[dict[str, Any]]:
+        lessons = []
+        for run in range(1, args.lesson_runs + 1):
+            for mode in ("serial", "pipelined") if run % 2 else ("pipelined", "serial"):
+                lesson_dir = root / "lessons" / f"{mode}-{run}"
+                lesson = await run_lesson(args, lesson_dir, auth_headers, word1, word2, pipelined=mode == "pipelined")
+                lesson["run"] = run
+                lessons.append(lesson)
+        return lessons
+
+    lessons = run_async(run_all())
+    modes: dict[str, dict[str, Any]] = {}
+    for mode in ("serial", "pipelined"):
+        latencies = [lesson["end_to_end_seconds"] for lesson in lessons if lesson["mode"] == mode and lesson["success"]]
+        modes[mode] = {
+            "runs": sum(1 for lesson in lessons if lesson["mode"] == mode),
+            "successful_runs": len(latencies),
+            "end_to_end_seconds": latency_stats(latencies),
+        }
+    serial_p50 = modes["serial"]["end_to_end_seconds"]["p50"]
+    pipelined_p50 = modes["pipelined"]["end_to_end_seconds"]["p50"]
+    # A mode with no successful runs reports a p50 of 0, which is not a latency to compare.
+    comparable = modes["serial"]["successful_runs"] > 0 and modes["pipelined"]["successful_runs"] > 0
+    return {
+        "word1": word1,
+        "word2": word2,
+        "planner_model": args.planner_model,
+        "chat_endpoint": args.chat_endpoint,
+        **modes,
+        "p50_saved_seconds": round(serial_p50 - pipelined_p50, 3) if comparable else None,
+        "p50_speedup": round(serial_p50 / pipelined_p50, 3) if comparable and serial_p50 > 0 and pipelined_p50 > 0 else None,
+        "lessons": lessons,
+    }
+
+
+# Target -> (kind, wire protocol, argument overrides). The provider is whoever serves the endpoint.
+BENCHMARK_TARGETS = {
+    "image:openai": ("image", "openai", {"image_protocol": "openai"}),
+    "image:vertex": ("image", "vertex", {"image_protocol": "vertex"}),
+    "audio:zenmux": ("audio", "openai", {"audio_provider": "zenmux"}),
+    "audio:elevenlabs": ("audio", "elevenlabs", {"audio_provider": "elevenlabs"}),
+}
+BENCHMARK_SCHEMA_VERSION = 3
+
+
+def gateway_name(host: str) -> str:
+    """Vendor behind a hostname: ``zenmux.ai`` -> ``zenmux``, ``api.elevenlabs.io`` -> ``elevenlabs``."""
+    labels = host.split(".")
+    if len(labels) < 2 or labels[-1].isdigit():
+        return host
+    return labels[-2]
+
+
+def benchmark_stats(values: list[float]) -> dict[str, float]:
+    return {
+        **latency_stats(values),
+        "p99": round(percentile(values, 99), 3),
+        "min": round(min(values), 3) if values else 0.0,
+        "mean": round(sum(values) / len(values), 3) if values else 0.0,
+    }
+
+
+def run_benchmark_target(
+    args: argparse.Namespace,
+    root: Path,
+    auth_headers: dict[str, str],
+    target: str,
+    journal: RunJournal,
+) -> dict[str, Any]:
+    """Run ``warmup`` unrecorded calls, then ``iterations`` recorded calls at ``concurrency``.
+
+    Recorded iterations go to the run journal; on --resume the ones that
+    already succeeded are reused, and warmup runs only if anything is left.
+    Throughput covers the iterations run by this invocation.
+    """
+    kind, protocol, overrides = BENCHMARK_TARGETS[target]
+    # The cache (or coalescing) would turn every repeat into a hit, which measures nothing.
+    target_args = argparse.Namespace(**{**vars(args), **overrides, "cache_mode": "off", "coalesce": False})
+    factory: CaseStepsFactory = image_case_steps if kind == "image" else audio_case_steps
+    target_dir = root / "benchmark" / target.replace(":", "-")
+    if kind == "image":
+        request_key = journal.request_key(build_image_request(target_args, auth_headers, DEFAULT_IMAGE_PROMPT))
+    else:
+        request_key = journal.request_key(build_audio_request(target_args, auth_headers, DEFAULT_AUDIO_TEXT))
+    labels = [f"iter-{index:03d}" for index in range(args.benchmark_iterations)]
+    reused = {}
+    for label in labels:
+        summary = journal.completed(f"benchmark/{target}/{label}", request_key)
+        if summary is not None:
+            reused[label] = summary
+    pending_labels = [label for label in labels if label not in reused]
+    warmup_labels = [f"warmup-{index:03d}" for index in range(args.benchmark_warmup)] if pending_labels else []
+
+    def record_iteration(label: str, summary: dict[str, Any], wall_seconds: float) -> dict[str, Any]:
+        summary["wall_seconds"] = wall_seconds
+        if label.startswith("iter-"):
+            journal.record(f"benchmark/{target}/{label}", request_key, summary)
+        return summary
+
+    def run_iteration(label: str) -> dict[str, Any]:
+        (target_dir / label).mkdir(parents=True, exist_ok=True)
+        return record_iteration(label, *timed_case(factory, target_args, target_dir / label, auth_headers))
+
+    async def async_run_iteration(label: str, limit: asyncio.Semaphore) -> dict[str, Any]:
+        async with limit:
+            (target_dir / label).mkdir(parents=True, exist_ok=True)
+            return record_iteration(label, *await async_timed_case(factory, target_args, target_dir / label, auth_headers))
+
+    if args.async_transport:
+
+        async def run_all() -> tuple[list[dict[str, Any]], float]:
+            for label in warmup_labels:
+                await async_run_iteration(label, asyncio.Semaphore(1))
+            limit = asyncio.Semaphore(worker_count(args, args.benchmark_concurrency))
+            started = time.perf_counter()
+            results = await asyncio.gather(*(async_run_iteration(label, limit) for label in pending_labels))
+            return list(results), time.perf_counter() - started
+
+        fresh, wall_seconds = run_async(run_all())
+    else:
+        for label in warmup_labels:
+            run_iteration(label)
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=worker_count(args, args.benchmark_concurrency), thread_name_prefix="phase0-bench") as pool:
+            fresh = list(pool.map(run_iteration, pending_labels))
+        wall_seconds = time.perf_counter() - started
+
+    by_label = {**reused, **dict(zip(pending_labels, fresh))}
+    samples = [by_label[label] for label in labels]
+    successes = [sample for sample in samples if sample.get("success")]
+    status_counts: dict[str, int] = {}
+    for sample in samples:
+        status_counts[str(sample.get("status"))] = status_counts.get(str(sample.get("status")), 0) + 1
+    endpoint = samples[0]["endpoint"] if samples else ""
+    result = {
+        "target": target,
+        "kind": kind,
+        # Targets sharing the --base-url gateway keep one provider and differ by protocol.
+        "provider": gateway_name(urllib.parse.urlsplit(cache_endpoint(args, endpoint)).hostname or ""),
+        "host": urllib.parse.urlsplit(endpoint).hostname or "",
+        "protocol": protocol,
+        "model": samples[0].get("model", "") if samples else "",
+        "endpoint": endpoint,
+        "iterations": len(samples),
+        "successes": len(successes),
+        "error_rate": round(1 - len(successes) / len(samples), 3) if samples else 0.0,
+        "status_counts": dict(sorted(status_counts.items())),
+        "latency_seconds": benchmark_stats([sample["wall_seconds"] for sample in successes]),
+        "ttfb_seconds": benchmark_stats([sample["ttfb_seconds"] for sample in successes if "ttfb_seconds" in sample]),
+        "phase_p50_seconds": {
+            phase: percentile([sample["timing"][phase] for sample in successes if "timing" in sample], 50)
+            for phase in HTTP_PHASES
+        },
+        "wall_seconds": round(wall_seconds, 3),
+        "throughput_per_second": round(sum(1 for sample in fresh if sample.get("success")) / wall_seconds, 3) if wall_seconds > 0 else 0.0,
+        "resumed_iterations": len(reused),
+    }
+    limiter = request_scheduler_for(args).limiter(endpoint_key(endpoint)) if endpoint else None
+    if limiter is not None:
+        result["adaptive_concurrency"] = limiter.snapshot()
+    return result
 
 
-def http_request(
-    method: str,
-    url: str,
-    headers: dict[str, str],
-    payload: dict[str, Any] | None = None,
-    timeout: float = 120.0,
-) -> HTTPResult:
-    data = None
-    if payload is not None:
-        data = json.dumps(payload).encode("utf-8")
-        headers = {**headers, "Content-Type": "application/json"}
+def benchmark_key(result: dict[str, Any], schema_version: int = BENCHMARK_SCHEMA_VERSION) -> tuple[str, str, str, str]:
+    if schema_version >= 3:
+        return result["kind"], result["provider"], result["protocol"], result["model"]
+    # Schema 1 stored the hostname as "provider"; schema 2 stored the target's
+    # suffix as both "provider" and "protocol", with the hostname under "host".
+    provider = gateway_name(result.get("host", result["provider"]))
+    protocol = BENCHMARK_TARGETS[result["target"]][1] if result.get("target") in BENCHMARK_TARGETS else result["protocol"]
+    return result["kind"], provider, protocol, result["model"]
 
-    if "User-Agent" not in headers:
-        headers = {
-            **headers,
-            "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0 Safari/537.36",
-            "Accept": "application/json, */*",
-        }
-    request = urllib.request.Request(url=url, method=method, headers=headers, data=data)
 
-    started = time.perf_counter()
-    try:
-        with urllib.request.urlopen(request, timeout=timeout) as response:
-            body = response.read()
-            elapsed = time.perf_counter() - started
-            return HTTPResult(
-                status=response.getcode(),
-                content_type=response.headers.get("Content-Type"),
-                headers=dict(response.headers.items()),
-                body=body,
-                elapsed_seconds=elapsed,
-            )
-    except urllib.error.HTTPError as error:
-        body = error.read()
-        elapsed = time.perf_counter() - started
-        return HTTPResult(
-            status=error.code,
-            content_type=error.headers.get("Content-Type") if error.headers else None,
-            headers=dict(error.headers.items()) if error.headers else {},
-            body=body,
-            elapsed_seconds=elapsed,
+def format_benchmark_table(results: list[dict[str, Any]]) -> str:
+    lines = [
+        "| kind | provider | protocol | model | ok/n | p50 s | p90 s | p99 s | max s | req/s |",
+        "| --- | --- | --- | --- | --- | --- | --- | --- | --- | --- |",
+    ]
+    for result in results:
+        latency = result["latency_seconds"]
+        lines.append(
+            f"| {result['kind']} | {result['provider']} | {result['protocol']} | {result['model']} "
+            f"| {result['successes']}/{result['iterations']} | {latency['p50']} | {latency['p90']} "
+            f"| {latency['p99']} | {latency['max']} | {result['throughput_per_second']} |"
         )
+    return "\n".join(lines)
 
 
-def maybe_json(body: bytes) -> Any | None:
-    try:
-        return json.loads(body.decode("utf-8"))
-    except Exception:
-        return None
+def compare_benchmarks(
+    baseline: dict[str, Any],
+    candidate: dict[str, Any],
+    threshold: float,
+) -> tuple[str, list[str]]:
+    """Diff two benchmark.json documents.
+
+    A p50/p90 slowdown or error-rate rise above ``threshold`` is a regression,
+    and so is a baseline target the candidate did not measure.
+    """
+    previous = {benchmark_key(result, baseline.get("schema_version", 1)): result for result in baseline.get("results", [])}
+    lines = [
+        "| kind | provider | protocol | model | p50 s | Δp50 | p90 s | Δp90 | error rate |",
+        "| --- | --- | --- | --- | --- | --- | --- | --- | --- |",
+    ]
+    regressions = []
+    for result in candidate.get("results", []):
+        key = benchmark_key(result, candidate.get("schema_version", 1))
+        old = previous.get(key)
+        latency = result["latency_seconds"]
+        if old is None:
+            lines.append(f"| {' | '.join(key)} | {latency['p50']} | new | {latency['p90']} | new | {result['error_rate']} |")
+            continue
+        deltas = []
+        for pct in ("p50", "p90"):
+            before = old["latency_seconds"][pct]
+            change = (latency[pct] - before) / before if before > 0 else 0.0
+            deltas.append(f"{change:+.0%}")
+            if change > threshold:
+                regressions.append(f"{'/'.join(key)} {pct} {before}s -> {latency[pct]}s ({change:+.0%})")
+        if result["error_rate"] - old["error_rate"] > threshold:
+            regressions.append(f"{'/'.join(key)} error rate {old['error_rate']} -> {result['error_rate']}")
+        lines.append(
+            f"| {' | '.join(key)} | {latency['p50']} | {deltas[0]} | {latency['p90']} | {deltas[1]} "
+            f"| {old['error_rate']} -> {result['error_rate']} |"
+        )
+    # A target that stopped being measured could be hiding a regression.
+    measured = {benchmark_key(result, candidate.get("schema_version", 1)) for result in candidate.get("results", [])}
+    for key, old in previous.items():
+        if key not in measured:
+            latency = old["latency_seconds"]
+            lines.append(f"| {' | '.join(key)} | {latency['p50']} | missing | {latency['p90']} | missing | {old['error_rate']} -> - |")
+            regressions.append(f"{'/'.join(key)} missing from the candidate run")
+    return "\n".join(lines), regressions
+
 
+def run_benchmark(args: argparse.Namespace, root: Path, auth_headers: dict[str, str]) -> dict[str, Any]:
+    targets = args.benchmark_targets or [f"image:{args.image_protocol}", f"audio:{args.audio_provider}"]
+    journal = RunJournal(root, resume=bool(args.resume))
+    results = []
+    for target in targets:
+        print(
+            f"[phase0] benchmark {target}: warmup={args.benchmark_warmup} "
+            f"iterations={args.benchmark_iterations} "
+            + (f"adaptive concurrency<={args.adaptive_max_concurrency}" if args.adaptive_concurrency else f"concurrency={args.benchmark_concurrency}")
+        )
+        results.append(run_benchmark_target(args, root, auth_headers, target, journal))
+    document = {
+        "schema_version": BENCHMARK_SCHEMA_VERSION,
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "settings": {
+            "iterations": args.benchmark_iterations,
+            "warmup": args.benchmark_warmup,
+            "concurrency": args.benchmark_concurrency,
+            "adaptive_concurrency": args.adaptive_concurrency,
+            "connection_pool": not args.no_connection_pool,
+            "stream_media": args.stream_media,
+            "audio_streaming": args.audio_streaming,
+            "async_transport": args.async_transport,
+        },
+        "journal": journal.stats(),
+        "results": results,
+    }
+    json_dump(root / "benchmark.json", document)
+    table = format_benchmark_table(results)
+    (root / "benchmark.md").write_text(table + "\n", encoding="utf-8")
+    print(table)
+    return document
 
-def extract_image_bytes(payload: Any) -> tuple[bytes | None, str]:
+
+# Pre-registry probing parsers, kept only as the extractor benchmark baseline.
+def legacy_extract_image_bytes(payload: Any) -> tuple[bytes | None, str]:
     if not isinstance(payload, dict):
         return None, "Payload is not JSON object"
     data = payload.get("data")
@@ -148,7 +4829,7 @@ def extract_image_bytes(payload: Any) -> tuple[bytes | None, str]:
     return None, "No known image bytes field found"
 
 
-def extract_vertex_image_bytes(payload: Any) -> tuple[bytes | None, str]:
+def legacy_extract_vertex_image_bytes(payload: Any) -> tuple[bytes | None, str]:
     if not isinstance(payload, dict):
         return None, "Payload is not JSON object"
     candidates = payload.get("candidates")
@@ -171,16 +4852,18 @@ def extract_vertex_image_bytes(payload: Any) -> tuple[bytes | None, str]:
     return None, "No image inlineData found in candidates"
 
 
-def extract_audio_bytes(payload: Any) -> tuple[bytes | None, str]:
+def legacy_extract_audio_bytes(payload: Any) -> tuple[bytes | None, str]:
     if not isinstance(payload, dict):
         return None, "Payload is not JSON object"
 
     # Common variants to inspect
+    data = payload.get("data")
+    first = data[0] if isinstance(data, list) and data else None
     candidates = [
         ("audio.data", payload.get("audio", {}).get("data") if isinstance(payload.get("audio"), dict) else None),
         ("audio.b64", payload.get("audio", {}).get("b64") if isinstance(payload.get("audio"), dict) else None),
-        ("data[0].b64", (payload.get("data")[0].get("b64") if isinstance(payload.get("data"), list) and payload.get("data") and isinstance(payload.get("data")[0], dict) else None)),
-        ("data[0].audio", (payload.get("data")[0].get("audio") if isinstance(payload.get("data"), list) and payload.get("data") and isinstance(payload.get("data")[0], dict) else None)),
+        ("data[0].b64", first.get("b64") if isinstance(first, dict) else None),
+        ("data[0].audio", first.get("audio") if isinstance(first, dict) else None),
     ]
     for label, candidate in candidates:
         if isinstance(candidate, str):
@@ -192,241 +4875,91 @@ def extract_audio_bytes(payload: Any) -> tuple[bytes | None, str]:
     return None, "No known audio bytes field found"
 
 
-def write_http_debug(prefix: Path, result: HTTPResult) -> None:
-    meta = {
-        "status": result.status,
-        "content_type": result.content_type,
-        "elapsed_seconds": round(result.elapsed_seconds, 3),
-        "headers": result.headers,
-    }
-    json_dump(prefix.with_suffix(".meta.json"), meta)
-    payload = maybe_json(result.body)
-    if payload is not None:
-        json_dump(prefix.with_suffix(".response.json"), payload)
-    else:
-        prefix.with_suffix(".response.bin").write_bytes(result.body)
-
-
-def fetch_url_bytes(url: str, headers: dict[str, str], timeout: float = 120.0) -> HTTPResult:
-    if "User-Agent" not in headers:
-        headers = {
-            **headers,
-            "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0 Safari/537.36",
-            "Accept": "*/*",
-        }
-    request = urllib.request.Request(url=url, method="GET", headers=headers)
-    started = time.perf_counter()
-    with urllib.request.urlopen(request, timeout=timeout) as response:
-        body = response.read()
-        elapsed = time.perf_counter() - started
-        return HTTPResult(
-            status=response.getcode(),
-            content_type=response.headers.get("Content-Type"),
-            headers=dict(response.headers.items()),
-            body=body,
-            elapsed_seconds=elapsed,
-        )
+LEGACY_EXTRACTORS: dict[str, Callable[[Any], tuple[bytes | None, str]]] = {
+    "openai_image": legacy_extract_image_bytes,
+    "vertex_image": legacy_extract_vertex_image_bytes,
+    "audio": legacy_extract_audio_bytes,
+}
 
 
-def run_image_case(args: argparse.Namespace, out_dir: Path, auth_headers: dict[str, str]) -> dict[str, Any]:
-    prompt = (
-        "Simple educational illustration, clean style. "
-        "A child is feeding a ticket into a train station machine. "
-        "Clear focus on the action. Minimal background clutter."
-    )
-    if args.image_protocol == "vertex":
-        endpoint = urllib.parse.urljoin(
-            args.base_url.rstrip("/") + "/",
-            f"publishers/{args.vertex_image_provider}/models/{args.vertex_image_model}:generateContent",
-        )
-        payload = {
-            "contents": [
-                {
-                    "role": "user",
-                    "parts": [{"text": prompt}],
-                }
-            ],
-            "generationConfig": {
-                "responseModalities": ["TEXT", "IMAGE"]
-            },
-        }
-        model_label = f"{args.vertex_image_provider}/{args.vertex_image_model}"
+def synthetic_media_payload(shape_name: str, media: bytes) -> bytes:
+    encoded = base64.b64encode(media).decode("ascii")
+    if shape_name == "openai_image":
+        payload: dict[str, Any] = {"created": 0, "data": [{"revised_prompt": DEFAULT_IMAGE_PROMPT, "b64_json": encoded}]}
+    elif shape_name == "vertex_image":
+        parts = [{"text": "Here is the image."}, {"inlineData": {"mimeType": "image/png", "data": encoded}}]
+        payload = {"candidates": [{"content": {"role": "model", "parts": parts}}], "usageMetadata": {"totalTokenCount": 1}}
     else:
-        endpoint = urllib.parse.urljoin(args.base_url.rstrip("/") + "/", args.image_endpoint.lstrip("/"))
-        payload = {
-            "model": args.image_model,
-            "prompt": prompt,
-            "size": args.image_size,
-        }
-        model_label = args.image_model
-
-    result = http_request("POST", endpoint, auth_headers, payload)
-    debug_prefix = out_dir / "image_case"
-    write_http_debug(debug_prefix, result)
-
-    summary: dict[str, Any] = {
-        "endpoint": endpoint,
-        "model": model_label,
-        "elapsed_seconds": round(result.elapsed_seconds, 3),
-        "status": result.status,
-        "content_type": result.content_type,
-        "success": False,
-        "media_path": None,
-        "notes": [],
-    }
-
-    if result.status < 200 or result.status >= 300:
-        summary["notes"].append("HTTP error; see image_case.response.*")
-        return summary
+        payload = {"id": "speech", "audio": {"format": "mp3", "data": encoded}}
+    return json.dumps(payload).encode("utf-8")
 
-    # Some providers may return binary image directly.
-    if result.content_type and result.content_type.lower().startswith("image/"):
-        ext = guess_ext_from_content_type(result.content_type, ".png")
-        media_path = out_dir / f"image_output{ext}"
-        save_bytes(media_path, result.body)
-        summary["success"] = True
-        summary["media_path"] = str(media_path)
-        summary["notes"].append("Binary image response")
-        return summary
-
-    payload_json = maybe_json(result.body)
-    if payload_json is None:
-        summary["notes"].append("Non-JSON non-image response")
-        return summary
 
-    if args.image_protocol == "vertex":
-        image_bytes, note = extract_vertex_image_bytes(payload_json)
-    else:
-        image_bytes, note = extract_image_bytes(payload_json)
-    summary["notes"].append(note)
-    if image_bytes:
-        media_path = out_dir / "image_output.png"
-        save_bytes(media_path, image_bytes)
-        summary["success"] = True
-        summary["media_path"] = str(media_path)
-        return summary
+def run_extractor_benchmark(args: argparse.Namespace, root: Path) -> dict[str, Any]:
+    """Time and peak-trace the legacy parsers, the registry walk and the streaming tokenizer."""
+    import tracemalloc
 
-    data = payload_json.get("data") if isinstance(payload_json, dict) else None
-    if isinstance(data, list) and data and isinstance(data[0], dict) and isinstance(data[0].get("url"), str):
-        image_url = data[0]["url"]
-        try:
-            fetched = fetch_url_bytes(image_url, {})
-            write_http_debug(out_dir / "image_url_fetch", fetched)
-            if fetched.status >= 200 and fetched.status < 300 and fetched.content_type and fetched.content_type.lower().startswith("image/"):
-                ext = guess_ext_from_content_type(fetched.content_type, ".png")
-                media_path = out_dir / f"image_output{ext}"
-                save_bytes(media_path, fetched.body)
-                summary["success"] = True
-                summary["media_path"] = str(media_path)
-                summary["notes"].append("Fetched image from returned URL")
-        except Exception as error:
-            summary["notes"].append(f"Failed to fetch returned URL: {error}")
-    return summary
+    scratch = root / "extractor-scratch"
+    scratch.mkdir(parents=True, exist_ok=True)
 
+    def streaming(shape_name: str, body: bytes) -> int:
+        extractor = StreamingMediaExtractor(scratch / f"{shape_name}.bin", MEDIA_SHAPES[shape_name])
+        for offset in range(0, len(body), STREAM_CHUNK_SIZE):
+            extractor.feed(body[offset : offset + STREAM_CHUNK_SIZE])
+        streamed = extractor.finish()
+        if streamed is None or streamed.error:
+            raise RuntimeError(f"streaming extractor failed for {shape_name}: {streamed and streamed.error}")
+        return streamed.size
 
-def run_audio_case(args: argparse.Namespace, out_dir: Path, auth_headers: dict[str, str]) -> dict[str, Any]:
-    text = (
-        "Look at this scene. The child feeds a ticket into the machine. "
-        "Here, feed means to put something into a slot or machine."
-    )
-    if args.audio_provider == "elevenlabs":
-        endpoint = urllib.parse.urljoin(
-            args.elevenlabs_base_url.rstrip("/") + "/",
-            f"v1/text-to-speech/{args.elevenlabs_voice_id}",
-        )
-        elevenlabs_key = os.environ.get(args.elevenlabs_api_key_env, "").strip()
-        if not elevenlabs_key:
-            return {
-                "endpoint": endpoint,
-                "model": args.elevenlabs_model_id,
-                "elapsed_seconds": 0.0,
-                "status": 0,
-                "content_type": None,
-                "success": False,
-                "media_path": None,
-                "notes": [f"Missing ElevenLabs API key in env var {args.elevenlabs_api_key_env}"],
+    results = []
+    for size_mb in args.extractor_benchmark_mb:
+        media = os.urandom(int(size_mb * 1024 * 1024))
+        for shape_name in MEDIA_SHAPES:
+            body = synthetic_media_payload(shape_name, media)
+            methods: dict[str, Callable[[], Any]] = {
+                "legacy": lambda: LEGACY_EXTRACTORS[shape_name](json.loads(body)),
+                "registry": lambda: extract_media_bytes(json.loads(body), shape_name),
+                "streaming": lambda: streaming(shape_name, body),
             }
-        elevenlabs_headers = {
-            "xi-api-key": elevenlabs_key,
-            "Accept": "audio/mpeg",
-        }
-        payload = {
-            "text": text,
-            "model_id": args.elevenlabs_model_id,
-        }
-        result = http_request("POST", endpoint, elevenlabs_headers, payload)
-        model_label = args.elevenlabs_model_id
-    else:
-        endpoint = urllib.parse.urljoin(args.base_url.rstrip("/") + "/", args.audio_endpoint.lstrip("/"))
-        payload = {
-            "model": args.audio_model,
-            "input": text,
-            "voice": args.audio_voice,
-            "format": args.audio_format,
-        }
-        result = http_request("POST", endpoint, auth_headers, payload)
-        model_label = args.audio_model
-    debug_prefix = out_dir / "audio_case"
-    write_http_debug(debug_prefix, result)
-
-    summary: dict[str, Any] = {
-        "endpoint": endpoint,
-        "model": model_label,
-        "elapsed_seconds": round(result.elapsed_seconds, 3),
-        "status": result.status,
-        "content_type": result.content_type,
-        "success": False,
-        "media_path": None,
-        "notes": [],
+            for method, run in methods.items():
+                timings = []
+                for _ in range(args.extractor_benchmark_repeats):
+                    started = time.perf_counter()
+                    run()
+                    timings.append(time.perf_counter() - started)
+                tracemalloc.start()
+                run()
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                results.append(
+                    {
+                        "shape": shape_name,
+                        "media_mb": size_mb,
+                        "body_bytes": len(body),
+                        "method": method,
+                        "best_seconds": round(min(timings), 6),
+                        "mean_seconds": round(sum(timings) / len(timings), 6),
+                        "peak_traced_bytes": peak,
+                    }
+                )
+    shutil.rmtree(scratch, ignore_errors=True)
+    document = {
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "repeats": args.extractor_benchmark_repeats,
+        "chunk_size": STREAM_CHUNK_SIZE,
+        "results": results,
     }
-
-    if result.status < 200 or result.status >= 300:
-        summary["notes"].append("HTTP error; see audio_case.response.*")
-        return summary
-
-    if result.content_type and result.content_type.lower().startswith("audio/"):
-        ext = guess_ext_from_content_type(result.content_type, ".m4a")
-        media_path = out_dir / f"audio_output{ext}"
-        save_bytes(media_path, result.body)
-        summary["success"] = True
-        summary["media_path"] = str(media_path)
-        summary["notes"].append("Binary audio response")
-        return summary
-
-    payload_json = maybe_json(result.body)
-    if payload_json is None:
-        summary["notes"].append("Non-JSON non-audio response")
-        return summary
-
-    audio_bytes, note = extract_audio_bytes(payload_json)
-    summary["notes"].append(note)
-    if audio_bytes:
-        ext = f".{args.audio_format}" if not args.audio_format.startswith(".") else args.audio_format
-        media_path = out_dir / f"audio_output{ext}"
-        save_bytes(media_path, audio_bytes)
-        summary["success"] = True
-        summary["media_path"] = str(media_path)
-    return summary
-
-
-def run_malformed_case(args: argparse.Namespace, out_dir: Path, auth_headers: dict[str, str]) -> dict[str, Any]:
-    if args.image_protocol == "vertex":
-        endpoint = urllib.parse.urljoin(
-            args.base_url.rstrip("/") + "/",
-            f"publishers/{args.vertex_image_provider}/models/{args.vertex_image_model}:generateContent",
+    json_dump(root / "extractor_benchmark.json", document)
+    lines = [
+        "| shape | media MB | method | best s | mean s | peak traced MB |",
+        "|---|---:|---|---:|---:|---:|",
+    ]
+    for row in results:
+        lines.append(
+            f"| {row['shape']} | {row['media_mb']:g} | {row['method']} | {row['best_seconds']:.4f} | "
+            f"{row['mean_seconds']:.4f} | {row['peak_traced_bytes'] / (1024 * 1024):.2f} |"
         )
-        payload = {"contents": []}  # intentionally malformed
-    else:
-        endpoint = urllib.parse.urljoin(args.base_url.rstrip("/") + "/", args.image_endpoint.lstrip("/"))
-        payload = {"model": args.image_model}  # intentionally malformed (missing prompt)
-    result = http_request("POST", endpoint, auth_headers, payload)
-    write_http_debug(out_dir / "malformed_image_case", result)
-    return {
-        "endpoint": endpoint,
-        "elapsed_seconds": round(result.elapsed_seconds, 3),
-        "status": result.status,
-        "content_type": result.content_type,
-    }
+    print("\n".join(lines))
+    return document
 
 
 def parse_args() -> argparse.Namespace:
@@ -449,12 +4982,512 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument("--elevenlabs-model-id", default=DEFAULT_ELEVENLABS_MODEL_ID)
     parser.add_argument("--elevenlabs-voice-id", default=DEFAULT_ELEVENLABS_VOICE_ID)
     parser.add_argument("--output-dir", default=None, help="Directory for outputs (default: ./.tmp/phase0-<timestamp>)")
+    parser.add_argument(
+        "--resume",
+        default=None,
+        metavar="DIR",
+        help="Continue an interrupted --storyboard-file or --benchmark run in DIR, regenerating only failed or missing items",
+    )
     parser.add_argument("--skip-malformed", action="store_true")
-    return parser.parse_args()
+    parser.add_argument(
+        "--no-connection-pool",
+        action="store_true",
+        help="Open a fresh connection for every request instead of reusing keep-alive connections per host",
+    )
+    parser.add_argument(
+        "--stream-media",
+        action="store_true",
+        help="Write image/audio bodies to disk in chunks and decode base64 media fields incrementally",
+    )
+    parser.add_argument(
+        "--audio-streaming",
+        action="store_true",
+        help="Use the streaming TTS route and record TTFB, chunk arrival times and first-decodable-frame time",
+    )
+    parser.add_argument(
+        "--cache-mode",
+        choices=["off", "read-write", "refresh"],
+        default="off",
+        help="Content-addressed media cache: reuse identical generations (read-write) or regenerate and overwrite (refresh)",
+    )
+    parser.add_argument("--cache-dir", default=str(Path(".tmp") / "phase0-multimodal-cache"), help="Media cache directory")
+    parser.add_argument("--cache-max-mb", type=float, default=512.0, help="Evict least recently used entries above this size")
+    parser.add_argument("--cache-ttl-hours", type=float, default=24.0 * 7, help="Entries older than this are regenerated (0 disables)")
+    parser.add_argument(
+        "--coalesce",
+        action="store_true",
+        help="Share one upstream call among concurrent cases with the same normalized endpoint/model/prompt/voice",
+    )
+    parser.add_argument("--max-retries", type=int, default=0, help="Retry 429/5xx and connection errors up to N times")
+    parser.add_argument("--retry-base-delay", type=float, default=0.5, help="Backoff base in seconds (full jitter, doubled per retry)")
+    parser.add_argument("--retry-max-delay", type=float, default=20.0, help="Cap on any single backoff or Retry-After wait")
+    parser.add_argument("--rate-limit-rps", type=float, default=0.0, help="Per-host token bucket rate (0 disables)")
+    parser.add_argument("--rate-limit-burst", type=int, default=1, help="Per-host token bucket burst size")
+    parser.add_argument(
+        "--hedge",
+        action="store_true",
+        help="Send a duplicate request when a call outlives the host's observed p95 latency",
+    )
+    parser.add_argument("--hedge-min-samples", type=int, default=10, help="Latency samples needed before hedging starts")
+    parser.add_argument(
+        "--adaptive-concurrency",
+        action="store_true",
+        help="Batch/benchmark runs: grow or shrink in-flight requests per endpoint from observed p90 latency and 429/5xx (AIMD)",
+    )
+    parser.add_argument("--adaptive-initial-concurrency", type=int, default=2, help="Starting in-flight limit per endpoint")
+    parser.add_argument("--adaptive-max-concurrency", type=int, default=16, help="Ceiling for the adaptive limit (and batch worker count)")
+    parser.add_argument(
+        "--adaptive-latency-tolerance",
+        type=float,
+        default=1.5,
+        help="Back off when a window's p90 exceeds this multiple of the best recent p90",
+    )
+    parser.add_argument(
+        "--image-postprocess",
+        action="store_true",
+        help="Write downscaled WebP variants (PNG without Pillow) and a blurhash for each saved image in a process pool",
+    )
+    parser.add_argument("--image-variant-sizes", nargs="+", type=int, default=[512, 256], help="Longest side of each image variant")
+    parser.add_argument("--image-variant-quality", type=int, default=80, help="WebP/JPEG quality for image variants")
+    parser.add_argument(
+        "--audio-normalize",
+        action="store_true",
+        help="Trim leading/trailing silence and normalize loudness of each saved clip (ffmpeg, or pure Python for WAV)",
+    )
+    parser.add_argument("--audio-target-loudness", type=float, default=-16.0, help="Loudness target (LUFS with ffmpeg, RMS dBFS otherwise)")
+    parser.add_argument("--audio-silence-threshold", type=float, default=-50.0, help="Level in dB below which edges count as silence")
+    parser.add_argument(
+        "--postprocess-workers",
+        type=int,
+        default=min(4, os.cpu_count() or 1),
+        help="Processes for CPU-bound media post-processing",
+    )
+    parser.add_argument(
+        "--concurrent",
+        action="store_true",
+        help="Run the independent image/audio/malformed cases in parallel instead of one after another",
+    )
+    parser.add_argument(
+        "--async-transport",
+        action="store_true",
+        help="Send requests on the asyncio transport (one thread; cases and storyboard assets run as tasks)",
+    )
+    parser.add_argument(
+        "--storyboard-file",
+        default=None,
+        help="JSONL file of storyboards; generates every frame's image and audio instead of the single-prompt cases",
+    )
+    parser.add_argument("--storyboard-limit", type=int, default=None, help="Only read the first N storyboards")
+    parser.add_argument("--image-concurrency", type=int, default=2, help="Max in-flight image requests in storyboard mode")
+    parser.add_argument("--audio-concurrency", type=int, default=4, help="Max in-flight audio requests in storyboard mode")
+    parser.add_argument(
+        "--lesson-pipeline",
+        action="store_true",
+        help="Stream storyboard plans from the chat route and start each frame's assets as it parses; compare with the serial orchestrator",
+    )
+    parser.add_argument("--lesson-words", nargs=2, metavar=("WORD1", "WORD2"), default=["feed", "insert"], help="Word pair for --lesson-pipeline")
+    parser.add_argument("--lesson-runs", type=int, default=3, help="Lessons generated per mode in --lesson-pipeline")
+    parser.add_argument("--chat-endpoint", default="/chat/completions", help="Chat completion endpoint path for the storyboard planner")
+    parser.add_argument("--planner-model", default=DEFAULT_PLANNER_MODEL)
+    parser.add_argument("--benchmark", action="store_true", help="Repeat each benchmark target and report latency percentiles")
+    parser.add_argument(
+        "--benchmark-targets",
+        nargs="+",
+        choices=sorted(BENCHMARK_TARGETS),
+        default=None,
+        help="Targets to benchmark (default: the configured image protocol and audio provider)",
+    )
+    parser.add_argument("--benchmark-iterations", type=int, default=10, help="Recorded calls per target")
+    parser.add_argument("--benchmark-warmup", type=int, default=1, help="Unrecorded calls per target before measuring")
+    parser.add_argument("--benchmark-concurrency", type=int, default=1, help="In-flight calls per target while measuring")
+    parser.add_argument(
+        "--benchmark-compare",
+        nargs="+",
+        metavar="BENCHMARK_JSON",
+        default=None,
+        help="Compare against a baseline benchmark.json; with two files, diff them without running anything",
+    )
+    parser.add_argument(
+        "--regression-threshold",
+        type=float,
+        default=0.2,
+        help="Relative p50/p90 slowdown (or absolute error-rate rise) reported as a regression",
+    )
+    parser.add_argument(
+        "--mock-provider",
+        action="store_true",
+        help="Start the bundled mock provider server and point every endpoint at it (no keys or network needed)",
+    )
+    parser.add_argument(
+        "--mock-config",
+        default=None,
+        help="Mock provider settings as inline JSON or a path to a JSON file (see MockProviderConfig)",
+    )
+    parser.add_argument(
+        "--probe-daemon",
+        action="store_true",
+        help="Stay running: repeat the image/audio/malformed checks on an interval and serve the results over HTTP",
+    )
+    parser.add_argument("--probe-interval", type=float, default=60.0, help="Seconds between probe round starts")
+    parser.add_argument("--probe-rounds", type=int, default=0, help="Stop after N probe rounds (0 runs until interrupted)")
+    parser.add_argument("--probe-listen", default="127.0.0.1:8787", help="HOST:PORT for the probe status endpoint (port 0 picks one)")
+    parser.add_argument("--probe-history", type=int, default=100, help="Rounds of latency history kept per check")
+    parser.add_argument(
+        "--extractor-benchmark",
+        action="store_true",
+        help="Benchmark response parsing on synthetic payloads (no API calls) and write extractor_benchmark.json",
+    )
+    parser.add_argument(
+        "--extractor-benchmark-mb",
+        nargs="+",
+        type=float,
+        default=[1.0, 4.0, 16.0],
+        help="Decoded media sizes in MB for --extractor-benchmark",
+    )
+    parser.add_argument("--extractor-benchmark-repeats", type=int, default=3, help="Timed runs per extractor and payload")
+    parser.add_argument(
+        "--trace",
+        action="store_true",
+        help="Record per-phase spans for every call and write trace.json (Chrome trace) and trace.jsonl",
+    )
+    parser.add_argument(
+        "--debug-capture",
+        choices=DEBUG_CAPTURE_LEVELS,
+        default="full",
+        help="HTTP debug artifacts per call: off, meta (status/timing/headers) or full (plus body with base64 media redacted)",
+    )
+    args = parser.parse_args()
+    if args.benchmark_compare and len(args.benchmark_compare) > 2:
+        parser.error("--benchmark-compare takes a baseline file and an optional candidate file")
+    if args.benchmark_compare and len(args.benchmark_compare) == 1 and not args.benchmark:
+        parser.error("--benchmark-compare with one file compares a --benchmark run; pass --benchmark or a candidate file")
+    for option in ("image_concurrency", "audio_concurrency"):
+        if getattr(args, option) < 1:
+            parser.error(f"--{option.replace('_', '-')} must be at least 1")
+    if args.trace and args.probe_daemon:
+        # The recorder keeps every span until exit, which a daemon never reaches.
+        parser.error("--trace is not supported with --probe-daemon")
+    if args.resume:
+        if not (args.storyboard_file or args.benchmark):
+            parser.error("--resume only applies to --storyboard-file and --benchmark runs")
+        if not (Path(args.resume) / RunJournal.FILENAME).is_file():
+            parser.error(f"--resume: no {RunJournal.FILENAME} in {args.resume}")
+        if args.output_dir and Path(args.output_dir) != Path(args.resume):
+            parser.error("--resume writes into the resumed directory; drop --output-dir")
+    return args
+
+
+CaseStepsFactory = Callable[[argparse.Namespace, Path, dict[str, str]], CaseSteps]
+
+
+def timed_case(
+    factory: CaseStepsFactory, args: argparse.Namespace, out_dir: Path, auth_headers: dict[str, str]
+) -> tuple[dict[str, Any], float]:
+    started = time.perf_counter()
+    summary = run_case_steps(args, factory(args, out_dir, auth_headers))
+    return summary, time.perf_counter() - started
+
+
+async def async_timed_case(
+    factory: CaseStepsFactory, args: argparse.Namespace, out_dir: Path, auth_headers: dict[str, str]
+) -> tuple[dict[str, Any], float]:
+    started = time.perf_counter()
+    summary = await async_run_case_steps(args, factory(args, out_dir, auth_headers))
+    return summary, time.perf_counter() - started
+
+
+def run_cases(
+    cases: list[tuple[str, CaseStepsFactory]],
+    args: argparse.Namespace,
+    out_dir: Path,
+    auth_headers: dict[str, str],
+) -> tuple[dict[str, dict[str, Any]], dict[str, float]]:
+    """Run each named case and return its summary plus its wall-clock time.
+
+    Cases write to disjoint ``<name>.*`` files, so in concurrent mode they can
+    share ``out_dir`` without coordination.
+    """
+    summaries: dict[str, dict[str, Any]] = {}
+    timings: dict[str, float] = {}
+    if args.async_transport:
+        print(f"[phase0] running {', '.join(name for name, _ in cases)} on the asyncio transport...")
+
+        async def run_all() -> list[tuple[dict[str, Any], float]]:
+            return await asyncio.gather(*(async_timed_case(factory, args, out_dir, auth_headers) for _, factory in cases))
+
+        for (name, _), (summary, seconds) in zip(cases, run_async(run_all())):
+            summaries[name], timings[name] = summary, seconds
+        return summaries, timings
+
+    if not args.concurrent:
+        for name, runner in cases:
+            print(f"[phase0] running {name.replace('_', ' ')}...")
+            summaries[name], timings[name] = timed_case(runner, args, out_dir, auth_headers)
+        return summaries, timings
+
+    print(f"[phase0] running {', '.join(name for name, _ in cases)} concurrently...")
+    with ThreadPoolExecutor(max_workers=len(cases), thread_name_prefix="phase0-case") as pool:
+        futures = {name: pool.submit(timed_case, runner, args, out_dir, auth_headers) for name, runner in cases}
+        for name, future in futures.items():
+            summaries[name], timings[name] = future.result()
+    return summaries, timings
+
+
+class ProbeDaemon:
+    """Re-run the health-check cases on an interval inside one warm process.
+
+    The connection pool, route table and request scheduler persist across
+    rounds, so each probe measures the provider rather than interpreter, DNS
+    and TLS start-up. The latest round and per-check latency history are kept
+    in memory, written to probe_status.json and served by serve().
+    """
+
+    def __init__(
+        self,
+        args: argparse.Namespace,
+        root: Path,
+        auth_headers: dict[str, str],
+        cases: list[tuple[str, CaseStepsFactory]],
+    ) -> None:
+        self.args = args
+        self.root = root
+        self.out_dir = root / "latest"
+        self.auth_headers = auth_headers
+        self.cases = [(name, self.guarded(factory)) for name, factory in cases]
+        self.started_at = datetime.now(timezone.utc).isoformat()
+        self.rounds = 0
+        self.latest: dict[str, Any] = {}
+        self.history: dict[str, collections.deque[tuple[bool, float]]] = {
+            name: collections.deque(maxlen=args.probe_history) for name, _ in cases
+        }
+        self._lock = threading.Lock()
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def guarded(factory: CaseStepsFactory) -> CaseStepsFactory:
+        """Wrap a check so an exception (connection refused, timeout...) is an unhealthy result, not the daemon's end."""
+
+        def steps(args: argparse.Namespace, out_dir: Path, auth_headers: dict[str, str]) -> CaseSteps:
+            try:
+                return (yield from factory(args, out_dir, auth_headers))
+            except Exception as error:
+                message = f"{type(error).__name__}: {error}"
+                return {"success": False, "status": None, "error": message, "notes": [f"Check raised {message}"]}
+
+        return steps
+
+    @staticmethod
+    def healthy(name: str, summary: dict[str, Any]) -> bool:
+        if name == "malformed_case":
+            # The bad request should be rejected cleanly, not time out or 5xx.
+            status = summary.get("status")
+            return isinstance(status, int) and 400 <= status < 500
+        return bool(summary.get("success"))
+
+    def record(self, summaries: dict[str, dict[str, Any]], timings: dict[str, float]) -> dict[str, Any]:
+        checks: dict[str, dict[str, Any]] = {
+            name: {
+                "healthy": self.healthy(name, summary),
+                "seconds": round(timings[name], 3),
+                "status": summary.get("status"),
+                "error": summary.get("error"),
+                "summary": summary,
+            }
+            for name, summary in summaries.items()
+        }
+        # The daemon never reaches the end-of-run stats() call, so drain debug captures every round.
+        debug_writer_for(self.args).flush()
+        with self._lock:
+            self.rounds += 1
+            self.latest = {
+                "round": self.rounds,
+                "finished_at": datetime.now(timezone.utc).isoformat(),
+                "healthy": all(check["healthy"] for check in checks.values()),
+                "checks": checks,
+            }
+            for name, check in checks.items():
+                self.history[name].append((check["healthy"], check["seconds"]))
+            latest = self.latest
+        json_dump(self.root / "probe_status.json", self.status())
+        print(
+            f"[phase0] probe round {latest['round']}: {'healthy' if latest['healthy'] else 'UNHEALTHY'} ("
+            + ", ".join(f"{name} {check['seconds']}s{'' if check['healthy'] else ' FAILED'}" for name, check in checks.items())
+            + ")"
+        )
+        return latest
+
+    def status(self) -> dict[str, Any]:
+        with self._lock:
+            stats = {}
+            for name, samples in self.history.items():
+                healthy_seconds = [seconds for healthy, seconds in samples if healthy]
+                stats[name] = {
+                    "samples": len(samples),
+                    "healthy": len(healthy_seconds),
+                    "availability": round(len(healthy_seconds) / len(samples), 3) if samples else None,
+                    "latency_seconds": latency_stats(healthy_seconds),
+                }
+            return {
+                "started_at": self.started_at,
+                "interval_seconds": self.args.probe_interval,
+                "rounds": self.rounds,
+                "routes": provider_routes_for(self.args),
+                "latest": self.latest,
+                "stats": stats,
+                "connection_pool": connection_pool_summary(self.args),
+            }
+
+    def finished(self) -> bool:
+        return 0 < self.args.probe_rounds <= self.rounds
+
+    def run(self) -> None:
+        while True:
+            started = time.perf_counter()
+            self.record(*run_cases(self.cases, self.args, self.out_dir, self.auth_headers))
+            if self.finished():
+                return
+            time.sleep(max(0.0, self.args.probe_interval - (time.perf_counter() - started)))
+
+    async def async_run(self) -> None:
+        # One event loop for the daemon's lifetime; run_cases() would open and close a loop per round.
+        while True:
+            started = time.perf_counter()
+            results = await asyncio.gather(
+                *(async_timed_case(factory, self.args, self.out_dir, self.auth_headers) for _, factory in self.cases)
+            )
+            self.record(
+                {name: summary for (name, _), (summary, _) in zip(self.cases, results)},
+                {name: seconds for (name, _), (_, seconds) in zip(self.cases, results)},
+            )
+            if self.finished():
+                return
+            await asyncio.sleep(max(0.0, self.args.probe_interval - (time.perf_counter() - started)))
+
+    def serve(self, listen: str) -> Any:
+        """Serve ``GET /status`` (everything) and ``GET /health`` (200 or 503) on a daemon thread."""
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        daemon = self
+
+        class ProbeStatusHandler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            server_version = "Phase0ProbeDaemon/1"
+
+            def log_message(self, format: str, *args: Any) -> None:
+                pass
+
+            def do_GET(self) -> None:
+                path = urllib.parse.urlsplit(self.path).path
+                if path in ("/", "/status"):
+                    status, payload = 200, daemon.status()
+                elif path == "/health":
+                    latest = daemon.status()["latest"]
+                    status = 200 if latest.get("healthy") else 503
+                    payload = {
+                        "healthy": bool(latest.get("healthy")),
+                        "round": latest.get("round"),
+                        "finished_at": latest.get("finished_at"),
+                        "checks": {name: check["healthy"] for name, check in latest.get("checks", {}).items()},
+                    }
+                else:
+                    status, payload = 404, {"message": f"unknown path {path}; try /status or /health"}
+                body = json.dumps(payload, indent=2, ensure_ascii=False).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        host, _, port = listen.rpartition(":")
+        server = ThreadingHTTPServer((host or "127.0.0.1", int(port)), ProbeStatusHandler)
+        threading.Thread(target=server.serve_forever, name="phase0-probe-status", daemon=True).start()
+        return server
+
+
+def run_probe_daemon(
+    args: argparse.Namespace,
+    root: Path,
+    auth_headers: dict[str, str],
+    cases: list[tuple[str, CaseStepsFactory]],
+) -> int:
+    # Probes must reach the provider every round.
+    probe_args = argparse.Namespace(**{**vars(args), "cache_mode": "off", "coalesce": False})
+    daemon = ProbeDaemon(probe_args, root, auth_headers, cases)
+    server = daemon.serve(args.probe_listen)
+    host, port = server.server_address[:2]
+    print(
+        f"[phase0] probe daemon: {len(cases)} checks every {args.probe_interval:g}s, "
+        f"status on http://{host}:{port}/status and /health"
+    )
+    try:
+        if args.async_transport:
+            run_async(daemon.async_run())
+        else:
+            daemon.run()
+    except KeyboardInterrupt:
+        print("[phase0] probe daemon stopped")
+    finally:
+        server.shutdown()
+        server.server_close()
+    print(f"[phase0] probe status saved to {root / 'probe_status.json'}")
+    return 0
+
+
+def report_benchmark_comparison(args: argparse.Namespace, candidate: dict[str, Any]) -> int:
+    baseline = json.loads(Path(args.benchmark_compare[0]).read_text(encoding="utf-8"))
+    table, regressions = compare_benchmarks(baseline, candidate, args.regression_threshold)
+    print(table)
+    for regression in regressions:
+        print(f"[phase0] REGRESSION {regression}", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+def start_mock_provider(args: argparse.Namespace) -> dict[str, Any]:
+    """Start the mock provider and rewrite base URLs and API keys to use it."""
+    from phase0_mock_provider_server import config_from_mapping, start_mock_server
+
+    settings: dict[str, Any] = {}
+    if args.mock_config:
+        config_path = Path(args.mock_config)
+        settings = json.loads(config_path.read_text(encoding="utf-8") if config_path.is_file() else args.mock_config)
+    config = config_from_mapping(settings)
+    server, base_url = start_mock_server(config)
+    args.base_url = f"{base_url}/api/v1"
+    args.elevenlabs_base_url = base_url
+    os.environ.setdefault(args.api_key_env, "mock-provider-key")
+    os.environ.setdefault(args.elevenlabs_api_key_env, "mock-elevenlabs-key")
+    print(f"[phase0] mock provider listening on {base_url}")
+    return {"server": server, "base_url": base_url, "config": vars(config)}
+
+
+def attach_runtime_stats(run_summary: dict[str, Any], args: argparse.Namespace, root: Path) -> None:
+    """Record process-wide transport/cache counters and the finish time, and export the trace."""
+    run_summary["connection_pool"] = connection_pool_summary(args)
+    run_summary["media_cache"] = media_cache_summary(args)
+    run_summary["request_scheduler"] = request_scheduler_for(args).summary()
+    run_summary["coalescing"] = coalescing_summary(args)
+    run_summary["debug_capture"] = debug_capture_summary(args)
+    recorder = trace_recorder_for(args)
+    if recorder is not None:
+        run_summary["trace"] = recorder.export(root)
+    run_summary["finished_at"] = datetime.now(timezone.utc).isoformat()
 
 
 def main() -> int:
     args = parse_args()
+    # Created up front so trace timestamps are relative to the start of the run.
+    trace_recorder_for(args)
+    mock = start_mock_provider(args) if args.mock_provider else None
+
+    if args.benchmark_compare and len(args.benchmark_compare) == 2:
+        candidate = json.loads(Path(args.benchmark_compare[1]).read_text(encoding="utf-8"))
+        return report_benchmark_comparison(args, candidate)
+
+    if args.extractor_benchmark:
+        root = Path(args.output_dir) if args.output_dir else Path(".tmp") / f"phase0-extractor-benchmark-{now_utc()}"
+        run_extractor_benchmark(args, root)
+        print(f"[phase0] extractor benchmark saved to {root / 'extractor_benchmark.json'}")
+        return 0
 
     api_key = os.environ.get(args.api_key_env, "").strip()
     if not api_key:
@@ -465,7 +5498,10 @@ def main() -> int:
         )
         return 2
 
-    root = Path(args.output_dir) if args.output_dir else Path(".tmp") / f"phase0-multimodal-spike-{now_utc()}"
+    if args.resume:
+        root = Path(args.resume)
+    else:
+        root = Path(args.output_dir) if args.output_dir else Path(".tmp") / f"phase0-multimodal-spike-{now_utc()}"
     root.mkdir(parents=True, exist_ok=True)
 
     auth_headers = {"Authorization": f"Bearer {api_key}"}
@@ -484,21 +5520,69 @@ def main() -> int:
         "image_endpoint": args.image_endpoint,
         "audio_endpoint": args.audio_endpoint,
     }
+    if mock is not None:
+        run_summary["mock_provider"] = {"base_url": mock["base_url"], "config": mock["config"]}
 
-    print(f"[phase0] output dir: {root}")
-    print("[phase0] running image case...")
-    image_summary = run_image_case(args, root, auth_headers)
-    run_summary["image_case"] = image_summary
+    if args.benchmark:
+        print(f"[phase0] output dir: {root}")
+        benchmark = run_benchmark(args, root, auth_headers)
+        run_summary["benchmark"] = {"results_path": str(root / "benchmark.json"), "table_path": str(root / "benchmark.md")}
+        attach_runtime_stats(run_summary, args, root)
+        json_dump(root / "summary.json", run_summary)
+        print(f"[phase0] benchmark saved to {root / 'benchmark.json'}")
+        if args.benchmark_compare:
+            return report_benchmark_comparison(args, benchmark)
+        return 0
+
+    if args.lesson_pipeline:
+        print(f"[phase0] output dir: {root}")
+        run_summary["lesson_pipeline"] = run_lesson_pipeline(args, root, auth_headers)
+        attach_runtime_stats(run_summary, args, root)
+        json_dump(root / "summary.json", run_summary)
+        pipeline = run_summary["lesson_pipeline"]
+        print(
+            f"[phase0] p50 lesson latency: serial {pipeline['serial']['end_to_end_seconds']['p50']}s, "
+            f"pipelined {pipeline['pipelined']['end_to_end_seconds']['p50']}s (speedup {pipeline['p50_speedup']})"
+        )
+        print(f"[phase0] summary saved to {root / 'summary.json'}")
+        return 0
 
-    print("[phase0] running audio case...")
-    audio_summary = run_audio_case(args, root, auth_headers)
-    run_summary["audio_case"] = audio_summary
+    if args.storyboard_file:
+        print(f"[phase0] output dir: {root}")
+        run_summary["storyboard_batch"] = run_storyboard_batch(args, root, auth_headers)
+        attach_runtime_stats(run_summary, args, root)
+        json_dump(root / "summary.json", run_summary)
+        batch = run_summary["storyboard_batch"]
+        print(
+            f"[phase0] {batch['successful_lessons']}/{batch['lesson_count']} lessons ok, "
+            f"{batch['lessons_per_minute']} lessons/min, "
+            f"p50 lesson latency {batch['lesson_end_to_end_seconds']['p50']}s"
+        )
+        print(f"[phase0] summary saved to {root / 'summary.json'}")
+        return 0
 
+    cases: list[tuple[str, CaseStepsFactory]] = [
+        ("image_case", image_case_steps),
+        ("audio_case", audio_case_steps),
+    ]
     if not args.skip_malformed:
-        print("[phase0] running malformed request case...")
-        run_summary["malformed_case"] = run_malformed_case(args, root, auth_headers)
+        cases.append(("malformed_case", malformed_case_steps))
 
-    run_summary["finished_at"] = datetime.now(timezone.utc).isoformat()
+    print(f"[phase0] output dir: {root}")
+    if args.probe_daemon:
+        return run_probe_daemon(args, root, auth_headers, cases)
+    wall_started = time.perf_counter()
+    case_summaries, case_timings = run_cases(cases, args, root, auth_headers)
+    total_wall_seconds = time.perf_counter() - wall_started
+    run_summary.update(case_summaries)
+    image_summary = case_summaries["image_case"]
+    audio_summary = case_summaries["audio_case"]
+
+    run_summary["execution_mode"] = "async" if args.async_transport else "concurrent" if args.concurrent else "serial"
+    run_summary["case_wall_seconds"] = {name: round(seconds, 3) for name, seconds in case_timings.items()}
+    run_summary["sum_of_case_seconds"] = round(sum(case_timings.values()), 3)
+    run_summary["total_wall_seconds"] = round(total_wall_seconds, 3)
+    attach_runtime_stats(run_summary, args, root)
     run_summary["overall_pass_candidate"] = bool(
         image_summary.get("success") and audio_summary.get("success")
     )
@@ -0,0 +1,7 @@
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+# The spike and the mock are standalone scripts, not an installed package.
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
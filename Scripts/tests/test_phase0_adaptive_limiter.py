@@ -0,0 +1,50 @@
+"""AdaptiveConcurrencyLimiter (AIMD) windows."""
+
+from __future__ import annotations
+
+import phase0_multimodal_feasibility_spike as spike
+
+
+def run_window(limiter: spike.AdaptiveConcurrencyLimiter, latencies: list[float | None]) -> None:
+    """Acquire one slot per entry, then release them; ``None`` marks an overloaded call."""
+    generations = [limiter.acquire() for _ in latencies]
+    for generation, latency in zip(generations, latencies):
+        limiter.release(generation, latency, overloaded=latency is None)
+
+
+def test_limiter_grows_by_one_after_a_saturated_window() -> None:
+    limiter = spike.AdaptiveConcurrencyLimiter(initial=2, max_limit=3, min_window=2)
+
+    run_window(limiter, [0.1, 0.1])
+    run_window(limiter, [0.1, 0.1, 0.1])
+    run_window(limiter, [0.1, 0.1, 0.1])
+
+    assert limiter.limit == 3
+    assert [entry["reason"] for entry in limiter.timeline] == ["initial", "increase"]
+
+
+def test_limiter_halves_on_errors_and_ignores_stale_samples() -> None:
+    limiter = spike.AdaptiveConcurrencyLimiter(initial=4, max_limit=16, min_window=2)
+    first = [limiter.acquire() for _ in range(4)]
+    for generation in first[:3]:
+        limiter.release(generation, 0.1, overloaded=False)
+    stale = [limiter.acquire() for _ in range(3)]
+
+    limiter.release(first[3], None, overloaded=True)
+    assert limiter.limit == 2
+
+    # Calls acquired before the cut do not count towards the next window.
+    for generation in stale:
+        limiter.release(generation, None, overloaded=True)
+    assert limiter.limit == 2
+    assert [entry["reason"] for entry in limiter.timeline] == ["initial", "errors"]
+
+
+def test_limiter_cuts_a_fifth_when_latency_degrades() -> None:
+    limiter = spike.AdaptiveConcurrencyLimiter(initial=5, max_limit=5, latency_tolerance=1.5, min_window=5)
+
+    run_window(limiter, [0.1] * 5)
+    run_window(limiter, [1.0] * 5)
+
+    assert limiter.limit == 4
+    assert limiter.timeline[-1]["reason"] == "latency"
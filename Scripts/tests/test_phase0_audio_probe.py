@@ -0,0 +1,105 @@
+"""Audio header probes and the first-decodable-frame scan."""
+
+from __future__ import annotations
+
+import struct
+from pathlib import Path
+
+import pytest
+
+import phase0_multimodal_feasibility_spike as spike
+from phase0_mock_provider_server import make_m4a, make_mp3, make_wav
+
+
+def probe(tmp_path: Path, name: str, data: bytes) -> dict:
+    path = tmp_path / name
+    path.write_bytes(data)
+    return spike.probe_audio_file(path)
+
+
+def test_probe_reads_cbr_mp3_duration_from_frame_headers(tmp_path: Path) -> None:
+    data = make_mp3(64 * 1024)
+
+    info = probe(tmp_path, "clip.mp3", data)
+
+    assert info["container"] == "mp3" and info["method"] == "cbr estimate"
+    assert info["bitrate"] == 128000 and info["sample_rate"] == 44100
+    assert info["duration_seconds"] == pytest.approx((len(data) - 20) * 8 / 128000, abs=0.001)
+    assert info["header_bytes_read"] < 8192
+
+
+def test_probe_prefers_the_xing_frame_count(tmp_path: Path) -> None:
+    header = bytes((0xFF, 0xFB, 0x90, 0x64))
+    # MPEG-1 stereo: 32 bytes of side information precede the Xing tag.
+    xing = b"Xing" + struct.pack(">II", 1, 1000)
+    first = header + b"\x00" * 32 + xing
+    first += b"\x00" * (417 - len(first))
+    data = first + (header + b"\x00" * 413) * 3
+
+    info = probe(tmp_path, "clip.mp3", data)
+
+    assert info["method"] == "xing"
+    assert info["duration_seconds"] == pytest.approx(1000 * 1152 / 44100, abs=0.001)
+
+
+def test_probe_reads_wav_and_m4a_headers(tmp_path: Path) -> None:
+    wav = probe(tmp_path, "clip.wav", make_wav(32044))
+    m4a = probe(tmp_path, "clip.m4a", make_m4a(4096, duration_seconds=2.5))
+
+    assert (wav["container"], wav["duration_seconds"], wav["sample_rate"], wav["channels"]) == ("wav", 1.0, 16000, 1)
+    assert (m4a["container"], m4a["duration_seconds"]) == ("mp4", 2.5)
+
+
+def test_probe_notes_a_truncated_mvhd_box(tmp_path: Path) -> None:
+    data = make_m4a(0)
+    moov = data.index(b"moov") - 4
+    truncated = data[:moov] + struct.pack(">I4s", 8 + 8 + 6, b"moov") + struct.pack(">I4s", 14, b"mvhd") + b"\x00" * 6
+
+    info = probe(tmp_path, "clip.m4a", truncated)
+
+    assert info["duration_seconds"] is None
+    assert info["notes"] == ["Truncated mvhd box"]
+
+
+def test_probe_notes_a_misnamed_container(tmp_path: Path) -> None:
+    info = probe(tmp_path, "clip.m4a", make_mp3(4096))
+
+    assert "Saved as .m4a but the bytes are mp3" in info["notes"]
+
+
+def test_postprocess_probes_off_the_loop_and_notes_a_corrupt_header(tmp_path: Path) -> None:
+    args = spike.argparse.Namespace(trace=False, audio_normalize=False)
+    steps = spike.audio_postprocess_steps(args, {"media_path": str(tmp_path / "clip.mp3")}, "clip")
+
+    call = next(steps)
+    assert isinstance(call, spike.BlockingCall) and call.fn is spike.probe_audio_file
+    with pytest.raises(StopIteration) as stop:
+        steps.throw(struct.error("unpack requires a buffer of 8 bytes"))
+
+    assert stop.value.value["duration_seconds"] is None
+    assert stop.value.value["audio_probe"]["notes"] == ["Header probe failed: error: unpack requires a buffer of 8 bytes"]
+
+
+def test_probe_audio_or_note_records_the_failure(tmp_path: Path) -> None:
+    notes: list[str] = []
+
+    assert spike.probe_audio_or_note(tmp_path / "missing.wav", notes) == {"duration_seconds": None}
+    assert notes and notes[0].startswith("Header probe of missing.wav failed: FileNotFoundError")
+
+
+def test_first_decodable_audio_end_scans_incrementally() -> None:
+    data = make_mp3(4096)
+    tag = spike.id3v2_size(data)
+    frame_end = tag + spike.parse_mp3_frame_header(data[tag : tag + 4])["frame_length"]
+    resume, results = 0, []
+    # The first frame only counts once the next frame's header has arrived and syncs.
+    for end in range(1, frame_end + 5):
+        found, resume = spike.first_decodable_audio_end(data[:end], "audio/mpeg", resume)
+        results.append(found)
+
+    assert results[:-1] == [None] * (frame_end + 3)
+    assert results[-1] == frame_end
+    wav = make_wav(1000)
+    assert spike.first_decodable_audio_end(wav[:44], "audio/wav")[0] is None
+    assert spike.first_decodable_audio_end(wav[:46], "audio/wav")[0] == 45
+    assert spike.first_decodable_audio_end(b"\x00" * 100, "audio/mp4")[0] is None
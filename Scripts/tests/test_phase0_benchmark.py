@@ -0,0 +1,46 @@
+"""Benchmark result keys and comparisons across schema versions."""
+
+from __future__ import annotations
+
+import phase0_multimodal_feasibility_spike as spike
+
+
+def result(target: str, provider: str, protocol: str, p50: float, **extra: str) -> dict:
+    kind = target.split(":", 1)[0]
+    latency = {"p50": p50, "p90": p50}
+    return {
+        "target": target,
+        "kind": kind,
+        "provider": provider,
+        "protocol": protocol,
+        "model": "m",
+        "latency_seconds": latency,
+        "error_rate": 0.0,
+        **extra,
+    }
+
+
+def test_gateway_name_keeps_the_vendor_label() -> None:
+    assert spike.gateway_name("zenmux.ai") == "zenmux"
+    assert spike.gateway_name("api.elevenlabs.io") == "elevenlabs"
+    assert spike.gateway_name("aihubmix.com") == "aihubmix"
+    assert spike.gateway_name("127.0.0.1") == "127.0.0.1"
+    assert spike.gateway_name("mock-provider") == "mock-provider"
+
+
+def test_older_schemas_key_by_gateway_and_wire_protocol() -> None:
+    v1 = result("audio:zenmux", "zenmux.ai", "zenmux", 1.0)
+    v2 = result("audio:zenmux", "zenmux", "zenmux", 1.0, host="zenmux.ai")
+    v3 = result("audio:zenmux", "zenmux", "openai", 1.0, host="zenmux.ai")
+
+    assert spike.benchmark_key(v1, 1) == spike.benchmark_key(v2, 2) == spike.benchmark_key(v3) == ("audio", "zenmux", "openai", "m")
+
+
+def test_compare_matches_a_schema_2_baseline() -> None:
+    baseline = {"schema_version": 2, "results": [result("image:vertex", "vertex", "vertex", 1.0, host="zenmux.ai")]}
+    candidate = {"schema_version": 3, "results": [result("image:vertex", "zenmux", "vertex", 2.0, host="zenmux.ai")]}
+
+    table, regressions = spike.compare_benchmarks(baseline, candidate, 0.1)
+
+    assert "| image | zenmux | vertex | m | 2.0 | +100%" in table
+    assert regressions == ["image/zenmux/vertex/m p50 1.0s -> 2.0s (+100%)", "image/zenmux/vertex/m p90 1.0s -> 2.0s (+100%)"]
@@ -0,0 +1,123 @@
+"""Every --mock-config response shape, run through the spike's real case steps."""
+
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+import phase0_multimodal_feasibility_spike as spike
+from phase0_mock_provider_server import AUDIO_SHAPES, IMAGE_SHAPES, config_from_mapping, start_mock_server
+
+
+@pytest.fixture
+def mock_run(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    """Start a mock with the given settings and return parsed spike args pointed at it."""
+    servers = []
+
+    def start(settings: dict[str, Any], *argv: str) -> tuple[Any, Any]:
+        server, base_url = start_mock_server(config_from_mapping(settings))
+        servers.append(server)
+        monkeypatch.setenv("AIHUBMIX_API_KEY", "mock-provider-key")
+        monkeypatch.setenv("ELEVENLABS_API_KEY", "mock-elevenlabs-key")
+        monkeypatch.setattr(
+            sys,
+            "argv",
+            [
+                "phase0_multimodal_feasibility_spike.py",
+                "--base-url", f"{base_url}/api/v1",
+                "--elevenlabs-base-url", base_url,
+                "--output-dir", str(tmp_path),
+                "--debug-capture", "off",
+                *argv,
+            ],
+        )
+        return spike.parse_args(), server.mock_state
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def run_image(args: Any, out_dir: Path) -> dict[str, Any]:
+    return spike.run_case_steps(args, spike.image_case_steps(args, out_dir, {"Authorization": "Bearer mock-provider-key"}))
+
+
+def run_audio(args: Any, out_dir: Path) -> dict[str, Any]:
+    return spike.run_case_steps(args, spike.audio_case_steps(args, out_dir, {"Authorization": "Bearer mock-provider-key"}))
+
+
+@pytest.mark.parametrize("stream_media", [False, True], ids=["buffered", "streamed"])
+@pytest.mark.parametrize("shape", [shape for shape in IMAGE_SHAPES if shape not in ("403", "500")])
+def test_image_shapes_yield_the_mock_png(mock_run, tmp_path: Path, shape: str, stream_media: bool) -> None:
+    protocol = "vertex" if shape in ("auto", "inline_data") else "openai"
+    args, state = mock_run(
+        {"image_shape": shape, "image_bytes": 4096},
+        "--image-protocol", protocol,
+        *(["--stream-media"] if stream_media else []),
+    )
+
+    summary = run_image(args, tmp_path)
+
+    assert summary["success"], summary["notes"]
+    assert summary["status"] == 200
+    assert Path(summary["media_path"]).read_bytes() == state.png
+
+
+@pytest.mark.parametrize("shape", ["403", "500"])
+def test_image_error_shapes_fail_with_their_status(mock_run, tmp_path: Path, shape: str) -> None:
+    args, _ = mock_run({"image_shape": shape}, "--image-protocol", "openai")
+
+    summary = run_image(args, tmp_path)
+
+    assert not summary["success"]
+    assert summary["status"] == int(shape)
+    assert summary["media_path"] is None
+
+
+@pytest.mark.parametrize("stream_media", [False, True], ids=["buffered", "streamed"])
+@pytest.mark.parametrize("shape", [shape for shape in AUDIO_SHAPES if shape not in ("403", "500")])
+def test_audio_shapes_yield_the_mock_audio(mock_run, tmp_path: Path, shape: str, stream_media: bool) -> None:
+    args, state = mock_run(
+        {"audio_shape": shape, "audio_bytes": 4096},
+        "--audio-provider", "zenmux",
+        "--audio-format", "wav",
+        *(["--stream-media"] if stream_media else []),
+    )
+
+    summary = run_audio(args, tmp_path)
+
+    assert summary["success"], summary["notes"]
+    assert Path(summary["media_path"]).read_bytes() == state.audio["wav"]
+    assert summary["audio_probe"]["container"] == "wav"
+
+
+@pytest.mark.parametrize("shape", ["403", "500"])
+def test_audio_error_shapes_fail_with_their_status(mock_run, tmp_path: Path, shape: str) -> None:
+    args, _ = mock_run({"audio_shape": shape}, "--audio-provider", "zenmux")
+
+    summary = run_audio(args, tmp_path)
+
+    assert not summary["success"]
+    assert summary["status"] == int(shape)
+
+
+def test_elevenlabs_stream_probes_the_mp3(mock_run, tmp_path: Path) -> None:
+    args, state = mock_run({"audio_bytes": 8192, "stream_chunk_delay": 0.0}, "--audio-streaming", "--stream-media")
+
+    summary = run_audio(args, tmp_path)
+
+    assert summary["success"], summary["notes"]
+    assert Path(summary["media_path"]).read_bytes() == state.audio["mp3"]
+    assert summary["streaming"]["first_decodable_frame_seconds"] is not None
+    assert summary["audio_probe"]["container"] == "mp3"
+
+
+def test_unknown_mock_settings_are_rejected() -> None:
+    with pytest.raises(ValueError, match="image_shape"):
+        config_from_mapping({"image_shape": "nope"})
+    with pytest.raises(ValueError, match="Unknown mock provider settings"):
+        config_from_mapping({"imageshape": "url"})
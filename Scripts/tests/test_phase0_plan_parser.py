@@ -0,0 +1,45 @@
+"""StoryboardPlanParser fed the planner's output a character at a time."""
+
+from __future__ import annotations
+
+import json
+
+import phase0_multimodal_feasibility_spike as spike
+from phase0_mock_provider_server import storyboard_plan_text
+
+
+def test_plan_parser_emits_frames_as_each_object_closes() -> None:
+    text = storyboard_plan_text("Word 1: affect\nWord 2: effect")
+    parser = spike.StoryboardPlanParser()
+    seen: list[tuple[int, int]] = []
+
+    for offset, char in enumerate(text):
+        for frame in parser.feed(char):
+            seen.append((frame.index, offset))
+
+    assert [frame.role for frame in parser.frames] == list(spike.STORYBOARD_FRAME_ROLES)
+    assert [index for index, _ in seen] == [0, 1, 2, 3]
+    # Each frame surfaces before the rest of the plan has arrived.
+    assert seen[0][1] < len(text) // 2
+    assert "affect" in parser.frames[0].narration_text
+
+
+def test_plan_parser_accepts_bare_arrays_and_json_lines_but_not_nested_objects() -> None:
+    frame = {"role": "overlap", "image_prompt": "p", "narration_text": "n", "meta": {"image_prompt": "x", "narration_text": "y"}}
+    for text in (
+        json.dumps([frame, frame]),
+        json.dumps(frame) + "\n" + json.dumps(frame),
+        'Sure! "Here" is the plan:\n```json\n' + json.dumps({"frames": [frame, frame]}) + "\n```",
+    ):
+        parser = spike.StoryboardPlanParser()
+        parser.feed(text)
+        assert [(item.index, item.role, item.image_prompt) for item in parser.frames] == [(0, "overlap", "p"), (1, "overlap", "p")]
+
+
+def test_plan_parser_skips_objects_missing_frame_fields() -> None:
+    parser = spike.StoryboardPlanParser()
+
+    parser.feed('[{"role": "overlap"}, {"image_prompt": "p", "narration_text": "a } in \\"text\\""}]')
+
+    assert len(parser.frames) == 1
+    assert parser.frames[0].role == "frame_0"
@@ -0,0 +1,105 @@
+"""PNG decoding across every row filter, and BlurHash encoding."""
+
+from __future__ import annotations
+
+import random
+import struct
+import zlib
+
+import pytest
+
+import phase0_multimodal_feasibility_spike as spike
+from phase0_mock_provider_server import make_png
+
+
+def _filter_rows(width: int, height: int, pixels: bytes, channels: int) -> bytes:
+    """Encode each row with a different PNG filter (None, Sub, Up, Average, Paeth, ...)."""
+    stride = width * channels
+    previous, out = bytes(stride), bytearray()
+    for y in range(height):
+        row = pixels[y * stride : (y + 1) * stride]
+        kind = y % 5
+        filtered = bytearray()
+        for index, value in enumerate(row):
+            left = row[index - channels] if index >= channels else 0
+            above = previous[index]
+            upper_left = previous[index - channels] if index >= channels else 0
+            predictor = (0, left, above, (left + above) >> 1, spike._paeth(left, above, upper_left))[kind]
+            filtered.append((value - predictor) & 0xFF)
+        out += bytes((kind,)) + filtered
+        previous = row
+    return bytes(out)
+
+
+def _png(width: int, height: int, color_type: int, raw: bytes) -> bytes:
+    def chunk(kind: bytes, body: bytes) -> bytes:
+        return struct.pack(">I", len(body)) + kind + body + struct.pack(">I", zlib.crc32(kind + body) & 0xFFFFFFFF)
+
+    header = struct.pack(">IIBBBBB", width, height, 8, color_type, 0, 0, 0)
+    compressed = zlib.compress(raw)
+    # Split IDAT to check that chunks are concatenated before inflating.
+    middle = len(compressed) // 2
+    return (
+        spike.PNG_SIGNATURE
+        + chunk(b"IHDR", header)
+        + chunk(b"IDAT", compressed[:middle])
+        + chunk(b"IDAT", compressed[middle:])
+        + chunk(b"IEND", b"")
+    )
+
+
+def test_decode_png_undoes_every_row_filter() -> None:
+    width, height = 7, 10
+    rgba = random.Random(1).randbytes(width * height * 4)
+
+    decoded = spike.decode_png_rgb(_png(width, height, 6, _filter_rows(width, height, rgba, 4)))
+
+    expected = bytes(value for index, value in enumerate(rgba) if index % 4 != 3)
+    assert decoded == (width, height, expected)
+
+
+def test_decode_png_round_trips_the_encoder_and_the_mock_image() -> None:
+    rgb = random.Random(2).randbytes(5 * 4 * 3)
+    assert spike.decode_png_rgb(spike.encode_png_rgb(5, 4, rgb)) == (5, 4, rgb)
+
+    width, height, pixels = spike.decode_png_rgb(make_png(3000))
+    assert width == height and len(pixels) == width * height * 3
+
+
+def test_decode_png_expands_grey_and_rejects_other_formats() -> None:
+    grey = bytes(range(0, 240, 10))
+
+    _, _, rgb = spike.decode_png_rgb(_png(6, 4, 0, _filter_rows(6, 4, grey, 1)))
+
+    assert rgb == bytes(value for value in grey for _ in range(3))
+    with pytest.raises(ValueError, match="not a PNG"):
+        spike.decode_png_rgb(b"GIF89a")
+    with pytest.raises(ValueError, match="unsupported PNG"):
+        spike.decode_png_rgb(_png(2, 2, 3, b"\x00\x00\x00" * 2))
+
+
+_BASE83 = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz#$%*+,-.:;=?@[]^_{|}~"
+
+
+def _base83(text: str) -> int:
+    value = 0
+    for char in text:
+        value = value * 83 + _BASE83.index(char)
+    return value
+
+
+def test_blurhash_of_a_solid_color_carries_it_as_the_dc_term() -> None:
+    encoded = spike.blurhash_encode(4, 4, bytes((200, 100, 50)) * 16)
+
+    # Size flag, quantized maximum AC, four DC characters, then two per AC component.
+    assert len(encoded) == 6 + 2 * (4 * 3 - 1)
+    assert _base83(encoded[0]) == (4 - 1) + (3 - 1) * 9
+    dc = _base83(encoded[2:6])
+    assert (dc >> 16, (dc >> 8) & 0xFF, dc & 0xFF) == (200, 100, 50)
+    assert set(encoded) <= set(_BASE83)
+
+
+def test_blurhash_differs_for_a_horizontal_gradient() -> None:
+    gradient = bytes(value for x in range(8) for value in (x * 32, x * 32, x * 32)) * 8
+
+    assert spike.blurhash_encode(8, 8, gradient) != spike.blurhash_encode(8, 8, bytes((112, 112, 112)) * 64)
@@ -0,0 +1,82 @@
+"""RequestScheduler hedging on the threaded and asyncio transports."""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+
+import phase0_multimodal_feasibility_spike as spike
+
+
+def hedging_scheduler(threshold: float) -> spike.RequestScheduler:
+    """A scheduler whose host p95 is already ``threshold``, so the next slow call is hedged."""
+    scheduler = spike.RequestScheduler(hedge=True, hedge_min_samples=3)
+    for _ in range(3):
+        scheduler._observe("x", spike.HTTPResult(200, None, {}, b"", threshold))
+    return scheduler
+
+
+def test_sync_hedge_returns_as_soon_as_the_hedge_finishes() -> None:
+    scheduler = hedging_scheduler(0.1)
+    release = threading.Event()
+    calls = []
+
+    def send() -> spike.HTTPResult:
+        calls.append(None)
+        if len(calls) == 1:
+            # The primary stalls for up to 3s; the hedge answers immediately.
+            release.wait(3.0)
+            return spike.HTTPResult(200, None, {}, b"primary", 3.0)
+        return spike.HTTPResult(200, None, {}, b"hedge", 0.0)
+
+    started = time.perf_counter()
+    result = scheduler.execute("http://x/api", send)
+    elapsed = time.perf_counter() - started
+    release.set()
+
+    assert result.body == b"hedge"
+    assert elapsed < 1.0
+    assert scheduler.stats["hedges"] == 1 and scheduler.stats["hedge_wins"] == 1
+    assert [entry["kind"] for entry in result.attempts] == ["hedge"]
+    assert result.attempts[0]["elapsed_seconds"] < 0.5
+
+
+def test_sync_hedge_keeps_a_primary_that_wins_first() -> None:
+    scheduler = hedging_scheduler(0.05)
+
+    def send() -> spike.HTTPResult:
+        time.sleep(0.2 if threading.current_thread().name.startswith("phase0-hedge") else 0.1)
+        return spike.HTTPResult(200, None, {}, threading.current_thread().name.encode(), 0.1)
+
+    result = scheduler.execute("http://x/api", send)
+
+    assert result.body.startswith(b"phase0-primary")
+    assert scheduler.stats["hedges"] == 1 and scheduler.stats["hedge_wins"] == 0
+    assert [entry["kind"] for entry in result.attempts] == ["primary"]
+    assert result.attempts[0]["elapsed_seconds"] < 0.2
+
+
+def test_async_hedge_cancels_both_attempts_when_the_caller_is_cancelled() -> None:
+    scheduler = hedging_scheduler(0.01)
+    cancelled = []
+
+    async def send() -> spike.HTTPResult:
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(None)
+            raise
+        return spike.HTTPResult(200, None, {}, b"", 10.0)
+
+    async def main() -> int:
+        call = asyncio.ensure_future(scheduler.async_execute("http://x/api", send))
+        await asyncio.sleep(0.1)
+        call.cancel()
+        await asyncio.gather(call, return_exceptions=True)
+        await asyncio.sleep(0.05)
+        # Counted before asyncio.run() cancels any leftover tasks on its own.
+        return len(cancelled)
+
+    assert asyncio.run(main()) == 2
+    assert scheduler.stats["hedges"] == 1
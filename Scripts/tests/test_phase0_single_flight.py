@@ -0,0 +1,75 @@
+"""SingleFlight request coalescing and coalesced case steps."""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+import phase0_multimodal_feasibility_spike as spike
+
+
+def test_single_flight_leads_once_and_shares_the_result() -> None:
+    flights = spike.SingleFlight()
+    key = flights.key({"prompt": "a  cat\n", "model": "m"})
+    assert key == flights.key({"prompt": "a cat", "model": "m"})
+
+    future, leader = flights.join(key, "first")
+    shared, follower_of = flights.join(key, "second")
+    assert leader is None and follower_of == "first" and shared is future
+
+    flights.finish(key, future, {"success": True}, None)
+
+    assert shared.result(timeout=1) == {"success": True}
+    _, next_leader = flights.join(key, "third")
+    assert next_leader is None
+    assert flights.stats() == {"leaders": 2, "coalesced": 1, "failed_leaders": 0, "in_flight": 1}
+
+
+def test_single_flight_propagates_errors_and_tolerates_cancelled_futures() -> None:
+    flights = spike.SingleFlight()
+    future, _ = flights.join("k", "first")
+    flights.finish("k", future, None, RuntimeError("upstream down"))
+    with pytest.raises(RuntimeError, match="upstream down"):
+        future.result(timeout=1)
+
+    cancelled, _ = flights.join("k", "second")
+    assert cancelled.cancel()
+    flights.finish("k", cancelled, {"success": True}, None)
+    assert flights.stats()["failed_leaders"] == 1 and flights.stats()["in_flight"] == 0
+
+
+def finish_steps(steps, value):
+    """Send ``value`` into a step generator, running any BlockingCalls inline, and return its summary."""
+    try:
+        call = steps.send(value)
+        while True:
+            assert isinstance(call, spike.BlockingCall)
+            call = steps.send(call.fn(*call.args))
+    except StopIteration as stop:
+        return stop.value
+
+
+def test_coalesced_follower_links_the_leader_media(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(spike, "_SINGLE_FLIGHT", None)
+    args = spike.argparse.Namespace(coalesce=True)
+    request = spike.CaseRequest("http://x/api", {}, {}, "m", {"prompt": "p"})
+    source = tmp_path / "lead_output.png"
+    source.write_bytes(b"png")
+
+    def generate():
+        yield spike.HTTPCall("POST", "http://x/api", {}, {})
+        return {"success": True, "media_path": str(source), "status": 200, "notes": []}
+
+    leader = spike.coalesced_case_steps(args, tmp_path, "lead", request, generate())
+    assert isinstance(next(leader), spike.HTTPCall)
+    follower = spike.coalesced_case_steps(args, tmp_path, "follow", request, generate())
+    join = next(follower)
+    assert isinstance(join, spike.JoinCall)
+
+    led = finish_steps(leader, None)
+    followed = finish_steps(follower, join.future.result(timeout=1))
+
+    assert led["success"] and followed["success"]
+    assert followed["coalesced_with"] == str(tmp_path / "lead")
+    assert Path(followed["media_path"]).read_bytes() == b"png"
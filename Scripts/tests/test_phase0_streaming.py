@@ -0,0 +1,165 @@
+"""IncrementalBase64Decoder, the streaming media writers and find_media_field."""
+
+from __future__ import annotations
+
+import base64
+import json
+import random
+from pathlib import Path
+
+import pytest
+
+import phase0_multimodal_feasibility_spike as spike
+from phase0_mock_provider_server import make_wav
+
+
+def chunked(data: bytes, seed: int) -> list[bytes]:
+    """Split ``data`` at random points, including one-byte pieces."""
+    rng = random.Random(seed)
+    pieces, start = [], 0
+    while start < len(data):
+        end = min(len(data), start + rng.choice((1, 2, 3, 7, 64, 1000)))
+        pieces.append(data[start:end])
+        start = end
+    return pieces
+
+
+# IncrementalBase64Decoder
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_base64_decoder_matches_b64decode_for_any_chunking(seed: int) -> None:
+    media = random.Random(seed).randbytes(1000 + seed)
+    # JSON escapes "/" as "\/" and may wrap long strings with "\n".
+    encoded = base64.b64encode(media).replace(b"/", b"\\/")
+    encoded = b"\\n".join(encoded[index : index + 76] for index in range(0, len(encoded), 76))
+    decoder = spike.IncrementalBase64Decoder()
+
+    decoded = b"".join(decoder.feed(piece) for piece in chunked(encoded, seed)) + decoder.finish()
+
+    assert decoded == media
+
+
+def test_base64_decoder_accepts_missing_padding_and_urlsafe_alphabet() -> None:
+    media = bytes(range(256)) + b"\xfb\xff"
+    decoder = spike.IncrementalBase64Decoder()
+
+    decoded = decoder.feed(base64.urlsafe_b64encode(media).rstrip(b"=")) + decoder.finish()
+
+    assert decoded == media
+
+
+def test_base64_decoder_rejects_a_dangling_character() -> None:
+    decoder = spike.IncrementalBase64Decoder()
+    decoder.feed(b"QUJDR")
+
+    with pytest.raises(ValueError):
+        decoder.finish()
+
+
+# StreamingMediaExtractor and find_media_field
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_streaming_extractor_decodes_vertex_inline_data_in_any_chunking(tmp_path: Path, seed: int) -> None:
+    media = random.Random(seed).randbytes(3000)
+    encoded = base64.b64encode(media).decode("ascii")
+    body = json.dumps(
+        {
+            "candidates": [
+                {
+                    "content": {
+                        "parts": [
+                            {"text": "Here is \"the\" illustration, {not json} [\\u00e9]."},
+                            {"inlineData": {"mimeType": "image/png", "data": encoded}},
+                        ]
+                    }
+                }
+            ],
+            "usageé": {"tokens": [1, 2, 3]},
+        }
+    ).encode("utf-8")
+    extractor = spike.StreamingMediaExtractor(tmp_path / "media.bin", spike.MEDIA_SHAPES["vertex_image"])
+
+    for piece in chunked(body, seed):
+        extractor.feed(piece)
+    streamed = extractor.finish()
+
+    assert streamed is not None and streamed.error is None
+    assert streamed.source == "candidates[].content.parts[].inlineData"
+    assert (tmp_path / "media.bin").read_bytes() == media
+    skeleton = json.loads(bytes(extractor.skeleton))
+    assert skeleton["candidates"][0]["content"]["parts"][1]["inlineData"]["data"] == "<streamed 3000 bytes to disk>"
+    assert skeleton["usageé"] == {"tokens": [1, 2, 3]}
+
+
+def test_streaming_extractor_ignores_non_matching_paths(tmp_path: Path) -> None:
+    extractor = spike.StreamingMediaExtractor(tmp_path / "media.bin", spike.MEDIA_SHAPES["openai_image"])
+
+    extractor.feed(b'{"data": [{"url": "http://example.invalid/x.png"}], "b64_json": "QUJD"}')
+
+    assert extractor.finish() is None
+    assert not (tmp_path / "media.bin").exists()
+
+
+def test_streaming_extractor_reports_a_truncated_body(tmp_path: Path) -> None:
+    extractor = spike.StreamingMediaExtractor(tmp_path / "media.bin", spike.MEDIA_SHAPES["openai_image"])
+
+    extractor.feed(b'{"data": [{"b64_json": "QUJDRE')
+    streamed = extractor.finish()
+
+    assert streamed is not None
+    assert streamed.error == "Response ended inside streamed field data[0].b64_json"
+
+
+def test_streaming_extractor_falls_back_from_an_empty_field(tmp_path: Path) -> None:
+    extractor = spike.StreamingMediaExtractor(tmp_path / "media.bin", spike.MEDIA_SHAPES["openai_image"])
+
+    extractor.feed(b'{"data": [{"b64_json": "", "b64": "QUJD"}]}')
+    streamed = extractor.finish()
+
+    assert streamed is not None and streamed.source == "data[0].b64"
+    assert (tmp_path / "media.bin").read_bytes() == b"ABC"
+
+
+def test_find_media_field_follows_spec_priority_not_document_order() -> None:
+    payload = {"data": [{"audio": "QUJD"}], "audio": {"b64": "REVG"}}
+
+    spec, value = spike.find_media_field(payload, "audio")
+
+    assert (spec.label, value) == ("audio.b64", "REVG")
+
+
+def test_find_media_field_treats_an_empty_b64_json_as_absent() -> None:
+    spec, value = spike.find_media_field({"data": [{"b64_json": "", "b64": "QUJD"}]}, "openai_image")
+
+    assert (spec.label, value) == ("data[0].b64", "QUJD")
+    assert spike.extract_media_bytes({"data": [{"b64_json": "", "url": "u"}]}, "openai_image") == (
+        None,
+        "Image returned URL only: u",
+    )
+
+
+def test_find_media_field_takes_the_first_wildcard_match() -> None:
+    parts = [{"text": "x"}, {"inlineData": {"data": "QUJD"}}, {"inlineData": {"data": "REVG"}}]
+
+    _, value = spike.find_media_field({"candidates": [{"content": {"parts": parts}}]}, "vertex_image")
+
+    assert value == "QUJD"
+
+
+def test_binary_writer_only_buffers_audio_until_its_first_frame(tmp_path: Path) -> None:
+    image = spike._BinaryMediaWriter(tmp_path / "image.bin", "image/png", 0.0)
+    audio = spike._BinaryMediaWriter(tmp_path / "audio.bin", "audio/wav", 0.0)
+    wav = make_wav(4096)
+
+    for piece in chunked(wav, 0):
+        image.feed(piece)
+        audio.feed(piece)
+    image.finish()
+    audio.finish()
+
+    assert image.streamed.size == audio.streamed.size == len(wav)
+    assert not image._head and not audio._head
+    assert image.streamed.first_decodable_seconds is None
+    assert audio.streamed.first_decodable_seconds is not None